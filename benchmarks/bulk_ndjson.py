@@ -0,0 +1,77 @@
+"""Benchmark the bulk NDJSON build/validate pipeline on synthetic items.
+
+Runs ``iter_bulk_results`` over ``--items`` generated payloads (100k by
+default) without materializing the input or output, and reports items/sec
+and peak RSS::
+
+    python benchmarks/bulk_ndjson.py --items 100000
+"""
+
+import argparse
+import json
+import random
+import resource
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from topo4d_form.bulk import iter_bulk_results  # noqa: E402
+
+
+def synthetic_payloads(n, seed=0):
+    """Yield ``n`` deterministic flat form payloads as NDJSON lines."""
+    rng = random.Random(seed)
+    for i in range(n):
+        x, y = rng.uniform(-180, 170), rng.uniform(-80, 70)
+        payload = {
+            "item_id": f"epoch-{i:06d}",
+            "datetime": f"2024-01-{1 + i % 28:02d}T{i % 24:02d}:00:00Z",
+            "topo4d_data_type": "pointcloud",
+            "topo4d_acquisition_mode": rng.choice(["ULS", "TLS", "UPH"]),
+            "topo4d_spatial_resolution": str(round(rng.uniform(0.01, 1), 3)),
+            "trafometa_reference_epoch_href": f"./epoch-{max(i - 1, 0):06d}.json",
+            "trafometa_registration_error": str(round(rng.uniform(0, 0.1), 4)),
+            "trafometa_transformation": "1,0,0,0;0,1,0,0;0,0,1,0;0,0,0,1",
+            "bbox": [x, y, x + 0.01, y + 0.01],
+        }
+        yield json.dumps(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--max-in-flight", type=int, default=None)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    count = 0
+    summary = None
+    for line in iter_bulk_results(
+        synthetic_payloads(args.items), max_in_flight=args.max_in_flight
+    ):
+        if line.startswith('{"summary"'):
+            summary = json.loads(line)["summary"]
+        else:
+            count += 1
+    wall = time.perf_counter() - t0
+    print(
+        json.dumps(
+            {
+                "items": count,
+                "seconds": round(wall, 2),
+                "items_per_sec": round(count / wall, 1),
+                "invalid": summary["invalid"],
+                "errors": summary["errors"],
+                # ru_maxrss is in KiB on Linux
+                "peak_rss_mb": round(
+                    resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+                ),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
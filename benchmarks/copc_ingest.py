@@ -0,0 +1,231 @@
+"""COPC footprint from the octree against a full chunked scan.
+
+Writes a synthetic COPC file (``--points`` points in a C-shaped area, so the
+footprint differs from the bbox) unless ``--file`` gives one, then times:
+
+- ``header``: reading the LAS header only
+- ``copc_depth_<d>``: ``topo4d_form.copc.read_copc`` at each ``--depth``
+- ``full_scan``: decoding every point in chunks (XY only) into the same
+  occupancy grid as the deepest ``--depth``
+
+and reports wall time, decoded points and the IoU of each footprint with the
+full-scan one::
+
+    python benchmarks/copc_ingest.py --points 20000000 --depth 0 2 4
+    python benchmarks/copc_ingest.py --file epoch.copc.laz
+
+Needs laspy with the lazrs backend.
+"""
+
+import argparse
+import io
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import laspy
+import lazrs
+import numpy as np
+import pyproj
+import shapely
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from topo4d_form.copc import (  # noqa: E402
+    footprint_cell_size,
+    grid_cell_size,
+    grid_footprint,
+    grid_shape,
+    occupancy_grid,
+    read_copc,
+)
+from topo4d_form.las import read_las_header  # noqa: E402
+
+ORIGIN = (690000.0, 5335000.0, 500.0)  # EPSG:25832, as in make_las_corpus.py
+EXTENT = 1000.0  # metres
+MAX_LEVEL = 6
+CHUNK = 1_000_000
+
+
+def _c_shape(n, rng):
+    """``n`` points in a C-shaped ring over an ``EXTENT`` square."""
+    out = []
+    while sum(len(p) for p in out) < n:
+        xy = rng.uniform(0, EXTENT, (2 * n, 2))
+        d = np.hypot(xy[:, 0] - EXTENT / 2, xy[:, 1] - EXTENT / 2)
+        keep = (d > 0.25 * EXTENT) & (d < 0.5 * EXTENT) & ~((xy[:, 0] > EXTENT / 2) & (np.abs(xy[:, 1] - EXTENT / 2) < 0.1 * EXTENT))
+        out.append(xy[keep])
+    xy = np.concatenate(out)[:n]
+    z = rng.normal(50.0, 10.0, n)
+    return np.column_stack([ORIGIN[0] + xy[:, 0], ORIGIN[1] + xy[:, 1], ORIGIN[2] + z])
+
+
+def write_copc(path, n, seed=0):
+    """Write ``n`` points as a COPC file (point format 6, EPSG:25832).
+
+    Points go to the coarsest octree level whose sampling grid (the root
+    spacing halved per level) has no point in their cell yet, down to
+    ``MAX_LEVEL``; each node is one variable-size LAZ chunk and the whole
+    hierarchy is a single page in an EVLR.
+    """
+    rng = np.random.default_rng(seed)
+    xyz = _c_shape(n, rng)
+    mins, maxs = xyz.min(axis=0), xyz.max(axis=0)
+    center = (mins + maxs) / 2
+    halfsize = float((maxs - mins).max()) / 2 * 1.001
+    cube_min = center - halfsize
+    spacing = 2 * halfsize / 128
+
+    level = np.full(n, MAX_LEVEL, dtype=np.int32)
+    pending = np.arange(n)
+    for lvl in range(MAX_LEVEL):
+        cell = spacing / 2**lvl
+        m = int(np.ceil(2 * halfsize / cell)) + 1
+        k = np.floor((xyz[pending] - cube_min) / cell).astype(np.int64)
+        _, first = np.unique((k[:, 0] * m + k[:, 1]) * m + k[:, 2], return_index=True)
+        level[pending[first]] = lvl
+        pending = np.delete(pending, first)
+
+    keys = np.floor((xyz - cube_min) / (2 * halfsize / 2.0 ** level[:, None])).astype(np.int64)
+    keys = np.minimum(keys, 2 ** level[:, None].astype(np.int64) - 1)
+    order = np.lexsort((keys[:, 2], keys[:, 1], keys[:, 0], level))
+    node_ids = np.column_stack([level[order], keys[order]])
+    starts = np.flatnonzero(np.r_[True, (np.diff(node_ids, axis=0) != 0).any(axis=1)])
+    ends = np.r_[starts[1:], n]
+
+    header = laspy.LasHeader(point_format=6, version="1.4")
+    header.offsets = np.array(ORIGIN)
+    header.scales = np.array([0.001, 0.001, 0.001])
+    header.add_crs(pyproj.CRS.from_epsg(25832))
+    pts = laspy.ScaleAwarePointRecord.zeros(n, header=header)
+    pts.x, pts.y, pts.z = xyz[order, 0], xyz[order, 1], xyz[order, 2]
+    pts.gps_time = rng.uniform(3.0e8, 3.0e8 + 600.0, n)
+    raw = pts.array
+
+    lazvlr = lazrs.LazVlr.new_for_compression(6, 0, use_variable_size_chunks=True)
+    data = io.BytesIO()
+    compressor = lazrs.LasZipCompressor(data, lazvlr)
+    chunks = []
+    start = 8  # after the offset to the chunk table
+    for s, e in zip(starts, ends):
+        compressor.compress_many(raw[s:e].tobytes())
+        compressor.finish_current_chunk()
+        chunks.append((start, data.tell() - start))
+        start = data.tell()
+    compressor.done()
+    point_bytes = data.getvalue()
+
+    def info_vlr(hier_offset=0, hier_size=0):
+        record = struct.pack("<3d2d2Q2d", *center, halfsize, spacing, hier_offset, hier_size, 3.0e8, 3.0e8 + 600.0)
+        return laspy.VLR("copc", 1, "COPC info", record + bytes(88))
+
+    from laspy.vlrs.known import LasZipVlr
+
+    header.vlrs.insert(0, info_vlr())
+    header.vlrs.append(LasZipVlr(lazvlr.record_data()))
+    header.are_points_compressed = True
+    header.point_count = n
+    header.mins, header.maxs = mins, maxs
+    header.write_to(io.BytesIO())  # sets offset_to_point_data
+    evlr_start = header.offset_to_point_data + len(point_bytes)
+    # The compressor wrote the chunk table offset relative to its own start
+    table = struct.unpack("<q", point_bytes[:8])[0] + header.offset_to_point_data
+    point_bytes = struct.pack("<q", table) + point_bytes[8:]
+
+    entries = {}
+    for (s, e), (offset, size), node in zip(zip(starts, ends), chunks, node_ids[starts]):
+        entries[tuple(int(v) for v in node)] = (header.offset_to_point_data + offset, size, int(e - s))
+    # Readers walk the octree from the root, so every ancestor needs an entry
+    for lvl, kx, ky, kz in list(entries):
+        while lvl > 0:
+            lvl, kx, ky, kz = lvl - 1, kx // 2, ky // 2, kz // 2
+            entries.setdefault((lvl, kx, ky, kz), (0, 0, 0))
+    page = b"".join(struct.pack("<4iQii", *key, *value) for key, value in sorted(entries.items()))
+
+    header.vlrs[0] = info_vlr(evlr_start + 60, len(page))
+    header.start_of_first_evlr = evlr_start
+    header.number_of_evlrs = 1
+    with open(path, "wb") as f:
+        header.write_to(f, ensure_same_size=True)
+        f.write(point_bytes)
+        f.write(struct.pack("<H16sHQ32s", 0, b"copc", 1000, len(page), b"EPT hierarchy"))
+        f.write(page)
+    return {"points": n, "nodes": len(chunks), "spacing": spacing}
+
+
+def full_scan_footprint(path, origin, cell, shape):
+    """Occupancy footprint from every point, decoding the file chunk by chunk."""
+    selection = laspy.DecompressionSelection.xy_returns_channel()
+    grid, points = None, 0
+    with laspy.open(path, decompression_selection=selection) as reader:
+        for chunk in reader.chunk_iterator(CHUNK):
+            points += len(chunk)
+            grid = occupancy_grid(np.asarray(chunk.x), np.asarray(chunk.y), origin, cell, shape, grid)
+    return grid_footprint(grid, origin, cell), points
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - t0, result
+
+
+def iou(a, b):
+    union = a.union(b).area
+    return a.intersection(b).area / union if union else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--file", help="existing COPC file (default: write a synthetic one)")
+    parser.add_argument("--points", type=int, default=5_000_000)
+    parser.add_argument("--depth", type=int, nargs="+", default=[0, 1, 2, 3, 4])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tmpdir = None
+    path = args.file
+    result = {}
+    if not path:
+        tmpdir = tempfile.TemporaryDirectory(prefix="topo4d_copc_")
+        path = os.path.join(tmpdir.name, "synthetic.copc.laz")
+        result["written"] = write_copc(path, args.points, args.seed)
+    try:
+        result["mb"] = round(os.path.getsize(path) / 1e6, 1)
+        seconds, header = timed(lambda: read_las_header(path))
+        result["header"] = {"seconds": round(seconds, 4), "copc": header["copc"]}
+        footprints = {}
+        for depth in args.depth:
+            seconds, meta = timed(lambda: read_copc(path, depth))
+            footprints[depth] = shapely.geometry.shape(meta["footprint"])
+            result[f"copc_depth_{depth}"] = {
+                "seconds": round(seconds, 4),
+                "decoded_points": meta["octree"]["decoded_points"],
+                "point_count": meta["point_count"],
+                "cell_size": round(meta["octree"]["cell_size"], 3),
+                "vertices": int(shapely.get_num_coordinates(footprints[depth])),
+            }
+        with laspy.CopcReader.open(path) as reader:
+            info = reader.copc_info
+        deepest = max(args.depth)
+        origin = [info.center[0] - info.halfsize, info.center[1] - info.halfsize]
+        cell = grid_cell_size(info.halfsize, footprint_cell_size(info.spacing, deepest))
+        seconds, (full, points) = timed(
+            lambda: full_scan_footprint(path, origin, cell, grid_shape(info.halfsize, cell))
+        )
+        result["full_scan"] = {"seconds": round(seconds, 4), "decoded_points": points}
+        for depth, footprint in footprints.items():
+            result[f"copc_depth_{depth}"]["iou_vs_full_scan"] = round(iou(footprint, full), 4)
+            result[f"copc_depth_{depth}"]["speedup"] = round(seconds / result[f"copc_depth_{depth}"]["seconds"], 1)
+        print(json.dumps(result, indent=2))
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Pairwise overlap analysis of many epoch footprints.
+
+Generates ``--n`` footprints (rectangles like those derived from LAS headers,
+optionally rotated so they take the general polygon path) scattered over an
+area sized for about ``--neighbours`` overlapping epochs each, and times
+``epoch_overlaps``::
+
+    python benchmarks/epoch_overlap.py --n 10000
+    python benchmarks/epoch_overlap.py --n 10000 --rotated
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from topo4d_form.overlap import epoch_overlaps  # noqa: E402
+
+
+def footprints(n, neighbours, rotated, rng):
+    # Mean footprint area 1; the side of the area is chosen so each
+    # footprint overlaps about `neighbours` others
+    side = math.sqrt(n * 4 / max(neighbours, 1))
+    for i in range(n):
+        x, y, s = rng.uniform(0, side), rng.uniform(0, side), rng.uniform(0.5, 1.5)
+        ring = [(x, y), (x + s, y), (x + s, y + s), (x, y + s)]
+        if rotated:
+            a = rng.uniform(0, math.pi / 4)
+            ring = [
+                (x + (px - x) * math.cos(a) - (py - y) * math.sin(a), y + (px - x) * math.sin(a) + (py - y) * math.cos(a))
+                for px, py in ring
+            ]
+        yield {
+            "id": f"epoch-{i}",
+            "datetime": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(1262304000 + i * 3600)),
+            "geometry": {"type": "Polygon", "coordinates": [ring + [ring[0]]]},
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=10_000)
+    parser.add_argument("--neighbours", type=float, default=10)
+    parser.add_argument("--rotated", action="store_true", help="rotated footprints (no rectangle fast path)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    epochs = list(footprints(args.n, args.neighbours, args.rotated, random.Random(0)))
+    best = float("inf")
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        result = epoch_overlaps(epochs)
+        best = min(best, time.perf_counter() - t0)
+    print(json.dumps({
+        "epochs": args.n,
+        "overlapping_pairs": len(result["rows"]) // 2,
+        "isolated": len(result["isolated"]),
+        "seconds": round(best, 3),
+        "pairs_per_sec": round(len(result["rows"]) / 2 / best),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
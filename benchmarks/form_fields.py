@@ -0,0 +1,284 @@
+"""Form parsing through the field registry against the previous hand-written path.
+
+Times ``construct_topo4d_properties`` (``fields.parse_fields``) and
+``form_format_to_topo4d_input`` against copies of their implementations
+before the field registry, on a full form, the form as first posted (all
+inputs empty but the datetime), a half filled form, a form with 50
+inputArrayTemplate grids and a full form whose matrices change on every
+post. Outputs and errors of both paths are checked to be equal first::
+
+    python benchmarks/form_fields.py
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from run import FORM, _grid_form  # noqa: E402
+from topo4d_form.fields import FIELDS, REL_KEYS  # noqa: E402
+from topo4d_form.make_item import construct_topo4d_properties, form_format_to_topo4d_input  # noqa: E402
+from topo4d_form.matrix import MATRIX_FIELDS, MatrixParseError, parse_matrix  # noqa: E402
+
+
+# The hand-written mapping, as it was before fields.FIELDS
+
+
+def _legacy_json_object(val: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not val:
+        return None
+    try:
+        import json
+
+        obj = json.loads(val)
+        return obj if isinstance(obj, dict) else None
+    except Exception:
+        return None
+
+
+def legacy_form_format_to_topo4d_input(d):
+    """Normalize form dictionary before storing/using.
+
+    - Collects inputs created by inputArrayTemplate with names like
+      "<base>_r_c" (1-based indices) into a nested list stored under "<base>".
+    """
+    import re
+
+    out = dict(d)
+
+    # Group keys by base name if they match pattern <name>_r_c where r,c are ints
+    pattern = re.compile(r"^(?P<base>.+)_(?P<r>\d+)_(?P<c>\d+)$")
+    buckets = {}
+    for k, v in d.items():
+        m = pattern.match(k)
+        if not m:
+            continue
+        base = m.group("base")
+        r = int(m.group("r"))
+        c = int(m.group("c"))
+        buckets.setdefault(base, {})[(r, c)] = v
+
+    # For each bucket, assemble rows in row-major order
+    for base, grid in buckets.items():
+        if not grid:
+            continue
+        max_r = max(rc[0] for rc in grid)
+        max_c = max(rc[1] for rc in grid)
+        nested = []
+        for r in range(1, max_r + 1):
+            row = []
+            for c in range(1, max_c + 1):
+                row.append(grid.get((r, c), ""))
+            nested.append(row)
+        out[base] = nested
+
+    return out
+
+
+def _legacy_matrix_field(d: Dict[str, Any], form_key: str, path: str, errors: Optional[List[Dict[str, Any]]]):
+    try:
+        return parse_matrix(d.get(form_key), MATRIX_FIELDS[form_key])
+    except MatrixParseError as e:
+        if errors is not None:
+            errors.append({"path": path, "message": f"{form_key}: {e}", "keyword": "shape"})
+        return None
+
+
+def legacy_construct_topo4d_properties(d: Dict[str, Any], errors: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Transforms flat form inputs into topo4d Item properties dict.
+
+    Matrix and vector fields that cannot be parsed or have the wrong shape are
+    left out; if ``errors`` is given, an error in the same form as
+    ``topo4d_validation_errors`` is appended for each of them.
+    """
+    props: Dict[str, Any] = {}
+    # ID
+    if "item_id" in d and d["item_id"]:
+        props["item_id"] = d["item_id"]
+    # Core requirement surfaced in UI
+    if "datetime" in d and d["datetime"]:
+        props["datetime"] = d["datetime"]
+
+    # Topo4D simple fields
+    simple_map = [
+        ("topo4d:data_type", "topo4d_data_type"),
+        ("topo4d:timezone", "topo4d_timezone"),
+        ("topo4d:acquisition_mode", "topo4d_acquisition_mode"),
+        ("topo4d:orientation", "topo4d_orientation"),
+    ]
+    for outk, ink in simple_map:
+        v = d.get(ink)
+        if v not in (None, ""):
+            props[outk] = v
+    global_trafo = _legacy_matrix_field(d, "topo4d_global_trafo", "properties/topo4d:global_trafo", errors)
+    if global_trafo is not None:
+        props["topo4d:global_trafo"] = global_trafo
+
+    # Numeric fields
+    numeric_map = [
+        ("topo4d:duration", "topo4d_duration"),
+        ("topo4d:spatial_resolution", "topo4d_spatial_resolution"),
+        ("topo4d:positional_accuracy", "topo4d_positional_accuracy"),
+    ]
+    for outk, ink in numeric_map:
+        v = d.get(ink)
+        if v not in (None, ""):
+            try:
+                props[outk] = float(v)
+            except ValueError:
+                pass
+
+    # trafometa nested object
+    trafometa: Dict[str, Any] = {}
+    # Support either a nested dict value at key 'trafometa_reference_epoch' or
+    # flat fields from relObjectTemplate: '<name>_href', '<name>_type', '<name>_title'
+    re_obj = d.get("trafometa_reference_epoch")
+    if isinstance(re_obj, dict):
+        href = re_obj.get("href")
+        typ = re_obj.get("type")
+        title = re_obj.get("title")
+    else:
+        href = d.get("trafometa_reference_epoch_href")
+        typ = d.get("trafometa_reference_epoch_type")
+        title = d.get("trafometa_reference_epoch_title")
+    if any(v not in (None, "") for v in (href, typ, title)):
+        ref: Dict[str, Any] = {}
+        if href not in (None, ""):
+            ref["href"] = href
+        if typ not in (None, ""):
+            ref["type"] = typ
+        if title not in (None, ""):
+            ref["title"] = title
+        if ref:
+            trafometa["reference_epoch"] = ref
+    v = d.get("trafometa_registration_error")
+    if v not in (None, ""):
+        try:
+            trafometa["registration_error"] = float(v)
+        except ValueError:
+            pass
+    for key, form_key in [
+        ("transformation", "trafometa_transformation"),
+        ("affine_transformation", "trafometa_affine_transformation"),
+        ("rotation", "trafometa_rotation"),
+        ("translation", "trafometa_translation"),
+        ("reduction_point", "trafometa_reduction_point"),
+    ]:
+        arr_or_nested = _legacy_matrix_field(d, form_key, f"properties/topo4d:trafometa/{key}", errors)
+        if arr_or_nested is not None:
+            trafometa[key] = arr_or_nested
+    if trafometa:
+        props["topo4d:trafometa"] = trafometa
+
+    # productmeta nested object
+    productmeta: Dict[str, Any] = {}
+    # Simple string fields
+    for key, form_key in [
+        ("product_name", "productmeta_product_name"),
+        ("product_level", "productmeta_product_level"),
+    ]:
+        v = d.get(form_key)
+        if v not in (None, ""):
+            productmeta[key] = v
+
+    # derived_from can be either a relObject (dict) or flat rel fields, or legacy string
+    df_obj = d.get("productmeta_derived_from")
+    df_href = df_type = df_title = None
+    if isinstance(df_obj, dict):
+        df_href = df_obj.get("href")
+        df_type = df_obj.get("type")
+        df_title = df_obj.get("title")
+    else:
+        df_href = d.get("productmeta_derived_from_href")
+        df_type = d.get("productmeta_derived_from_type")
+        df_title = d.get("productmeta_derived_from_title")
+    if any(v not in (None, "") for v in (df_href, df_type, df_title)):
+        rel: Dict[str, Any] = {}
+        if df_href not in (None, ""):
+            rel["href"] = df_href
+        if df_type not in (None, ""):
+            rel["type"] = df_type
+        if df_title not in (None, ""):
+            rel["title"] = df_title
+        if rel:
+            productmeta["derived_from"] = rel
+    else:
+        # Legacy string handling: keep string if provided and no rel-object fields present
+        if isinstance(df_obj, str) and df_obj not in (None, ""):
+            productmeta["derived_from"] = df_obj
+
+    # param is a JSON object in string form
+    param_obj = _legacy_json_object(d.get("productmeta_param"))
+    if param_obj is not None:
+        productmeta["param"] = param_obj
+    if productmeta:
+        props["topo4d:productmeta"] = productmeta
+
+    return props
+
+
+def first_post():
+    """All form inputs empty but the datetime, as posted on page load."""
+    d = {}
+    for field in FIELDS:
+        if field.label is None:
+            continue
+        if field.kind.startswith("rel"):
+            d.update({f"{field.name}_{k}": "" for k in REL_KEYS})
+        else:
+            d[field.name] = ""
+    d["datetime"] = FORM["datetime"]
+    return d
+
+
+def forms():
+    empty = first_post()
+    half = dict(empty)
+    for key in ("topo4d_data_type", "topo4d_timezone", "topo4d_duration", "trafometa_reference_epoch_href"):
+        half[key] = FORM[key]
+    # Every post with a different transformation, so nothing is memoized
+    changing = []
+    for i in range(1000):
+        d = dict(FORM)
+        d["trafometa_transformation"] = f"1,0,0,{i * 0.001:.3f};0,1,0,0;0,0,1,0;0,0,0,1"
+        changing.append(d)
+    return {"full": [FORM], "first_post": [empty], "half": [half], "50_grids": [_grid_form(50)], "changing_matrices": changing}
+
+
+def measure(fn, posts, repeat):
+    def run():
+        for d in posts:
+            fn(d)
+
+    timer = timeit.Timer(run)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number / len(posts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pipelines = {
+        "legacy": lambda d: legacy_construct_topo4d_properties(legacy_form_format_to_topo4d_input(d), []),
+        "registry": lambda d: construct_topo4d_properties(form_format_to_topo4d_input(d), []),
+    }
+    for name, posts in forms().items():
+        for d in posts[:3]:
+            errors_legacy, errors = [], []
+            legacy = legacy_construct_topo4d_properties(legacy_form_format_to_topo4d_input(d), errors_legacy)
+            assert construct_topo4d_properties(form_format_to_topo4d_input(d), errors) == legacy, name
+            assert errors == errors_legacy, name
+        times = {k: measure(fn, posts, args.repeat) for k, fn in pipelines.items()}
+        print(
+            f"{name:20s} legacy {times['legacy'] * 1e6:8.1f} us   registry {times['registry'] * 1e6:8.1f} us"
+            f"   {times['legacy'] / times['registry']:5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
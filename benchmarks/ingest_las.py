@@ -0,0 +1,105 @@
+"""End-to-end ingestion benchmark for the ``/upload_las`` handler.
+
+Every file is ingested in a fresh subprocess (so peak RSS is per file) by
+calling the upload handler with a Starlette ``UploadFile``, just like a
+request would. Reports wall time, peak RSS, bytes written to the uploads
+directory and the header-to-item latency (header read + geometry + item build
++ validation)::
+
+    python benchmarks/make_las_corpus.py --out /tmp/las_corpus
+    python benchmarks/ingest_las.py /tmp/las_corpus
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+FORM = {
+    "item_id": "ingest-benchmark",
+    "datetime": "2024-01-01T00:00:00Z",
+    "topo4d_data_type": "pointcloud",
+}
+
+
+def _dir_bytes(path):
+    return sum(p.stat().st_size for p in Path(path).rglob("*") if p.is_file())
+
+
+def ingest_one(path):
+    """Ingest ``path`` through the upload handler in this process."""
+    sys.path.insert(0, str(ROOT))
+    from starlette.datastructures import UploadFile
+
+    import main
+    from topo4d_form.las import read_las_header
+    from topo4d_form.make_item import build_item, geometry_from_las_header
+    from topo4d_form.validation import validate_topo4d_item
+
+    workdir = tempfile.mkdtemp(prefix="topo4d_ingest_")
+    os.chdir(workdir)
+    # A session that already went through the form, as in the browser
+    fasthtml_session = {"session_id": "ingest-benchmark"}
+    main.load_session(fasthtml_session)["stac_format_d"].update(FORM)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with open(path, "rb") as f:
+        upload = UploadFile(file=f, filename=os.path.basename(path))
+        t0 = time.perf_counter()
+        main.upload_las(fasthtml_session, [upload])
+        wall = time.perf_counter() - t0
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Header-to-item latency, measured on the file the handler just wrote
+    saved = os.path.join(workdir, "uploads", os.path.basename(path))
+    t0 = time.perf_counter()
+    meta = read_las_header(saved)
+    geo = geometry_from_las_header(meta)
+    validate_topo4d_item(build_item(dict(FORM, geometry=geo["geometry"], bbox=geo["bbox"])))
+    header_to_item = time.perf_counter() - t0
+    disk_bytes = _dir_bytes(workdir)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "file": os.path.basename(path),
+        "input_bytes": os.path.getsize(path),
+        "wall_s": round(wall, 4),
+        "throughput_mb_s": round(os.path.getsize(path) / 1e6 / wall, 1),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(rss_peak / 1024, 1),
+        "rss_growth_mb": round((rss_peak - rss_before) / 1024, 1),
+        "disk_bytes_written": disk_bytes,
+        "header_to_item_ms": round(header_to_item * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="LAS/LAZ files or corpus directories")
+    parser.add_argument("--one", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.one:
+        print(json.dumps(ingest_one(os.path.abspath(args.paths[0]))))
+        return
+
+    files = []
+    for p in map(Path, args.paths):
+        files.extend(sorted(p.glob("*.la[sz]")) if p.is_dir() else [p])
+    for f in files:
+        out = subprocess.run(
+            [sys.executable, __file__, "--one", str(f.resolve())],
+            check=True, capture_output=True, text=True,
+        )
+        print(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    main()
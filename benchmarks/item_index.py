@@ -0,0 +1,101 @@
+"""Lookup latency of the local item index with many items.
+
+Fills a temporary index with ``--n`` synthetic epochs (small footprints
+scattered over central Europe, datetimes over 15 years), then reports the
+median and p95 latency of bbox + time window searches, time-only searches
+and href autocompletion::
+
+    python benchmarks/item_index.py
+    python benchmarks/item_index.py --n 100000 --queries 500
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from topo4d_form.index import ItemIndex  # noqa: E402
+
+T0 = 1262304000.0  # 2010-01-01
+SPAN = 15 * 365 * 86400
+
+
+def iso(t):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(t))
+
+
+def synthetic_items(n, rng):
+    for i in range(n):
+        x, y = rng.uniform(5, 15), rng.uniform(45, 55)
+        yield {
+            "id": f"epoch-{i:08d}",
+            "bbox": [x, y, x + 0.01, y + 0.01],
+            "properties": {"datetime": iso(T0 + rng.uniform(0, SPAN))},
+        }
+
+
+def timed(fn, args_list):
+    times, hits = [], 0
+    for args in args_list:
+        t0 = time.perf_counter()
+        hits += len(fn(*args))
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    return {
+        "median_ms": round(statistics.median(times) * 1000, 3),
+        "p95_ms": round(times[int(len(times) * 0.95)] * 1000, 3),
+        "mean_hits": round(hits / len(times), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=20_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    workdir = tempfile.mkdtemp(prefix="topo4d_index_")
+    index = ItemIndex(os.path.join(workdir, "items.sqlite"))
+    t0 = time.perf_counter()
+    batch = []
+    for item in synthetic_items(args.n, rng):
+        batch.append(item)
+        if len(batch) >= args.batch:
+            index.add(batch)
+            batch = []
+    index.add(batch)
+    insert_s = time.perf_counter() - t0
+
+    def window(days):
+        t = T0 + rng.uniform(0, SPAN)
+        return iso(t), iso(t + days * 86400)
+
+    def box(size):
+        x, y = rng.uniform(5, 15), rng.uniform(45, 55)
+        return [x, y, x + size, y + size]
+
+    search = lambda bbox, start, end: index.search(bbox, start, end)  # noqa: E731
+    results = {
+        "items": index.count(),
+        "insert_items_per_sec": round(args.n / insert_s),
+        "bbox_0.1deg_any_time": timed(search, [(box(0.1), None, None) for _ in range(args.queries)]),
+        "bbox_0.5deg_1_year": timed(search, [(box(0.5), *window(365)) for _ in range(args.queries)]),
+        "time_only_1_day": timed(search, [(None, *window(1)) for _ in range(args.queries)]),
+        "autocomplete": timed(
+            index.autocomplete, [(f"epoch-{rng.randrange(args.n):08d}"[:-3],) for _ in range(args.queries)]
+        ),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
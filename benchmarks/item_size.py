@@ -0,0 +1,83 @@
+"""Item size and serialization time with and without geometry compaction.
+
+Builds items whose footprint is a wobbly ring of ``--vertices`` positions in
+WGS84 (as a reprojected, traced LAS extent would be), once with full float64
+coordinates and once compacted to ``--precision`` decimals and
+``--max-vertices`` positions, and reports the JSON size and the time to build
+and serialize each, best of ``--repeat`` runs::
+
+    python benchmarks/item_size.py --vertices 100 1000 10000 100000
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from run import FORM  # noqa: E402
+from topo4d_form.make_item import (  # noqa: E402
+    construct_assets,
+    construct_topo4d_properties,
+    create_pystac_item,
+)
+
+
+def footprint(n):
+    ring = []
+    for i in range(n - 1):
+        t = 2 * math.pi * i / (n - 1)
+        r = 0.01 * (1 + 0.1 * math.sin(37 * t) + 0.02 * math.sin(997 * t))
+        ring.append([11.5 + r * math.cos(t) * 1.5, 48.1 + r * math.sin(t)])
+    ring.append(ring[0])
+    geometry = {"type": "Polygon", "coordinates": [ring]}
+    xs, ys = [p[0] for p in ring], [p[1] for p in ring]
+    return geometry, [min(xs), min(ys), max(xs), max(ys)]
+
+
+def best_of(fn, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vertices", type=int, nargs="+", default=[100, 1000, 10_000, 100_000])
+    parser.add_argument("--precision", type=int, default=7)
+    parser.add_argument("--max-vertices", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    props = construct_topo4d_properties(FORM)
+    assets = construct_assets(FORM.get("assets"))
+    results = []
+    for n in args.vertices:
+        geometry, bbox = footprint(n)
+        row = {"vertices": n}
+        for name, precision, max_vertices in (
+            ("full", None, 0),
+            ("compact", args.precision, args.max_vertices),
+        ):
+            build_s, item = best_of(
+                lambda: create_pystac_item(props, assets, geometry=geometry, bbox=bbox,
+                                           precision=precision, max_vertices=max_vertices),
+                args.repeat,
+            )
+            dumps_s, text = best_of(lambda: json.dumps(item), args.repeat)
+            row[f"{name}_bytes"] = len(text.encode())
+            row[f"{name}_build_ms"] = round(build_s * 1000, 2)
+            row[f"{name}_dumps_ms"] = round(dumps_s * 1000, 2)
+        row["size_ratio"] = round(row["compact_bytes"] / row["full_bytes"], 3)
+        results.append(row)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Item preview size and render time, full JSON against the truncated preview.
+
+Builds items with a footprint of ``--vertices`` positions and a productmeta
+``param`` array of ``--param`` numbers, renders the preview once as the whole
+``json.dumps(indent=4)`` and once with large values elided into stubs, and
+reports the HTML size and render time of each, best of ``--repeat`` runs::
+
+    python benchmarks/json_preview.py --vertices 1000 100000 --param 0 1000000
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fasthtml.common import to_xml  # noqa: E402
+
+from run import FORM  # noqa: E402
+from topo4d_form.make_item import construct_assets, construct_topo4d_properties, create_pystac_item  # noqa: E402
+from topo4d_form.templates import prettyJsonTemplate  # noqa: E402
+
+
+def item(vertices, param):
+    ring = [[11.5 + 0.01 * math.cos(2 * math.pi * i / vertices), 48.1 + 0.01 * math.sin(2 * math.pi * i / vertices)]
+            for i in range(vertices)]
+    ring.append(ring[0])
+    props = construct_topo4d_properties(FORM)
+    props.setdefault("topo4d:productmeta", {})["param"] = {"samples": [i * 0.5 for i in range(param)]}
+    return create_pystac_item(
+        props,
+        construct_assets(FORM.get("assets")),
+        geometry={"type": "Polygon", "coordinates": [ring]},
+        bbox=[11.49, 48.09, 11.51, 48.11],
+        precision=None,
+        max_vertices=0,
+    )
+
+
+def best_of(fn, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vertices", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--param", type=int, nargs="+", default=[0, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = []
+    for vertices in args.vertices:
+        for param in args.param:
+            obj = item(vertices, param)
+            row = {"vertices": vertices, "param": param, "item_bytes": len(json.dumps(obj))}
+            for name, src in (("full", None), ("preview", "/preview_json")):
+                seconds, html = best_of(lambda: to_xml(prettyJsonTemplate(obj, src)), args.repeat)
+                row[f"{name}_html_bytes"] = len(html.encode())
+                row[f"{name}_render_ms"] = round(seconds * 1000, 2)
+            results.append(row)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Full-scan LAZ decode throughput per backend, worker count and dimension set.
+
+Runs ``topo4d_form.scan.scan_points`` on every LAS/LAZ file given (or found
+in a corpus directory) for each ``--backend``, ``--workers`` and ``--dims``
+combination, best of ``--repeat`` runs, and reports MB/s and points/s of the
+compressed point data along with the speedup over one worker::
+
+    python benchmarks/make_las_corpus.py --out /tmp/las_corpus
+    python benchmarks/laz_decode.py /tmp/las_corpus --workers 1 2 4 8
+    python benchmarks/laz_decode.py big.laz --dims xyz gps_time xyz,gps_time
+
+Worker counts only apply to the "lazrs-parallel" backend; the first run of
+each count includes starting the worker processes, so use ``--repeat`` > 1.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from topo4d_form.scan import scan_points  # noqa: E402
+
+
+def files(paths):
+    for p in map(Path, paths):
+        if p.is_dir():
+            yield from sorted(f for f in p.iterdir() if f.suffix.lower() in (".las", ".laz"))
+        else:
+            yield p
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="LAS/LAZ files or directories")
+    parser.add_argument("--backend", nargs="+", default=["lazrs-parallel", "lazrs"])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--dims", nargs="+", default=["xyz", "xyz,gps_time"],
+                        help="comma-separated dimension sets to decode")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = []
+    for path in files(args.paths):
+        for backend in args.backend:
+            for workers in args.workers if backend == "lazrs-parallel" else [1]:
+                for dims in args.dims:
+                    runs = [scan_points(str(path), dims.split(","), backend, workers) for _ in range(args.repeat)]
+                    best = min(runs, key=lambda r: r["scan"]["seconds"])
+                    results.append({"file": path.name, "point_count": best["point_count"], **best["scan"]})
+
+    for row in results:
+        one = next(
+            r for r in results
+            if r["file"] == row["file"] and r["dims"] == row["dims"] and r["workers"] == 1
+            and r["backend"] in (row["backend"], "lazrs")
+        )
+        row["speedup"] = round(one["seconds"] / row["seconds"], 2) if row["seconds"] else None
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Load test comparing the HTTP and websocket live preview modes.
+
+Simulates ``--editors`` concurrent users, each with its own session cookie,
+sending ``--edits`` debounced form updates to a running instance, once via
+``POST /submit`` and once over ``/ws_preview``. Start the server first::
+
+    python main.py
+    python benchmarks/live_preview_load.py --url http://localhost:5001
+
+Both modes are served by the same instance; ``TOPO4D_LIVE_PREVIEW`` only
+changes which one the browser form uses.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+import websockets
+
+FORM = {
+    "item_id": "load-test",
+    "datetime": "2024-01-01T00:00:00Z",
+    "topo4d_data_type": "pointcloud",
+    "topo4d_acquisition_mode": "ULS",
+    "topo4d_global_trafo": "1,0,0,0;0,1,0,0;0,0,1,0;0,0,0,1",
+    "trafometa_registration_error": "0.01",
+}
+
+
+def _edit(form, i):
+    # Emulate typing: one field changes per debounced input event
+    form = dict(form)
+    form["topo4d_duration"] = str(i)
+    return form
+
+
+async def _http_editor(url, edits, delay, latencies):
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        await client.get("/")
+        for i in range(edits):
+            t0 = time.perf_counter()
+            r = await client.post(
+                "/submit", data=_edit(FORM, i), headers={"HX-Request": "true"}
+            )
+            r.raise_for_status()
+            latencies.append(time.perf_counter() - t0)
+            await asyncio.sleep(delay)
+
+
+async def _ws_editor(url, edits, delay, latencies):
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        await client.get("/")
+        cookie = "; ".join(f"{k}={v}" for k, v in client.cookies.items())
+    ws_url = url.replace("http", "ws", 1) + "/ws_preview"
+    async with websockets.connect(ws_url, additional_headers={"Cookie": cookie}) as ws:
+        for i in range(edits):
+            msg = dict(_edit(FORM, i), HEADERS={"HX-Request": "true"})
+            t0 = time.perf_counter()
+            await ws.send(json.dumps(msg))
+            await ws.recv()
+            latencies.append(time.perf_counter() - t0)
+            await asyncio.sleep(delay)
+
+
+def _summary(mode, latencies, wall):
+    ms = sorted(x * 1000 for x in latencies)
+    q = statistics.quantiles(ms, n=100)
+    return {
+        "mode": mode,
+        "requests": len(ms),
+        "throughput_rps": round(len(ms) / wall, 1),
+        "p50_ms": round(q[49], 2),
+        "p95_ms": round(q[94], 2),
+        "p99_ms": round(q[98], 2),
+        "max_ms": round(ms[-1], 2),
+    }
+
+
+async def run(url, editors, edits, delay):
+    results = []
+    for mode, editor in (("http", _http_editor), ("ws", _ws_editor)):
+        latencies = []
+        t0 = time.perf_counter()
+        await asyncio.gather(
+            *(editor(url, edits, delay, latencies) for _ in range(editors))
+        )
+        results.append(_summary(mode, latencies, time.perf_counter() - t0))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:5001")
+    parser.add_argument("--editors", type=int, default=50)
+    parser.add_argument("--edits", type=int, default=40)
+    parser.add_argument("--delay", type=float, default=0.2, help="seconds between edits")
+    args = parser.parse_args()
+    for row in asyncio.run(run(args.url.rstrip("/"), args.editors, args.edits, args.delay)):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
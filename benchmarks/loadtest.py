@@ -0,0 +1,143 @@
+"""Concurrent-user load test for a running instance of the form.
+
+Simulates ``--users`` browser sessions, each with its own session cookie. A
+user opens the form, types into it at a debounce cadence (``POST /submit``
+every ``--cadence`` seconds), switches to ``/asset`` and edits the asset,
+optionally uploads a LAS/LAZ file, and resets the form, in a loop until
+``--duration`` runs out::
+
+    python main.py
+    python benchmarks/loadtest.py --url http://localhost:5001 --users 200 --duration 60
+
+Reports p50/p95/p99 latency per route, throughput, errors and session-loss
+events. A session is counted as lost when a reload of ``/`` no longer shows
+what that user typed, which happens once the in-memory session store
+(``lru_cache(maxsize=100)``) evicts it.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+HX = {"HX-Request": "true"}
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.session_loss = 0
+
+    async def call(self, client, method, route, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            r = await client.request(method, route, **kwargs)
+            ok = r.status_code < 400
+        except httpx.HTTPError:
+            r, ok = None, False
+        key = f"{method} {route}"
+        self.latencies[key].append(time.perf_counter() - t0)
+        if not ok:
+            self.errors[key] += 1
+        return r
+
+    def report(self, wall):
+        routes = {}
+        for key, lat in sorted(self.latencies.items()):
+            ms = sorted(x * 1000 for x in lat)
+            q = statistics.quantiles(ms, n=100) if len(ms) > 1 else ms * 99
+            routes[key] = {
+                "requests": len(ms),
+                "errors": self.errors[key],
+                "rps": round(len(ms) / wall, 1),
+                "p50_ms": round(q[49], 2),
+                "p95_ms": round(q[94], 2),
+                "p99_ms": round(q[98], 2),
+            }
+        total = sum(len(v) for v in self.latencies.values())
+        return {
+            "seconds": round(wall, 1),
+            "requests": total,
+            "throughput_rps": round(total / wall, 1),
+            "errors": sum(self.errors.values()),
+            "session_loss_events": self.session_loss,
+            "routes": routes,
+        }
+
+
+async def user(uid, args, stats, las_bytes, deadline):
+    rng = random.Random(uid)
+    async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+        while time.monotonic() < deadline:
+            await stats.call(client, "GET", "/")
+            marker = f"user{uid}-{rng.randrange(10**9)}"
+            form = {
+                "item_id": "",
+                "datetime": "2024-01-01T00:00:00Z",
+                "topo4d_data_type": "pointcloud",
+            }
+            # Type the item id one character at a time, one debounced post each
+            for i in range(1, len(marker) + 1, max(1, len(marker) // args.keystrokes)):
+                form["item_id"] = marker[:i]
+                await stats.call(client, "POST", "/submit", data=form, headers=HX)
+                await asyncio.sleep(args.cadence)
+            form["item_id"] = marker
+            await stats.call(client, "POST", "/submit", data=form, headers=HX)
+
+            await stats.call(client, "GET", "/asset")
+            asset = {"title": "Point cloud", "href": "", "media_type": "application/vnd.laszip", "roles": "data"}
+            for href in ("https://", "https://example.com/", f"https://example.com/{marker}.laz"):
+                asset["href"] = href
+                await stats.call(client, "POST", "/submit_asset", data=asset, headers=HX)
+                await asyncio.sleep(args.cadence)
+
+            if las_bytes is not None:
+                files = {"lasfile": (f"{marker}.las", las_bytes, "application/octet-stream")}
+                await stats.call(client, "POST", "/upload_las", files=files, headers=HX)
+
+            # Think time, then check the session survived before resetting
+            await asyncio.sleep(rng.uniform(0, args.think))
+            r = await stats.call(client, "GET", "/")
+            if r is not None and r.status_code == 200 and marker not in r.text:
+                stats.session_loss += 1
+            await stats.call(client, "POST", "/clear_form", headers=HX)
+
+
+async def run(args):
+    las_bytes = Path(args.las).read_bytes() if args.las else None
+    stats = Stats()
+    t0 = time.monotonic()
+    deadline = t0 + args.duration
+    tasks = []
+    for uid in range(args.users):
+        tasks.append(asyncio.create_task(user(uid, args, stats, las_bytes, deadline)))
+        # Ramp users up instead of starting them all in the same instant
+        await asyncio.sleep(args.ramp / max(args.users, 1))
+    await asyncio.gather(*tasks)
+    return stats.report(time.monotonic() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:5001")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=60, help="seconds")
+    parser.add_argument("--cadence", type=float, default=0.2, help="seconds between debounced inputs")
+    parser.add_argument("--keystrokes", type=int, default=8, help="debounced posts per typed value")
+    parser.add_argument("--think", type=float, default=2.0, help="max think time between cycles")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds to start all users")
+    parser.add_argument("--las", help="LAS/LAZ file to upload once per cycle")
+    args = parser.parse_args()
+    args.url = args.url.rstrip("/")
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Generate a deterministic synthetic LAS/LAZ corpus for ingestion benchmarks.
+
+Files vary point format, point count, CRS, GPS time range, compression and
+header freshness. Points are written in chunks, so counts in the hundreds of
+millions only cost disk space and time, not memory::
+
+    python benchmarks/make_las_corpus.py --out /tmp/las_corpus
+    python benchmarks/make_las_corpus.py --out /tmp/las_big --preset large
+
+A ``corpus.json`` manifest with the generation spec and the true extents of
+every file is written next to the data.
+"""
+
+import argparse
+import json
+import struct
+from pathlib import Path
+
+import laspy
+import numpy as np
+import pyproj
+
+# Projected origins (lower-left corner) per CRS, matching benchmarks/run.py
+ORIGINS = {
+    25832: (690000.0, 5335000.0, 500.0),
+    32633: (400000.0, 5500000.0, 0.0),
+    2056: (2600000.0, 1200000.0, 400.0),
+    3857: (1280000.0, 6130000.0, 0.0),
+}
+
+# GPS time ranges in adjusted standard GPS seconds
+GPS_RANGES = {
+    "short": (3.0e8, 3.0e8 + 600.0),
+    "day": (3.0e8, 3.0e8 + 86400.0),
+    "none": None,
+}
+
+PRESETS = {
+    "small": [
+        dict(point_format=0, points=100_000, epsg=25832, laz=False, gps="none", stale=False),
+        dict(point_format=1, points=1_000_000, epsg=32633, laz=False, gps="short", stale=False),
+        dict(point_format=3, points=1_000_000, epsg=2056, laz=True, gps="day", stale=False),
+        dict(point_format=6, points=1_000_000, epsg=25832, laz=True, gps="short", stale=True),
+        dict(point_format=7, points=5_000_000, epsg=3857, laz=True, gps="day", stale=False),
+        dict(point_format=8, points=5_000_000, epsg=None, laz=False, gps="short", stale=True),
+    ],
+    "large": [
+        dict(point_format=6, points=50_000_000, epsg=25832, laz=True, gps="day", stale=False),
+        dict(point_format=1, points=100_000_000, epsg=32633, laz=False, gps="short", stale=False),
+        dict(point_format=7, points=300_000_000, epsg=2056, laz=True, gps="day", stale=True),
+    ],
+}
+
+CHUNK = 1_000_000
+EXTENT = 1000.0  # metres
+
+
+def _file_name(spec):
+    crs = f"epsg{spec['epsg']}" if spec["epsg"] else "nocrs"
+    stale = "_stale" if spec["stale"] else ""
+    ext = "laz" if spec["laz"] else "las"
+    return f"pf{spec['point_format']}_{spec['points']}_{crs}_{spec['gps']}{stale}.{ext}"
+
+
+def _mark_header_stale(path, version):
+    """Shrink the header bounds and point count so they no longer match the points.
+
+    Mimics files that were appended to or edited without rewriting the header.
+    """
+    with open(path, "r+b") as f:
+        f.seek(107)
+        legacy_count = struct.unpack("<I", f.read(4))[0]
+        f.seek(179)
+        max_x, min_x, max_y, min_y, max_z, min_z = struct.unpack("<6d", f.read(48))
+        cx, cy = (min_x + max_x) / 2, (min_y + max_y) / 2
+        f.seek(179)
+        f.write(struct.pack("<6d", cx, min_x, cy, min_y, max_z, min_z))
+        if legacy_count:
+            f.seek(107)
+            f.write(struct.pack("<I", legacy_count * 9 // 10))
+        if version >= (1, 4):
+            f.seek(247)
+            count = struct.unpack("<Q", f.read(8))[0]
+            f.seek(247)
+            f.write(struct.pack("<Q", count * 9 // 10))
+
+
+def write_file(path, spec, seed=0):
+    """Write one synthetic file and return its true extents."""
+    rng = np.random.default_rng(seed)
+    version = "1.4" if spec["point_format"] >= 6 else "1.2"
+    header = laspy.LasHeader(point_format=spec["point_format"], version=version)
+    x0, y0, z0 = ORIGINS.get(spec["epsg"], (0.0, 0.0, 0.0))
+    header.offsets = np.array([x0, y0, z0])
+    header.scales = np.array([0.001, 0.001, 0.001])
+    if spec["epsg"]:
+        header.add_crs(pyproj.CRS.from_epsg(spec["epsg"]))
+    gps = GPS_RANGES[spec["gps"]]
+    has_gps = "gps_time" in header.point_format.dimension_names
+
+    mins = np.full(3, np.inf)
+    maxs = np.full(3, -np.inf)
+    with laspy.open(path, mode="w", header=header, do_compress=spec["laz"]) as writer:
+        remaining = spec["points"]
+        while remaining > 0:
+            n = min(CHUNK, remaining)
+            remaining -= n
+            pts = laspy.ScaleAwarePointRecord.zeros(n, header=header)
+            xyz = np.column_stack(
+                [
+                    rng.uniform(x0, x0 + EXTENT, n),
+                    rng.uniform(y0, y0 + EXTENT, n),
+                    z0 + rng.normal(50.0, 10.0, n),
+                ]
+            )
+            pts.x, pts.y, pts.z = xyz[:, 0], xyz[:, 1], xyz[:, 2]
+            pts.intensity = rng.integers(0, 65535, n, dtype=np.uint16)
+            if has_gps and gps:
+                pts.gps_time = np.sort(rng.uniform(gps[0], gps[1], n))
+            writer.write_points(pts)
+            mins = np.minimum(mins, xyz.min(axis=0))
+            maxs = np.maximum(maxs, xyz.max(axis=0))
+
+    if spec["stale"]:
+        _mark_header_stale(path, tuple(int(v) for v in version.split(".")))
+    return {"xyz_min": mins.tolist(), "xyz_max": maxs.tolist()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--max-points", type=int, default=None, help="cap the point count of every file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    manifest = []
+    for i, spec in enumerate(PRESETS[args.preset]):
+        spec = dict(spec)
+        if args.max_points:
+            spec["points"] = min(spec["points"], args.max_points)
+        path = out / _file_name(spec)
+        extents = write_file(path, spec, seed=args.seed + i)
+        manifest.append(dict(spec, file=path.name, bytes=path.stat().st_size, **extents))
+        print(f"{path.name}: {path.stat().st_size / 1e6:.1f} MB")
+    (out / "corpus.json").write_text(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
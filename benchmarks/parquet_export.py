@@ -0,0 +1,99 @@
+"""Export/import throughput and file size of Parquet against NDJSON.
+
+Builds ``--n`` items with ``build_item`` (varying ids, datetimes, footprints
+and transformations), then times writing and reading them back as NDJSON and
+as Parquet (``topo4d_form.parquet``), best of ``--repeat`` runs::
+
+    python benchmarks/parquet_export.py --n 100000
+
+Needs pyarrow.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from run import FORM  # noqa: E402
+from topo4d_form.make_item import build_item  # noqa: E402
+from topo4d_form.parquet import iter_parquet_items, read_parquet_table, write_parquet  # noqa: E402
+
+
+def make_items(n):
+    template = build_item(FORM)
+    for i in range(n):
+        item = json.loads(json.dumps(template))
+        x, y = 11.0 + (i % 1000) * 0.001, 48.0 + (i // 1000) * 0.001
+        item["id"] = f"epoch-{i:07d}"
+        item["properties"]["datetime"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(1262304000 + i * 3600))
+        item["properties"]["topo4d:trafometa"]["transformation"][0][3] = i * 0.001
+        item["bbox"] = [x, y, x + 0.001, y + 0.001]
+        item["geometry"] = {
+            "type": "Polygon",
+            "coordinates": [[[x, y], [x + 0.001, y], [x + 0.001, y + 0.001], [x, y + 0.001], [x, y]]],
+        }
+        yield item
+
+
+def write_ndjson(items, path):
+    with open(path, "w") as f:
+        for item in items:
+            f.write(json.dumps(item) + "\n")
+
+
+def read_ndjson(path):
+    with open(path) as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--row-group-size", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    items = list(make_items(args.n))
+    workdir = tempfile.mkdtemp(prefix="topo4d_parquet_")
+    try:
+        ndjson = os.path.join(workdir, "items.ndjson")
+        parquet = os.path.join(workdir, "items.parquet")
+        timings = {
+            "ndjson_write": best_of(lambda: write_ndjson(items, ndjson), args.repeat),
+            "ndjson_read": best_of(lambda: sum(1 for _ in read_ndjson(ndjson)), args.repeat),
+            "parquet_write": best_of(lambda: write_parquet(items, parquet, args.row_group_size), args.repeat),
+            "parquet_read": best_of(lambda: sum(1 for _ in iter_parquet_items(parquet)), args.repeat),
+            # Column projection, as analytics would read it
+            "parquet_read_id_datetime_bbox": best_of(
+                lambda: read_parquet_table(parquet, ["id", "datetime", "bbox"]), args.repeat
+            ),
+        }
+        assert next(iter_parquet_items(parquet)) == items[0]
+        result = {"items": args.n}
+        for name, seconds in timings.items():
+            result[f"{name}_items_per_sec"] = round(args.n / seconds)
+        result["ndjson_mb"] = round(os.path.getsize(ndjson) / 1e6, 2)
+        result["parquet_mb"] = round(os.path.getsize(parquet) / 1e6, 2)
+        print(json.dumps(result, indent=2))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Benchmarks for the item-construction hot path.
+
+Times each case with ``timeit`` and writes the results as JSON, by default to
+``benchmarks/results/<git commit>.json``, so runs can be compared across
+commits::
+
+    TOPO4D_SCHEMA_PATH=/path/to/schema.json python benchmarks/run.py
+    python benchmarks/run.py --compare benchmarks/results/<old>.json
+
+Validation runs offline against the schema at ``TOPO4D_SCHEMA_PATH`` (default:
+``topo4d_form/schema.json``, written by ``python -m topo4d_form fetch-schema``)
+or the cached download, so the timings do not include a network fetch. Use
+``-k`` to select cases by substring.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from topo4d_form.make_item import (  # noqa: E402
+    _parse_array_or_csv_floats,
+    construct_assets,
+    construct_topo4d_properties,
+    create_pystac_item,
+    form_format_to_topo4d_input,
+    geometry_from_las_header,
+)
+from topo4d_form.matrix import parse_matrix  # noqa: E402
+from topo4d_form.trafochain import compose_trafo_chains  # noqa: E402
+
+FORM = {
+    "item_id": "epoch-2024-01-01",
+    "datetime": "2024-01-01T00:00:00Z",
+    "topo4d_data_type": "pointcloud",
+    "topo4d_timezone": "Europe/Berlin",
+    "topo4d_acquisition_mode": "ULS",
+    "topo4d_duration": "3600",
+    "topo4d_spatial_resolution": "0.05",
+    "topo4d_positional_accuracy": "0.02",
+    "topo4d_orientation": "Nadir",
+    "topo4d_global_trafo": "1,0,0,0;0,1,0,0;0,0,1,0;0,0,0,1",
+    "trafometa_reference_epoch_href": "./epoch-2023-12-01.json",
+    "trafometa_reference_epoch_type": "application/json",
+    "trafometa_reference_epoch_title": "Reference epoch",
+    "trafometa_registration_error": "0.012",
+    "trafometa_transformation": "1,0,0,0.5;0,1,0,-0.2;0,0,1,0.1;0,0,0,1",
+    "productmeta_product_name": "DSM",
+    "productmeta_product_level": "L2",
+    "productmeta_derived_from_href": "./raw.laz",
+    "productmeta_param": '{"filter": "ground", "resolution": 0.5}',
+    "assets": {
+        "title": "Point cloud",
+        "href": "https://example.com/data.laz",
+        "type": "application/vnd.laszip",
+        "roles": ["data"],
+    },
+}
+
+# Header extents in a handful of projected CRSs (and one geographic)
+LAS_HEADERS = {
+    "epsg25832": {"xyz_min": [690000.0, 5335000.0, 500.0], "xyz_max": [691000.0, 5336000.0, 900.0], "srs_epsg": 25832},
+    "epsg32633": {"xyz_min": [400000.0, 5500000.0, 0.0], "xyz_max": [401000.0, 5501000.0, 50.0], "srs_epsg": 32633},
+    "epsg2056": {"xyz_min": [2600000.0, 1200000.0, 400.0], "xyz_max": [2601000.0, 1201000.0, 450.0], "srs_epsg": 2056},
+    "epsg3857": {"xyz_min": [1280000.0, 6130000.0, 0.0], "xyz_max": [1281000.0, 6131000.0, 10.0], "srs_epsg": 3857},
+    "epsg4326": {"xyz_min": [11.5, 48.1, 500.0], "xyz_max": [11.6, 48.2, 600.0], "srs_epsg": 4326},
+}
+
+
+def _csv_matrix(rows, cols=4):
+    return ";".join(",".join(f"{(r * cols + c) * 0.001:.6f}" for c in range(cols)) for r in range(rows))
+
+
+def _epochs(n, branching=None):
+    """n epochs, each registered to the previous one (or to a random earlier one)."""
+    import random
+
+    rng = random.Random(0)
+    items = [{"id": "epoch-0", "properties": {}}]
+    for i in range(1, n):
+        ref = rng.randrange(i) if branching else i - 1
+        t = [[1.0, 0.0, 0.0, 0.01], [0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 1.0, 0.0], [0.0, 0.0, 0.0, 1.0]]
+        items.append({
+            "id": f"epoch-{i}",
+            "properties": {"topo4d:trafometa": {"reference_epoch": {"href": f"./epoch-{ref}.json"}, "transformation": t}},
+        })
+    return items
+
+
+def _grid_form(grids, rows=4, cols=4):
+    d = dict(FORM)
+    for g in range(grids):
+        for r in range(1, rows + 1):
+            for c in range(1, cols + 1):
+                d[f"grid{g}_{r}_{c}"] = str(float(r == c))
+    return d
+
+
+def cases():
+    """Yield (name, callable) pairs; setup happens here, outside the timings."""
+    props = construct_topo4d_properties(FORM)
+    assets = construct_assets(FORM["assets"])
+    yield "construct_topo4d_properties", lambda: construct_topo4d_properties(FORM)
+
+    small, large = _csv_matrix(4), _csv_matrix(10_000)
+    nested = [[float(x) for x in row.split(",")] for row in large.split(";")]
+    yield "parse_floats/csv_4x4", lambda: _parse_array_or_csv_floats(small)
+    yield "parse_floats/csv_10000x4", lambda: _parse_array_or_csv_floats(large)
+    yield "parse_floats/nested_10000x4", lambda: _parse_array_or_csv_floats(nested)
+    # Shape-checked parsing of per-epoch 4x4 transformation stacks
+    huge = _csv_matrix(100_000)
+    yield "parse_matrix/csv_4x4", lambda: parse_matrix(small, (4, 4))
+    yield "parse_matrix/csv_10000x4", lambda: parse_matrix(large, (4, 4))
+    yield "parse_matrix/csv_100000x4", lambda: parse_matrix(huge, (4, 4))
+    yield "parse_matrix/nested_10000x4", lambda: parse_matrix(nested, (4, 4))
+
+    for n in (1000, 10_000):
+        chain, tree = _epochs(n), _epochs(n, branching=True)
+        yield f"compose_trafo_chains/chain_{n}", lambda chain=chain: compose_trafo_chains(chain)
+        yield f"compose_trafo_chains/tree_{n}", lambda tree=tree: compose_trafo_chains(tree)
+
+    for grids in (1, 50):
+        d = _grid_form(grids)
+        yield f"form_format_to_topo4d_input/{grids}_grids", lambda d=d: form_format_to_topo4d_input(d)
+
+    yield "create_pystac_item", lambda: create_pystac_item(props, assets)
+
+    from topo4d_form.validation import validate_topo4d_item
+
+    item = create_pystac_item(props, assets)
+    yield "validate_topo4d_item", lambda: validate_topo4d_item(item)
+
+    for name, hdr in LAS_HEADERS.items():
+        yield f"geometry_from_las_header/{name}", lambda hdr=hdr: geometry_from_las_header(hdr)
+
+    # Importing main builds the app (but does not serve it)
+    from fasthtml.common import to_xml
+    from main import session_form
+
+    session = {"stac_format_d": {}, "form_format_d": dict(FORM)}
+    yield "session_form_render", lambda: to_xml(session_form(session))
+
+
+def measure(fn, repeat=5):
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    runs = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "min_s": min(runs),
+        "median_s": statistics.median(runs),
+        "mean_s": statistics.fmean(runs),
+        "stdev_s": statistics.stdev(runs) if len(runs) > 1 else 0.0,
+        "loops": number,
+        "repeat": repeat,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current, baseline_path, threshold):
+    baseline = json.loads(Path(baseline_path).read_text())["results"]
+    regressions = 0
+    for name, res in current.items():
+        if name not in baseline:
+            continue
+        ratio = res["median_s"] / baseline[name]["median_s"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{name:45s} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", default="", help="only run cases containing this substring")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative slowdown reported as a regression")
+    args = parser.parse_args()
+
+    results = {}
+    for name, fn in cases():
+        if args.k not in name:
+            continue
+        results[name] = measure(fn, repeat=args.repeat)
+        print(f"{name:45s} {results[name]['median_s'] * 1e6:12.1f} us")
+
+    commit = git_commit()
+    out = Path(args.output) if args.output else ROOT / "benchmarks" / "results" / f"{commit}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(
+        json.dumps(
+            {
+                "commit": commit,
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+    print(f"wrote {out}")
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Startup budget check based on ``python -X importtime``.
+
+Imports ``main`` in a fresh interpreter and fails (exit status 1) if the app's
+own import time goes over budget or a module that should only be loaded on
+first use shows up at startup::
+
+    python benchmarks/startup_budget.py
+    python benchmarks/startup_budget.py --own-budget-ms 100 --total-budget-ms 1500
+
+"Own" time is ``main`` itself plus the ``topo4d_form`` modules it imports,
+including their third-party imports (pystac, ...), but not FastHTML. The best
+of ``--runs`` runs is used to keep noise down.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Heavy dependencies that must be imported lazily, on first use
+LAZY_MODULES = ("laspy", "lazrs", "pyproj", "shapely", "jsonschema", "requests", "pytz")
+
+LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def importtime(module="main"):
+    """Parse ``-X importtime`` for importing ``module`` into (self_us, cumulative_us, depth, name) rows."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        m = LINE_RE.match(line)
+        if m:
+            rows.append((int(m.group(1)), int(m.group(2)), (len(m.group(3)) - 1) // 2, m.group(4)))
+    return rows
+
+
+def summarize(rows):
+    end = next(i for i, (_, _, depth, name) in enumerate(rows) if name == "main" and depth == 0)
+    main_self, total = rows[end][0], rows[end][1]
+    # main's imports are listed right before it, back to the previous top-level row
+    start = end
+    while start > 0 and rows[start - 1][2] > 0:
+        start -= 1
+    children = [(cum, name) for _, cum, depth, name in rows[start:end] if depth == 1]
+    own = main_self + sum(cum for cum, name in children if name.startswith("topo4d_form"))
+    slowest = sorted(children, reverse=True)[:5]
+    loaded = {name for _, _, _, name in rows}
+    return {
+        "total_ms": round(total / 1000, 1),
+        "own_ms": round(own / 1000, 1),
+        "slowest_direct_imports_ms": {name: round(cum / 1000, 1) for cum, name in slowest},
+        "eager_heavy_modules": sorted(m for m in LAZY_MODULES if m in loaded),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--own-budget-ms", type=float, default=150.0)
+    parser.add_argument("--total-budget-ms", type=float, default=None, help="also bound the total, FastHTML included")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    results = [summarize(importtime()) for _ in range(args.runs)]
+    best = min(results, key=lambda r: r["own_ms"])
+    best["total_ms"] = min(r["total_ms"] for r in results)
+    failures = []
+    if best["own_ms"] > args.own_budget_ms:
+        failures.append(f"own import time {best['own_ms']} ms > {args.own_budget_ms} ms")
+    if args.total_budget_ms is not None and best["total_ms"] > args.total_budget_ms:
+        failures.append(f"total import time {best['total_ms']} ms > {args.total_budget_ms} ms")
+    if best["eager_heavy_modules"]:
+        failures.append(f"imported at startup: {', '.join(best['eager_heavy_modules'])}")
+    best["failures"] = failures
+    print(json.dumps(best, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Throughput overhead of the streaming sha2-256 checksum on the upload path.
+
+Runs ``stream_upload`` (copy to disk + header capture, one pass) on each file
+with the checksum off and on, best of ``--repeat`` runs, and reports MB/s and
+the relative overhead of hashing::
+
+    python benchmarks/make_las_corpus.py --out /tmp/las_corpus
+    python benchmarks/upload_checksum.py /tmp/las_corpus
+    python benchmarks/upload_checksum.py --synthetic-mb 512
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from topo4d_form.las import stream_upload  # noqa: E402
+
+
+def best_of(path, uploads_dir, checksum, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        with open(path, "rb") as f:
+            t0 = time.perf_counter()
+            stream_upload(f, os.path.basename(path), uploads_dir, checksum=checksum)
+            best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", help="LAS/LAZ files or corpus directories")
+    parser.add_argument("--synthetic-mb", type=int, default=None, help="also time a random file of this size")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="topo4d_checksum_")
+    files = []
+    for p in map(Path, args.paths):
+        files.extend(sorted(p.glob("*.la[sz]")) if p.is_dir() else [p])
+    if args.synthetic_mb:
+        synthetic = Path(workdir) / f"synthetic_{args.synthetic_mb}mb.bin"
+        with open(synthetic, "wb") as f:
+            for _ in range(args.synthetic_mb):
+                f.write(os.urandom(1024 * 1024))
+        files.append(synthetic)
+    if not files:
+        parser.error("no input files")
+
+    uploads_dir = os.path.join(workdir, "uploads")
+    try:
+        for path in files:
+            mb = os.path.getsize(path) / 1e6
+            off = best_of(path, uploads_dir, False, args.repeat)
+            on = best_of(path, uploads_dir, True, args.repeat)
+            print(json.dumps({
+                "file": os.path.basename(path),
+                "mb": round(mb, 1),
+                "mb_s_no_checksum": round(mb / off, 1),
+                "mb_s_checksum": round(mb / on, 1),
+                "overhead_pct": round((on - off) / off * 100, 1),
+            }))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
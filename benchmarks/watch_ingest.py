@@ -0,0 +1,96 @@
+"""Watch-folder ingestion latency and throughput.
+
+Copies the LAS/LAZ files of a corpus (``make_las_corpus.py``) into a
+temporary watched directory, ``--copies`` times each at ``--rate`` files per
+second, while a ``topo4d_form.watch.Watcher`` polls it, and reports files
+per second and the p50/p95 of the time from a file settling to its item
+being written (``process``) and from it first being seen to its item
+(``latency``, settling included)::
+
+    python benchmarks/make_las_corpus.py --out /tmp/las_corpus
+    python benchmarks/watch_ingest.py /tmp/las_corpus --workers 1 4 --settle 1
+
+Validation is skipped (``TOPO4D_SCHEMA_PATH`` is not needed); items are not
+indexed.
+"""
+
+import argparse
+import json
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import topo4d_form.validation  # noqa: E402
+from topo4d_form.watch import Watcher, load_checkpoint  # noqa: E402
+
+FORM = {"topo4d_data_type": "pointcloud"}
+
+
+def percentile(values, q):
+    return round(statistics.quantiles(values, n=100)[q - 1], 3) if len(values) > 1 else round(values[0], 3)
+
+
+def run(files, copies, rate, workers, settle, interval):
+    with tempfile.TemporaryDirectory(prefix="topo4d_watch_") as tmp:
+        watched = Path(tmp) / "incoming"
+        watched.mkdir()
+        watcher = Watcher(str(watched), out_dir=str(Path(tmp) / "items"), form=FORM,
+                          settle=settle, workers=workers, index=False)
+        stop = threading.Event()
+        poller = threading.Thread(target=watcher.run, args=(interval, stop))
+        poller.start()
+        landed = []
+        t0 = time.perf_counter()
+        for i in range(copies):
+            for f in files:
+                name = f"{f.stem}-{i}{f.suffix}"
+                shutil.copy(f, watched / name)
+                landed.append(name)
+                time.sleep(1 / rate if rate else 0)
+        while len(load_checkpoint(watcher.checkpoint_path)) < len(landed):
+            time.sleep(0.05)
+        wall = time.perf_counter() - t0
+        stop.set()
+        poller.join()
+        watcher.close()
+        done = load_checkpoint(watcher.checkpoint_path)
+
+    process = [r["seconds"] for r in done.values()]
+    latency = [r["latency"] for r in done.values()]
+    return {
+        "workers": workers,
+        "files": len(done),
+        "failed": sum(1 for r in done.values() if "error" in r),
+        "wall_s": round(wall, 2),
+        "files_per_s": round(len(done) / wall, 2),
+        "process_p50_s": percentile(process, 50),
+        "process_p95_s": percentile(process, 95),
+        "latency_p50_s": percentile(latency, 50),
+        "latency_p95_s": percentile(latency, 95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus", help="directory of LAS/LAZ files")
+    parser.add_argument("--copies", type=int, default=2)
+    parser.add_argument("--rate", type=float, default=0, help="files per second dropped (0: all at once)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--settle", type=float, default=1.0)
+    parser.add_argument("--interval", type=float, default=0.5)
+    args = parser.parse_args()
+
+    topo4d_form.validation.topo4d_validation_errors = lambda item: []
+    files = sorted(p for p in Path(args.corpus).iterdir() if p.suffix.lower() in (".las", ".laz"))
+    results = [run(files, args.copies, args.rate, w, args.settle, args.interval) for w in args.workers]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,74 @@
 from fasthtml.common import *
 from starlette.datastructures import UploadFile
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.background import BackgroundTask
+from starlette.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 
-from topo4d_form.session import load_session
+from topo4d_form.session import load_session, session_size
 from topo4d_form.styles import *
 from topo4d_form.templates import *
-from topo4d_form.validation import validate_topo4d_item, model_required_keys
+from topo4d_form.validation import (
+    format_validation_errors,
+    topo4d_validation_errors,
+    topo4d_subtree_errors,
+    model_required_keys,
+    stac_asset_validation_error,
+)
+from topo4d_form.las import ingest_uploads, laspy_available, new_uploads_dir
+from topo4d_form.jsonpatch import (
+    JsonPatchError,
+    apply_patch,
+    make_patch,
+    resolve,
+    to_pointer,
+    touched_paths,
+)
+from topo4d_form.api import build_and_validate
+from topo4d_form.bulk import aiter_bulk_results
+from topo4d_form.trafochain import TrafoChainError, compose_trafo_chains
+from topo4d_form.index import get_index, index_item
+from topo4d_form.overlap import epoch_overlaps
+from topo4d_form.parquet import pyarrow_available, write_parquet
+from topo4d_form.metrics import (
+    MetricsMiddleware,
+    is_enabled as metrics_enabled,
+    render_metrics,
+    set_enabled as set_metrics_enabled,
+    span,
+)
+from topo4d_form.profiler import (
+    SLOW_MS as PROFILE_SLOW_MS,
+    is_enabled as profiling_enabled,
+    profile_path,
+    profile_slow,
+    recent_profiles,
+)
 from topo4d_form.make_item import (
-    construct_topo4d_properties,
-    construct_assets,
-    create_pystac_item,
-    geometry_from_las_header,
+    build_item,
+    form_format_to_topo4d_input,
+    form_inputs_from_item,
+    las_file_asset,
+    union_geometry,
+    unique_asset_key,
 )
 from datetime import datetime
 import pystac
 import copy
-import pytz
-from datetime import datetime
+import json
 import os
-import shutil
 import io
+import tempfile
+import time
+from functools import lru_cache
 
-try:
-    import laspy  # type: ignore
-except Exception:
-    laspy = None
+live_preview_mode = os.environ.get("TOPO4D_LIVE_PREVIEW", "http").lower()
 
-app, rt = fast_app(hdrs=(picolink))
+app, rt = fast_app(
+    hdrs=(picolink),
+    exts=("ws" if live_preview_mode == "ws" else None),
+    middleware=[Middleware(MetricsMiddleware)],
+)
 
 app_title = "Topo4D Metadata Form"
 
@@ -57,70 +100,142 @@ def homepage(session):
 @app.post("/clear_form")
 def clear_form(session):
     session = load_session(session)
-    session.clear()
+    session.next_seq()
+    with session.lock:
+        session.clear()
     return session_form(session), button_bar(session)
 
 
-def form_format_to_topo4d_input(d):
-    """Normalize form dictionary before storing/using.
+def apply_form_update(session, seq, d):
+    """Store a full form post in the session.
 
-    - Collects inputs created by inputArrayTemplate with names like
-      "<base>_r_c" (1-based indices) into a nested list stored under "<base>".
+    Returns a snapshot of ``stac_format_d`` to build from, or None if a newer
+    request has superseded this one.
     """
-    import re
-
-    out = dict(d)
-
-    # Group keys by base name if they match pattern <name>_r_c where r,c are ints
-    pattern = re.compile(r"^(?P<base>.+)_(?P<r>\d+)_(?P<c>\d+)$")
-    buckets = {}
-    for k, v in d.items():
-        m = pattern.match(k)
-        if not m:
-            continue
-        base = m.group("base")
-        r = int(m.group("r"))
-        c = int(m.group("c"))
-        buckets.setdefault(base, {})[(r, c)] = v
-
-    # For each bucket, assemble rows in row-major order
-    for base, grid in buckets.items():
-        if not grid:
-            continue
-        max_r = max(rc[0] for rc in grid)
-        max_c = max(rc[1] for rc in grid)
-        nested = []
-        for r in range(1, max_r + 1):
-            row = []
-            for c in range(1, max_c + 1):
-                row.append(grid.get((r, c), ""))
-            nested.append(row)
-        out[base] = nested
-
-    return out
+    form_d = copy.deepcopy(d)
+    with span("normalize"):
+        d = form_format_to_topo4d_input(d)
+    with session.lock:
+        if session.is_stale(seq):
+            return None
+        session.setdefault("stac_format_d", {})
+        session.setdefault("form_format_d", {})
+        session["form_format_d"].update(form_d)
+        session["stac_format_d"].update(d)
+        return copy.deepcopy(session["stac_format_d"])
+
+
+def render(*fts):
+    """Render FT components to HTML here, so rendering is timed as its own stage."""
+    with span("render"):
+        return NotStr(to_xml(fts))
+
+
+def remember_item(session, seq, item, errors):
+    """Cache the latest built item and its validation errors in the session."""
+    with session.lock:
+        if not session.is_stale(seq):
+            session["item"] = item
+            session["item_errors"] = errors
+
+
+def profile_meta(session, *args, **kwargs):
+    # Attached to saved profiles of slow requests
+    return {"session_bytes": session_size(load_session(session))}
 
 
 @app.post("/submit")
+@profile_slow("/submit", meta=profile_meta)
 def submit(session, d: dict):
     session = load_session(session)
-    session.setdefault("stac_format_d", {})
-    session.setdefault("form_format_d", {})
-    session["form_format_d"].update(copy.deepcopy(d))
-    d = form_format_to_topo4d_input(d)
-    session["stac_format_d"].update(d)
-    topo_props = construct_topo4d_properties(session["stac_format_d"])
-    assets = construct_assets(session["stac_format_d"].get("assets"))
-    item = create_pystac_item(
-        topo_props,
-        assets,
-        geometry=session["stac_format_d"].get("geometry"),
-        bbox=session["stac_format_d"].get("bbox"),
-    )
+    # Every request posts the full form, so a newer request fully supersedes
+    # older ones still in flight; only the newest one is built and rendered.
+    seq = session.next_seq()
+    stac_format_d = apply_form_update(session, seq, d)
+    if stac_format_d is None:
+        return Response(status_code=204)
+    # Field parsing errors (e.g. matrix shapes) come first, then the schema's
+    errors = []
+    item = build_item(stac_format_d, errors)
     # Validate against local schema
-    error = validate_topo4d_item(item)
+    errors += topo4d_validation_errors(item)
+    remember_item(session, seq, item, errors)
+    error = format_validation_errors(errors)
+    # htmx does not swap on 204, so superseded responses leave the page alone
+    if session.is_stale(seq):
+        return Response(status_code=204)
     if error:
-        return error_template(error), prettyJsonTemplate(item), button_bar(session)
-    return prettyJsonTemplate(item), button_bar(session)
+        return render(error_template(error), prettyJsonTemplate(item, "/preview_json"), button_bar(session, item))
+    return render(prettyJsonTemplate(item, "/preview_json"), button_bar(session, item))
+
+
+# Live preview over a websocket (enabled with TOPO4D_LIVE_PREVIEW=ws).
+# The form is still sent whole by htmx, but only the fields that changed are
+# applied and only the preview fragments whose HTML changed are pushed back.
+# Fragments last pushed to each open connection, keyed by id(ws)
+ws_pushed_fragments = {}
+
+
+def ws_preview_connect(ws):
+    ws_pushed_fragments[id(ws)] = {}
+
+
+def ws_preview_disconnect(ws):
+    ws_pushed_fragments.pop(id(ws), None)
+
+
+@app.ws("/ws_preview", conn=ws_preview_connect, disconn=ws_preview_disconnect)
+def ws_preview(data, ws, session):
+    session = load_session(session)
+    # The htmx ws extension sends the request headers along with the form
+    data = {k: v for k, v in data.items() if k != "HEADERS"}
+    pushed = ws_pushed_fragments.setdefault(id(ws), {})
+    form_d = session.get("form_format_d", {})
+    if pushed and all(form_d.get(k) == v for k, v in data.items()):
+        return None
+    seq = session.next_seq()
+    stac_format_d = apply_form_update(session, seq, data)
+    if stac_format_d is None:
+        return None
+    errors = []
+    item = build_item(stac_format_d, errors)
+    errors += topo4d_validation_errors(item)
+    remember_item(session, seq, item, errors)
+    error = format_validation_errors(errors)
+    if session.is_stale(seq):
+        return None
+    fragments = {
+        "preview-errors": Div(error_template(error) if error else None, id="preview-errors"),
+        "preview-json": Div(prettyJsonTemplate(item, "/preview_json"), id="preview-json"),
+        "button-bar": button_bar(session, item),
+    }
+    with span("render"):
+        rendered = {k: to_xml(v) for k, v in fragments.items()}
+        if not pushed:
+            # First message on this connection: replace the whole result panel
+            out = to_xml(
+                Div(fragments["preview-errors"], fragments["preview-json"], id="result")
+            ) + rendered["button-bar"]
+        else:
+            out = "".join(v for k, v in rendered.items() if pushed.get(k) != v)
+    pushed.update(rendered)
+    return out or None
+
+
+@lru_cache(maxsize=None)
+def timezone_options():
+    """IANA timezone names for the timezone select, loaded on first render."""
+    from zoneinfo import available_timezones
+
+    zones = available_timezones()
+    if not zones:
+        # No system tz database and no tzdata package
+        try:
+            import pytz
+        except ImportError:
+            return ("UTC",)
+        return tuple(pytz.all_timezones)
+    return tuple(sorted(zones))
 
 
 roles_options = []  # No predefined roles for topo4d; free-form CSV in UI
@@ -140,13 +255,16 @@ def session_form(session, submitOnLoad=False):
     trigger = (
         "input delay:200ms, load" if submitOnLoad else "input delay:200ms"
     )
+    if live_preview_mode == "ws":
+        live_attrs = dict(hx_ext="ws", ws_connect="/ws_preview", ws_send=True)
+    else:
+        live_attrs = dict(hx_post="/submit", hx_target="#result", hx_sync="this:replace")
     session_form = Form(
-        hx_post="/submit",
-        hx_target="#result",
         hx_trigger=trigger,
         id="session_form",
         hx_swap_oob="#session_form",
         style=form_style,
+        **live_attrs,
     )(
         P(
             "The ",
@@ -169,116 +287,10 @@ def session_form(session, submitOnLoad=False):
             ),
             ".",
         ),
-        inputTemplate(
-            label="Item Name",
-            name="item_id",
-            placeholder="Identifier for this STAC Item",
-            val="",
-            input_type="text",
-        ),
-        inputTemplate(
-            label="Datetime (ISO8601)",
-            name="datetime",
-            placeholder="e.g. 2024-01-01T00:00:00Z",
-            val=datetime.utcnow().replace(microsecond=0).isoformat() + "Z",
-            input_type="text",
-        ),
-        selectEnumTemplate(
-            label="Data Type",
-            options=["pointcloud", "raster", "mesh", "vector", "text", "other"],
-            name="topo4d_data_type",
-            value="",
-        ),
-        selectEnumTemplate(
-            label="Timezone",
-            options=pytz.all_timezones,
-            name="topo4d_timezone",
-            error_msg=None,
-            canValidateInline=False,
-        ),
-        inputTemplate(
-            label="Acquisition Mode",
-            name="topo4d_acquisition_mode",
-            placeholder="e.g. ULS, TLS, UPH",
-            val="",
-            input_type="text",
-        ),
-        inputTemplate(
-            label="Duration [seconds]",
-            name="topo4d_duration",
-            val="",
-            input_type="number",
-        ),
-        inputTemplate(
-            label="Spatial Resolution [m]",
-            name="topo4d_spatial_resolution",
-            val="",
-            input_type="number",
-        ),
-        inputTemplate(
-            label="Positional Accuracy [m]",
-            name="topo4d_positional_accuracy",
-            val="",
-            input_type="number",
-        ),
-        inputTemplate(
-            label="Orientation",
-            name="topo4d_orientation",
-            placeholder="Survey pattern: Nadir, Oblique, Nadir+Oblique",
-            val="",
-            input_type="text",
-        ),
-        inputTemplate(
-            label="Global Transformation (rows by semicolon, values by comma)",
-            name="topo4d_global_trafo",
-            placeholder="e.g. 1,0,0,0;0,1,0,0;0,0,1,0;0,0,0,1",
-            val="",
-            input_type="text",
-        ),
-        H4("Transformation Metadata (trafometa)"), #TODO make the trafometa section optional/collapsible
-        relObjectTemplate(
-            label="Reference Epoch (Relation/Object)",
-            name="trafometa_reference_epoch",
-            href="",
-            type_="",
-            title="",
-        ),
-        inputTemplate(
-            label="Registration Error [m]",
-            name="trafometa_registration_error",
-            val="",
-            input_type="number",
-        ),
-        inputTemplate(
-            label="Transformation (rows by semicolon, values by comma)",
-            name="trafometa_transformation",
-            placeholder="e.g. 1,0,0,0;0,1,0,0;0,0,1,0;0,0,0,1",
-            val="",
-            input_type="text",
-        ),
-        H4("Product Metadata (productmeta)"), #TODO make the productmeta section optional/collapsible
-        inputTemplate(
-            label="Product Name",
-            name="productmeta_product_name",
-            val="",
-            input_type="text",
-        ),
-        relObjectTemplate(
-            label="Derived From (Relation/Object)",
-            name="productmeta_derived_from",
-        ),
-        inputTemplate(
-            label="Product Level",
-            name="productmeta_product_level",
-            val="",
-            input_type="text",
-        ),
-        inputTemplate(
-            label="Param (JSON object)",
-            name="productmeta_param",
-            placeholder='e.g. {"key": "value"}',
-            val="",
-            input_type="text",
+        #TODO make the trafometa and productmeta sections optional/collapsible
+        *fieldsTemplate(
+            values={"datetime": datetime.utcnow().replace(microsecond=0).isoformat() + "Z"},
+            options={"topo4d_timezone": timezone_options()},
         ),
     )
     fill_form(session_form, result)
@@ -299,6 +311,7 @@ def session_asset_form(session, submitOnLoad=False):
         hx_post="/submit_asset",
         hx_target="#result",
         hx_trigger=trigger,
+        hx_sync="this:replace",
         id="session_asset_form",
         hx_swap_oob="#session_asset_form",
         style=form_style,
@@ -330,6 +343,26 @@ def session_asset_form(session, submitOnLoad=False):
         ),
     )
     fill_form(session_asset_form, session["form_format_d"].get("assets", {}))
+    file_assets = session["stac_format_d"].get("file_assets") or {}
+    if file_assets:
+        session_asset_form(
+            H4("Uploaded files"),
+            Ul(
+                *[
+                    Li(
+                        f"{key}: {asset.get('title')} ({asset.get('file:size', 0):,} bytes) ",
+                        Button(
+                            "Remove",
+                            type="button",
+                            hx_post=f"/remove_file_asset/{key}",
+                            hx_target="#result",
+                            cls="secondary outline",
+                        ),
+                    )
+                    for key, asset in file_assets.items()
+                ]
+            ),
+        )
     return session_asset_form
 
 
@@ -353,7 +386,8 @@ def asset_homepage(session):
 @app.post("/submit_asset")
 def submit_asset(session, d: dict):
     session = load_session(session)
-    session["form_format_d"]["assets"].update(copy.deepcopy(d))
+    seq = session.next_seq()
+    form_d = copy.deepcopy(d)
     # Normalize roles CSV if provided and map media_type to type
     roles = d.get("roles")
     if isinstance(roles, str):
@@ -364,130 +398,530 @@ def submit_asset(session, d: dict):
             d.pop("roles", None)
     # Map media_type to type expected by STAC
     d["type"] = d.pop("media_type")
-    session["stac_format_d"]["assets"].update(copy.deepcopy(d))
-    # pystac doesn't directly support validating an asset, so put the asset inside a
-    # dummy item and run the validation on that
-    dummy_item = pystac.Item(
-        id="item",
-        geometry={
-            "type": "Polygon",
-            "coordinates": [
-                [
-                    [-101.0, 40.0],
-                    [-101.0, 41.0],
-                    [-100.0, 41.0],
-                    [-100.0, 40.0],
-                    [-101.0, 40.0],
-                ]
-            ],
-        },
-        bbox=[-101.0, 40.0, -100.0, 41.0],
-        datetime=datetime.utcnow(),
-        properties={},
-    )
-    dummy_item.assets["data"] = pystac.Asset.from_dict(d)
-
-    try:
-        validation_result = pystac.validation.validate(dummy_item)
-    except pystac.errors.STACValidationError as e:
-        error_message = str(e)
+    with session.lock:
+        if session.is_stale(seq):
+            return Response(status_code=204)
+        session["form_format_d"].setdefault("assets", {}).update(form_d)
+        session["stac_format_d"].setdefault("assets", {}).update(copy.deepcopy(d))
+        session.pop("item", None)
+        session.pop("item_errors", None)
+    # Check just the asset against the bundled STAC asset schema (offline)
+    asset = pystac.Asset.from_dict(d).to_dict()
+    error_message = stac_asset_validation_error(asset)
+    if error_message:
         if "'href'" in error_message and "non-empty" in error_message:
             error_message = "The 'URI' field must be non-empty."
         else:
             error_message = f"STACValidationError: {error_message}".replace(
                 "\\n", "<br>"
             )
-        return error_template(error_message), prettyJsonTemplate(
-            dummy_item.assets["data"].to_dict()
-        )
-    return prettyJsonTemplate(dummy_item.assets["data"].to_dict())
+        return render(error_template(error_message), prettyJsonTemplate(asset))
+    return render(prettyJsonTemplate(asset))
 
 
 @app.post("/upload_las")
-def upload_las(session, lasfile: UploadFile = None):
+@profile_slow("/upload_las", meta=profile_meta)
+def upload_las(session, lasfile: list[UploadFile] = None):
     session = load_session(session)
-    if laspy is None:
+    if not laspy_available():
         return error_template(
             "laspy is not installed. Please install dependencies and retry."
         ), button_bar(session)
 
-    if lasfile is None:
+    # Starlette UploadFile exposes .file (a SpooledTemporaryFile) for sync access
+    uploads = [f for f in (lasfile or []) if getattr(f, "file", None) is not None]
+    if not uploads:
         return error_template("No file uploaded."), button_bar(session)
 
-    # Use the uploaded filename if present
-    filename = getattr(lasfile, "filename", None) or "uploaded.las"
-    # Starlette UploadFile exposes .file (a SpooledTemporaryFile) for sync access
-    fileobj = getattr(lasfile, "file", None)
-    if fileobj is None:
-        return error_template("Invalid upload payload."), button_bar(session)
-
-    # Persist temporary file (simplifies laspy.open handling for LAZ)
-    uploads_dir = os.path.join(os.getcwd(), "uploads")
-    os.makedirs(uploads_dir, exist_ok=True)
-    # Avoid path traversal in filename
-    safe_name = os.path.basename(filename) or "uploaded.las"
-    tmp_path = os.path.join(uploads_dir, safe_name)
-    try:
-        # Rewind and stream-copy to disk
-        fileobj.seek(0, os.SEEK_SET)
-        with open(tmp_path, "wb") as out:
-            shutil.copyfileobj(fileobj, out, length=1024 * 1024)
-    except Exception as e:
-        return error_template(f"Failed to save upload: {e}"), button_bar(session)
-
-    # Extract header metadata
-    hdr_meta = {}
-    try:
-        with laspy.open(tmp_path) as lh:  # type: ignore
-            hdr = lh.header
-            # Basic header fields
-            try:
-                version = f"{hdr.version.major}.{hdr.version.minor}"
-            except Exception:
-                version = None
-            try:
-                crs = getattr(hdr, "parse_crs", lambda: None)()
-            except Exception:
-                crs = None
-            hdr_meta = {
-                "filename": safe_name,
-                "version": version,
-                "point_format": getattr(getattr(hdr, "point_format", None), "id", None),
-                "point_count": getattr(hdr, "point_count", None),
-                "xyz_min": list(getattr(hdr, "mins", getattr(hdr, "min", [None, None, None]))[:3]),
-                "xyz_max": list(getattr(hdr, "maxs", getattr(hdr, "max", [None, None, None]))[:3]),
-                "scales": list(getattr(hdr, "scales", [])) or None,
-                "offsets": list(getattr(hdr, "offsets", [])) or None,
-                "srs_wkt": getattr(crs, "to_wkt", lambda: None)(),
-                "srs_epsg": getattr(crs, "to_epsg", lambda: None)(),
-            }
-    except Exception as e:
-        return error_template(f"Failed to read LAS/LAZ: {e}"), button_bar(session)
-
-    # Derive geometry & bbox and store in session
-    
-    geo_meta = geometry_from_las_header(hdr_meta)
-    if "stac_format_d" not in session:
-        session.setdefault("stac_format_d", {}) 
-    session["stac_format_d"]["geometry"] = geo_meta["geometry"]
-    session["stac_format_d"]["bbox"] = geo_meta["bbox"]
-    topo_props = construct_topo4d_properties(session["stac_format_d"])
-    assets = construct_assets(session["stac_format_d"].get("assets"))
-    item = create_pystac_item(
-        topo_props,
-        assets,
-        geometry=session["stac_format_d"].get("geometry"),
-        bbox=session["stac_format_d"].get("bbox"),
+    # Save each file while hashing it and parsing its header in the same
+    # pass, all files in parallel; then derive the extent of each file
+    # Each session keeps its uploads in a directory of its own
+    with session.lock:
+        uploads_dir = session.get("uploads_dir") or new_uploads_dir()
+        session["uploads_dir"] = uploads_dir
+    results = ingest_uploads(
+        [(f.file, getattr(f, "filename", None) or "uploaded.las") for f in uploads],
+        uploads_dir,
     )
+    failed = [
+        f"Failed to read LAS/LAZ {f.filename}: {r}"
+        for f, r in zip(uploads, results)
+        if isinstance(r, Exception)
+    ]
+    read = [r for r in results if not isinstance(r, Exception)]
+    if not read:
+        return error_template("\n".join(failed)), button_bar(session)
+
+    # One asset per file; the item extent is the union of all file extents
+    seq = session.next_seq()
+    with session.lock:
+        session.setdefault("stac_format_d", {})
+        file_assets = session["stac_format_d"].setdefault("file_assets", {})
+        file_extents = session.setdefault("file_extents", {})
+        for r in read:
+            key = unique_asset_key(r["filename"], file_assets)
+            file_assets[key] = las_file_asset(r["filename"], r["size"], r["checksum"])
+            file_extents[key] = {"geometry": r["geometry"], "bbox": r["bbox"]}
+        session["stac_format_d"].update(union_geometry(list(file_extents.values())))
+        stac_format_d = copy.deepcopy(session["stac_format_d"])
+    # Field parsing errors (e.g. matrix shapes) come first, then the schema's
+    errors = []
+    item = build_item(stac_format_d, errors)
     # Validate against local schema
-    error = validate_topo4d_item(item)
+    errors += topo4d_validation_errors(item)
+    remember_item(session, seq, item, errors)
+    # Uploaded epochs can be found again as reference epochs, once valid
+    if not errors:
+        index_item(item)
+    error = "\n".join(filter(None, failed + [format_validation_errors(errors)]))
+    if session.is_stale(seq):
+        return Response(status_code=204)
     if error:
-        return error_template(error), prettyJsonTemplate(item), button_bar(session)
-    return (
+        return render(error_template(error), prettyJsonTemplate(item, "/preview_json"), button_bar(session, item))
+    names = ", ".join(r["filename"] for r in read)
+    return render(
         Div(
-            Div(f"Metadata extracted from {safe_name}.", style="color: green;"),
+            Div(f"Metadata extracted from {names}.", style="color: green;"),
+        ),
+        prettyJsonTemplate(item, "/preview_json"), button_bar(session, item))
+
+
+@app.post("/remove_file_asset/{key}")
+def remove_file_asset(session, key: str):
+    session = load_session(session)
+    session.next_seq()
+    with session.lock:
+        stac_format_d = session.setdefault("stac_format_d", {})
+        stac_format_d.setdefault("file_assets", {}).pop(key, None)
+        file_extents = session.setdefault("file_extents", {})
+        file_extents.pop(key, None)
+        if file_extents:
+            stac_format_d.update(union_geometry(list(file_extents.values())))
+        else:
+            stac_format_d.pop("geometry", None)
+            stac_format_d.pop("bbox", None)
+        # The cached item is rebuilt on next use
+        session.pop("item", None)
+        session.pop("item_errors", None)
+        file_assets = copy.deepcopy(stac_format_d["file_assets"])
+    return session_asset_form(session), render(prettyJsonTemplate(file_assets))
+
+
+@app.get("/preview_json")
+def preview_json(session, path: str = "", start: int = 0):
+    # Elided part of the item preview, from the item cached in the session;
+    # the preview may be older than the item if the form changed since
+    if start < 0:
+        return PlainTextResponse("start must not be negative", status_code=400)
+    item, _ = session_item(load_session(session))
+    try:
+        value = resolve(item, path)
+    except JsonPatchError:
+        return Span("(no longer in the item)", style=json_stub_style)
+    return render(*jsonPreviewFragment(value, "/preview_json", path, start))
+
+
+@app.get("/item_json")
+def item_json(session):
+    # Full item for the Copy and Download buttons, fetched on click
+    item, _ = session_item(load_session(session))
+    return Response(json.dumps(item, indent=2), media_type="application/json")
+
+
+@app.post("/index_item")
+def index_session_item(session):
+    # Copy and Download also store the item in the local index, so it can be
+    # looked up later (e.g. as a reference epoch)
+    item, errors = session_item(load_session(session))
+    if errors is None:
+        errors = topo4d_validation_errors(item)
+    if not errors:
+        index_item(item)
+    return Response(status_code=204)
+
+
+@app.get("/suggest_href/{name}")
+def suggest_href(req, name: str):
+    # Options for the datalist of a relObject href input (see relObjectTemplate)
+    index = get_index()
+    prefix = req.query_params.get(f"{name}_href", "")
+    if index is None or not prefix:
+        return ""
+    return render(
+        *(Option(value=s["href"], label=s["title"]) for s in index.autocomplete(prefix))
+    )
+
+
+# Headless JSON API: same item construction and validation as the form,
+# without sessions or HTML rendering.
+async def read_json_body(req, expected=dict):
+    try:
+        payload = await req.json()
+    except ValueError as e:
+        return None, JSONResponse({"error": f"Invalid JSON body: {e}"}, status_code=400)
+    if not isinstance(payload, expected):
+        kind = "array" if expected is list else "object"
+        return None, JSONResponse({"error": f"Expected a JSON {kind}."}, status_code=400)
+    return payload, None
+
+
+@app.post("/api/v1/items")
+async def api_build_item(req):
+    payload, error_response = await read_json_body(req)
+    if error_response:
+        return error_response
+    try:
+        result = await run_in_threadpool(build_and_validate, payload)
+    except (ValueError, TypeError, KeyError, AttributeError, pystac.STACError) as e:
+        # Malformed parts of the payload, e.g. a geometry or an asset that is
+        # not an object
+        return JSONResponse({"error": f"Failed to build item: {e}"}, status_code=400)
+    return JSONResponse(result)
+
+
+@app.post("/api/v1/items/validate")
+async def api_validate_item(req):
+    payload, error_response = await read_json_body(req)
+    if error_response:
+        return error_response
+    errors = await run_in_threadpool(topo4d_validation_errors, payload)
+    return JSONResponse({"valid": not errors, "errors": errors})
+
+
+class BodyStreamingResponse(StreamingResponse):
+    """StreamingResponse for handlers that read the request body while streaming.
+
+    Before ASGI spec 2.4, StreamingResponse watches for the client going away
+    by reading ``receive``, which discards request body chunks the stream
+    still needs; this one only streams.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+@app.post("/api/v1/items/bulk")
+async def api_bulk_items(req):
+    # NDJSON in, NDJSON out: one result per input line, in order, followed by
+    # a summary line with items/sec
+    # ?index=1 also adds the valid items to the local item index
+    return BodyStreamingResponse(
+        aiter_bulk_results(req.stream(), index=req.query_params.get("index") in ("1", "true")),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.post("/api/v1/trafometa/compose")
+async def api_compose_trafometa(req):
+    # {"items": [...]} or a FeatureCollection of epochs, plus an optional
+    # "reference" epoch id; returns each epoch's cumulative transformation
+    payload, error_response = await read_json_body(req)
+    if error_response:
+        return error_response
+    items = payload.get("items", payload.get("features"))
+    if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+        return JSONResponse({"error": "Expected a list of items."}, status_code=400)
+    try:
+        transforms, errors = await run_in_threadpool(
+            compose_trafo_chains, items, payload.get("reference")
+        )
+    except TrafoChainError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return JSONResponse({"transforms": transforms, "valid": not errors, "errors": errors})
+
+
+@app.post("/api/v1/overlap")
+async def api_epoch_overlap(req):
+    # {"items": [...]} or a FeatureCollection of epochs, optional "min_ratio";
+    # returns the sparse pairwise overlap matrix and suggested references
+    payload, error_response = await read_json_body(req)
+    if error_response:
+        return error_response
+    items = payload.get("items", payload.get("features"))
+    if not isinstance(items, list) or not all(
+        isinstance(i, dict) and i.get("id") and isinstance(i.get("geometry"), dict) for i in items
+    ):
+        return JSONResponse({"error": "Expected a list of items with an id and a geometry."}, status_code=400)
+    try:
+        result = await run_in_threadpool(
+            epoch_overlaps, items, float(payload.get("min_ratio") or 0)
+        )
+    except (ValueError, TypeError, KeyError) as e:
+        return JSONResponse({"error": f"Failed to compute overlaps: {e}"}, status_code=400)
+    return JSONResponse(result)
+
+
+def parse_bbox(value):
+    bbox = [float(v) for v in value.split(",")]
+    if len(bbox) != 4:
+        raise ValueError("expected minx,miny,maxx,maxy")
+    return bbox
+
+
+@app.get("/api/v1/index/search")
+def api_index_search(req):
+    # ?bbox=minx,miny,maxx,maxy&start=...&end=...&limit=...&full=1
+    index = get_index()
+    if index is None:
+        return JSONResponse({"error": "The item index is turned off."}, status_code=404)
+    q = req.query_params
+    try:
+        bbox = parse_bbox(q["bbox"]) if q.get("bbox") else None
+        limit = min(int(q.get("limit", 100)), 10_000)
+        results = index.search(
+            bbox, q.get("start"), q.get("end"), limit=limit, full=q.get("full") in ("1", "true")
+        )
+    except ValueError as e:
+        return JSONResponse({"error": f"Invalid query: {e}"}, status_code=400)
+    return JSONResponse({"items": results})
+
+
+@app.get("/api/v1/index/export.parquet")
+def api_index_export_parquet(req):
+    # Same filters as /api/v1/index/search; the matching items as one Parquet
+    # file (see topo4d_form.parquet)
+    if not pyarrow_available():
+        return JSONResponse(
+            {"error": "Parquet export needs pyarrow, which is not installed."}, status_code=501
+        )
+    index = get_index()
+    if index is None:
+        return JSONResponse({"error": "The item index is turned off."}, status_code=404)
+    q = req.query_params
+    try:
+        bbox = parse_bbox(q["bbox"]) if q.get("bbox") else None
+        limit = min(int(q.get("limit", 10_000)), 100_000)
+        results = index.search(bbox, q.get("start"), q.get("end"), limit=limit, full=True)
+    except ValueError as e:
+        return JSONResponse({"error": f"Invalid query: {e}"}, status_code=400)
+    fd, path = tempfile.mkstemp(prefix="topo4d-export-", suffix=".parquet")
+    os.close(fd)
+    try:
+        write_parquet((r["item"] for r in results), path)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return FileResponse(
+        path,
+        media_type="application/vnd.apache.parquet",
+        filename="items.parquet",
+        background=BackgroundTask(os.unlink, path),
+    )
+
+
+@app.get("/api/v1/index/autocomplete")
+def api_index_autocomplete(req):
+    # ?q=<href or id prefix>; returns relation objects ({"href", "type", "title"})
+    index = get_index()
+    if index is None:
+        return JSONResponse({"error": "The item index is turned off."}, status_code=404)
+    try:
+        limit = min(int(req.query_params.get("limit", 10)), 100)
+    except ValueError as e:
+        return JSONResponse({"error": f"Invalid query: {e}"}, status_code=400)
+    return JSONResponse({"items": index.autocomplete(req.query_params.get("q", ""), limit)})
+
+
+def session_item(session):
+    """The session's cached item and errors, building them if nothing is cached yet."""
+    with session.lock:
+        item = session.get("item")
+        errors = session.get("item_errors")
+        stac_format_d = copy.deepcopy(session.get("stac_format_d", {}))
+    if item is None:
+        item = build_item(stac_format_d)
+        errors = None
+    return item, errors
+
+
+def is_under(error_path, prefix):
+    return not prefix or error_path == prefix or error_path.startswith(prefix + "/")
+
+
+def unrepresentable_paths(patch, new, stac_format_d):
+    """Pointers written by ``patch`` whose value in ``new`` does not survive a rebuild from ``stac_format_d``."""
+    rebuilt = build_item(stac_format_d)
+    # Geometry and bbox are carried over as they are
+    rebuilt["geometry"], rebuilt["bbox"] = new.get("geometry"), new.get("bbox")
+    missing = object()
+    lost = []
+    for tokens in touched_paths(patch):
+        pointer = to_pointer(tuple(tokens))
+        values = []
+        for doc in (new, rebuilt):
+            try:
+                values.append(resolve(doc, pointer))
+            except JsonPatchError:
+                values.append(missing)
+        if values[0] != values[1] and pointer not in lost:
+            lost.append(pointer)
+    return lost
+
+
+def patch_session_item(session, patch):
+    """Apply a JSON Patch to the session item and map it back onto the form.
+
+    Only the parents of the patched locations are revalidated; cached errors
+    elsewhere in the item are kept. Returns the JSON response.
+    """
+    seq = session.next_seq()
+    old, errors = session_item(session)
+    try:
+        new = apply_patch(old, patch)
+    except JsonPatchError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    subtrees = {tuple(p[:-1]) for p in touched_paths(patch)}
+    # Skip subtrees that are nested inside another touched subtree
+    subtrees = [
+        s for s in subtrees
+        if not any(o != s and s[: len(o)] == o for o in subtrees)
+    ]
+    prefixes = ["/".join(s) for s in subtrees]
+    # Errors reported above a touched subtree (e.g. a failed oneOf at the
+    # root) may depend on it, so those require a full revalidation
+    if errors is None or any(
+        is_under(p, e["path"]) and p != e["path"] for e in errors for p in prefixes
+    ):
+        errors = topo4d_validation_errors(new)
+    else:
+        errors = [
+            e for e in errors if not any(is_under(e["path"], p) for p in prefixes)
+        ]
+        for s in subtrees:
+            errors.extend(topo4d_subtree_errors(new, s))
+
+    old_inputs = form_inputs_from_item(old)
+    new_inputs = form_inputs_from_item(new)
+    stac_updates, form_updates = {}, {}
+    for k in (set(old_inputs) | set(new_inputs)) - {"assets", "file_assets"}:
+        stac_updates[k] = form_updates[k] = new_inputs.get(k, "")
+    stac_updates["geometry"] = new.get("geometry")
+    stac_updates["bbox"] = new.get("bbox")
+    if new_inputs.get("assets") != old_inputs.get("assets"):
+        asset = new_inputs.get("assets") or {}
+        stac_updates["assets"] = dict(asset)
+        form_updates["assets"] = {
+            "title": asset.get("title") or "",
+            "href": asset.get("href") or "",
+            "media_type": asset.get("type") or "",
+            "roles": ", ".join(asset.get("roles") or []),
+        }
+    if new_inputs.get("file_assets") != old_inputs.get("file_assets"):
+        stac_updates["file_assets"] = copy.deepcopy(new_inputs.get("file_assets") or {})
+
+    # The form is the source of truth on the next /submit, so a patch must
+    # only change what the form can hold; anything else would be dropped then
+    with session.lock:
+        rebuilt_d = dict(copy.deepcopy(session.get("stac_format_d", {})), **stac_updates)
+    lost = unrepresentable_paths(patch, new, rebuilt_d)
+    if lost:
+        return JSONResponse(
+            {"error": "The form cannot represent the patched values.", "paths": lost},
+            status_code=422,
+        )
+
+    with session.lock:
+        if session.is_stale(seq):
+            return JSONResponse(
+                {"error": "Superseded by a newer update to this session."},
+                status_code=409,
+            )
+        session.setdefault("stac_format_d", {}).update(stac_updates)
+        session.setdefault("form_format_d", {}).update(form_updates)
+        session["item"] = new
+        session["item_errors"] = errors
+    return JSONResponse(
+        {"patch": make_patch(old, new), "valid": not errors, "errors": errors}
+    )
+
+
+@app.get("/api/v1/session/item")
+def api_get_session_item(session):
+    session = load_session(session)
+    item, errors = session_item(session)
+    if errors is None:
+        errors = topo4d_validation_errors(item)
+    return JSONResponse({"item": item, "valid": not errors, "errors": errors})
+
+
+@app.patch("/api/v1/session/item")
+async def api_patch_session_item(req, session):
+    # RFC 6902 JSON Patch against the item shown in the session's form
+    patch, error_response = await read_json_body(req, expected=list)
+    if error_response:
+        return error_response
+    session = load_session(session)
+    return await run_in_threadpool(patch_session_item, session, patch)
+
+
+@app.get("/metrics")
+def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+# Bearer token for POST /metrics; without one, metrics can only be switched
+# off at startup (TOPO4D_METRICS=0)
+METRICS_TOKEN = os.environ.get("TOPO4D_METRICS_TOKEN", "")
+
+
+@app.post("/metrics")
+async def toggle_metrics(req):
+    # Switch instrumentation on or off at runtime: {"enabled": false}
+    import hmac
+
+    if not METRICS_TOKEN:
+        return JSONResponse({"error": "Set TOPO4D_METRICS_TOKEN to toggle metrics at runtime."}, status_code=403)
+    if not hmac.compare_digest(req.headers.get("authorization", ""), f"Bearer {METRICS_TOKEN}"):
+        return JSONResponse({"error": "Invalid or missing bearer token."}, status_code=401)
+    payload, error_response = await read_json_body(req)
+    if error_response:
+        return error_response
+    if "enabled" in payload:
+        set_metrics_enabled(payload["enabled"])
+    return JSONResponse({"enabled": metrics_enabled()})
+
+
+@app.get("/debug/profiles")
+def profiles_index():
+    if not profiling_enabled():
+        return Titled(
+            "Slow request profiles",
+            P("Profiling is off. Set TOPO4D_PROFILE_SLOW_MS to enable it."),
+        )
+    rows = [
+        Tr(
+            Td(time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(p["created"]))),
+            Td(p["route"]),
+            Td(p["elapsed_ms"]),
+            Td(p.get("session_bytes", "")),
+            Td(p["samples"]),
+            Td(A("collapsed", href=f"/debug/profiles/{p['name']}")),
+        )
+        for p in recent_profiles()
+    ]
+    return Titled(
+        "Slow request profiles",
+        P(
+            f"Requests slower than {PROFILE_SLOW_MS:g} ms. "
+            "Profiles are collapsed stacks for flamegraph.pl or speedscope."
+        ),
+        Table(
+            Thead(Tr(Th("Time"), Th("Route"), Th("ms"), Th("Session bytes"), Th("Samples"), Th("Profile"))),
+            Tbody(*rows),
         ),
-        prettyJsonTemplate(item), button_bar(session))
+    )
+
+
+@app.get("/debug/profiles/{name}")
+def profile_download(name: str):
+    path = profile_path(name)
+    if path is None:
+        return PlainTextResponse("Profile not found.", status_code=404)
+    return FileResponse(path, media_type="text/plain", filename=f"{name}.collapsed")
 
 
 serve()
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from topo4d_form import bulk, index
+
+# Bulk items are validated in spawned workers, which read the schema from
+# TOPO4D_SCHEMA_PATH rather than downloading it
+SCHEMA = {
+    "type": "object",
+    "required": ["properties"],
+    "properties": {
+        "properties": {
+            "type": "object",
+            "required": ["topo4d:data_type"],
+            "properties": {"topo4d:data_type": {"enum": ["pointcloud", "raster"]}},
+        },
+    },
+}
+DATETIME = "2020-01-01T00:00:00Z"
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    from starlette.testclient import TestClient
+
+    import main
+
+    schema_path = tmp_path / "schema.json"
+    schema_path.write_text(json.dumps(SCHEMA))
+    monkeypatch.setenv("TOPO4D_SCHEMA_PATH", str(schema_path))
+    monkeypatch.setattr(bulk, "_POOL", None)
+    monkeypatch.setattr(index, "INDEX_PATH", str(tmp_path / "items.sqlite"))
+    monkeypatch.setattr(index, "_INDEX", None)
+    yield TestClient(main.app)
+    if bulk._POOL is not None:
+        bulk._POOL.shutdown()
+
+
+def nested(item_id, data_type, **props):
+    return {
+        "type": "Feature",
+        "id": item_id,
+        "geometry": {"type": "Point", "coordinates": [11.5, 48.1]},
+        "bbox": [11.5, 48.1, 11.5, 48.1],
+        "properties": dict({"datetime": DATETIME, "topo4d:data_type": data_type}, **props),
+    }
+
+
+def test_bulk_ndjson(client):
+    lines = [
+        json.dumps({"item_id": "a", "datetime": DATETIME, "topo4d_data_type": "pointcloud"}),
+        "",
+        "not json",
+        json.dumps({"item_id": "b", "topo4d_data_type": "pointcloud"}),
+        # Invalid, with a value that reads like a validity flag
+        json.dumps(nested("c", "mesh", **{"topo4d:productmeta": {"param": {"valid": True}}})),
+        json.dumps(nested("d", "raster")),
+    ]
+    response = client.post("/api/v1/items/bulk?index=1", content="\n".join(lines) + "\n")
+    assert response.status_code == 200
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert len(results) == 6
+
+    assert results[0]["valid"] and results[0]["item"]["id"] == "a"
+    # Line numbers count the blank line
+    assert results[1]["line"] == 3 and "Invalid JSON" in results[1]["error"]
+    assert results[2]["item"] is None and results[2]["errors"][0]["keyword"] == "required"
+    assert not results[3]["valid"] and results[3]["errors"][0]["keyword"] == "enum"
+    assert results[4]["valid"]
+    assert results[5]["summary"]["items"] == 5
+    assert results[5]["summary"]["invalid"] == 2
+    assert results[5]["summary"]["errors"] == 1
+
+    assert sorted(r["id"] for r in index.get_index().search(limit=10)) == ["a", "d"]
@@ -0,0 +1,84 @@
+import io
+import struct
+from pathlib import Path
+
+import pytest
+
+laspy = pytest.importorskip("laspy")
+pytest.importorskip("lazrs")
+pytest.importorskip("shapely")
+
+from topo4d_form.copc import is_copc, read_copc, read_hierarchy  # noqa: E402
+
+# 2000 points in 10 octree nodes down to level 2, written with
+# benchmarks/copc_ingest.py: write_copc(path, 2000, seed=0)
+SMALL_COPC = Path(__file__).parent / "data" / "small.copc.laz"
+
+
+def entry(level, x, y, z, offset, byte_size, point_count):
+    return struct.pack("<4iQii", level, x, y, z, offset, byte_size, point_count)
+
+
+def test_read_hierarchy_fixture():
+    with open(SMALL_COPC, "rb") as f:
+        hdr = laspy.LasHeader.read_from(f, read_evlrs=False)
+        assert is_copc(hdr)
+        info = hdr.vlrs[0]
+        nodes = read_hierarchy(f, info.hierarchy_root_offset, info.hierarchy_root_size)
+    assert len(nodes) == 10
+    assert int(nodes["point_count"].sum()) == hdr.point_count == 2000
+    assert sorted(nodes["level"].tolist()) == [0] + [1] * 8 + [2]
+    # Every node's chunk lies in the point data
+    data = nodes[nodes["point_count"] > 0]
+    assert (data["offset"] >= hdr.offset_to_point_data).all()
+    assert (data["offset"] + data["byte_size"] <= info.hierarchy_root_offset).all()
+
+
+def test_read_copc_fixture():
+    meta = read_copc(str(SMALL_COPC), depth=1)
+    assert meta["point_count"] == 2000
+    assert meta["octree"]["levels"] == [
+        {"level": 0, "nodes": 1, "points": 1949},
+        {"level": 1, "nodes": 8, "points": 50},
+        {"level": 2, "nodes": 1, "points": 1},
+    ]
+    # Only levels 0 and 1 are decoded, the same points laspy reads for them
+    with laspy.CopcReader.open(SMALL_COPC) as reader:
+        assert meta["octree"]["decoded_points"] == len(reader.query(level=range(0, 2))) == 1999
+        hdr = reader.header
+    # Widened by the decoded points, which are quantized to the scale
+    assert meta["xyz_min"] == pytest.approx(list(hdr.mins), abs=1e-3)
+    assert meta["xyz_max"] == pytest.approx(list(hdr.maxs), abs=1e-3)
+    (x0, y0, _), (x1, y1, _) = meta["xyz_min"], meta["xyz_max"]
+
+    from shapely.geometry import shape
+
+    footprint = shape(meta["footprint"])
+    minx, miny, maxx, maxy = footprint.bounds
+    assert minx >= x0 and miny >= y0 and maxx <= x1 and maxy <= y1
+    # C-shaped cloud: the footprint leaves out the hole and the gap
+    assert 0.2 < footprint.area / ((x1 - x0) * (y1 - y0)) < 0.9
+
+
+def test_read_hierarchy_child_pages():
+    # Root page at 0 with one node and a child page, which has two more nodes
+    child = entry(1, 0, 0, 0, 1000, 10, 5) + entry(1, 1, 0, 0, 1010, 10, 7)
+    root = entry(0, 0, 0, 0, 900, 100, 3) + entry(1, 0, 0, 0, 64, len(child), -1)
+    f = io.BytesIO(root + child + bytes(2000))
+    nodes = read_hierarchy(f, 0, len(root))
+    assert sorted(nodes["point_count"].tolist()) == [3, 5, 7]
+    assert sorted(nodes["level"].tolist()) == [0, 1, 1]
+
+
+@pytest.mark.parametrize(
+    "root",
+    [
+        # A page that refers back to itself
+        entry(0, 0, 0, 0, 0, 32, -1),
+        # A child page past the end of the file
+        entry(0, 0, 0, 0, 10_000, 32, -1),
+    ],
+)
+def test_read_hierarchy_malformed(root):
+    with pytest.raises(ValueError, match="COPC hierarchy"):
+        read_hierarchy(io.BytesIO(root), 0, len(root))
@@ -0,0 +1,155 @@
+import pytest
+
+from topo4d_form.jsonpatch import JsonPatchError, apply_patch, make_patch, resolve
+
+# RFC 6902, Appendix A
+RFC6902_EXAMPLES = [
+    (
+        "A.1 adding an object member",
+        {"foo": "bar"},
+        [{"op": "add", "path": "/baz", "value": "qux"}],
+        {"baz": "qux", "foo": "bar"},
+    ),
+    (
+        "A.2 adding an array element",
+        {"foo": ["bar", "baz"]},
+        [{"op": "add", "path": "/foo/1", "value": "qux"}],
+        {"foo": ["bar", "qux", "baz"]},
+    ),
+    (
+        "A.3 removing an object member",
+        {"baz": "qux", "foo": "bar"},
+        [{"op": "remove", "path": "/baz"}],
+        {"foo": "bar"},
+    ),
+    (
+        "A.4 removing an array element",
+        {"foo": ["bar", "qux", "baz"]},
+        [{"op": "remove", "path": "/foo/1"}],
+        {"foo": ["bar", "baz"]},
+    ),
+    (
+        "A.5 replacing a value",
+        {"baz": "qux", "foo": "bar"},
+        [{"op": "replace", "path": "/baz", "value": "boo"}],
+        {"baz": "boo", "foo": "bar"},
+    ),
+    (
+        "A.6 moving a value",
+        {"foo": {"bar": "baz", "waldo": "fred"}, "qux": {"corge": "grault"}},
+        [{"op": "move", "from": "/foo/waldo", "path": "/qux/thud"}],
+        {"foo": {"bar": "baz"}, "qux": {"corge": "grault", "thud": "fred"}},
+    ),
+    (
+        "A.7 moving an array element",
+        {"foo": ["all", "grass", "cows", "eat"]},
+        [{"op": "move", "from": "/foo/1", "path": "/foo/3"}],
+        {"foo": ["all", "cows", "eat", "grass"]},
+    ),
+    (
+        "A.8 testing a value: success",
+        {"baz": "qux", "foo": ["a", 2, "c"]},
+        [
+            {"op": "test", "path": "/baz", "value": "qux"},
+            {"op": "test", "path": "/foo/1", "value": 2},
+        ],
+        {"baz": "qux", "foo": ["a", 2, "c"]},
+    ),
+    (
+        "A.10 adding a nested member object",
+        {"foo": "bar"},
+        [{"op": "add", "path": "/child", "value": {"grandchild": {}}}],
+        {"foo": "bar", "child": {"grandchild": {}}},
+    ),
+    (
+        "A.11 ignoring unrecognized elements",
+        {"foo": "bar"},
+        [{"op": "add", "path": "/baz", "value": "qux", "xyz": 123}],
+        {"foo": "bar", "baz": "qux"},
+    ),
+    (
+        "A.14 ~ escape ordering",
+        {"/": 9, "~1": 10},
+        [{"op": "test", "path": "/~01", "value": 10}],
+        {"/": 9, "~1": 10},
+    ),
+    (
+        "A.16 adding an array value",
+        {"foo": ["bar"]},
+        [{"op": "add", "path": "/foo/-", "value": ["abc", "def"]}],
+        {"foo": ["bar", ["abc", "def"]]},
+    ),
+]
+
+# A.13 (a duplicate "op" member) cannot be expressed as a parsed dict
+RFC6902_ERRORS = [
+    (
+        "A.9 testing a value: error",
+        {"baz": "qux"},
+        [{"op": "test", "path": "/baz", "value": "bar"}],
+    ),
+    (
+        "A.12 adding to a nonexistent target",
+        {"foo": "bar"},
+        [{"op": "add", "path": "/baz/bat", "value": "qux"}],
+    ),
+    (
+        "A.15 comparing strings and numbers",
+        {"/": 9, "~1": 10},
+        [{"op": "test", "path": "/~01", "value": "10"}],
+    ),
+]
+
+
+@pytest.mark.parametrize("doc, patch, expected", [c[1:] for c in RFC6902_EXAMPLES], ids=[c[0] for c in RFC6902_EXAMPLES])
+def test_rfc6902_examples(doc, patch, expected):
+    original = repr(doc)
+    assert apply_patch(doc, patch) == expected
+    # The document itself is left alone
+    assert repr(doc) == original
+
+
+@pytest.mark.parametrize("doc, patch", [c[1:] for c in RFC6902_ERRORS], ids=[c[0] for c in RFC6902_ERRORS])
+def test_rfc6902_errors(doc, patch):
+    with pytest.raises(JsonPatchError):
+        apply_patch(doc, patch)
+
+
+@pytest.mark.parametrize(
+    "patch",
+    [
+        [{"op": "add", "path": 1, "value": "qux"}],
+        [{"op": "remove", "path": ["foo"]}],
+        [{"op": "test", "path": None, "value": "bar"}],
+        [{"op": "move", "from": {"path": "/foo"}, "path": "/baz"}],
+        [{"op": "copy", "from": 0, "path": "/baz"}],
+    ],
+)
+def test_non_string_pointers(patch):
+    with pytest.raises(JsonPatchError, match="Invalid JSON Pointer"):
+        apply_patch({"foo": "bar"}, patch)
+
+
+def test_resolve_escapes():
+    # RFC 6901, section 5
+    doc = {"a/b": 1, "m~n": 8, "": 0, "foo": ["bar", "baz"]}
+    assert resolve(doc, "") == doc
+    assert resolve(doc, "/a~1b") == 1
+    assert resolve(doc, "/m~0n") == 8
+    assert resolve(doc, "/") == 0
+    assert resolve(doc, "/foo/0") == "bar"
+    with pytest.raises(JsonPatchError):
+        resolve(doc, "/foo/01")
+
+
+@pytest.mark.parametrize(
+    "old, new",
+    [
+        ({"a": 1, "b": [1, 2]}, {"a": 2, "b": [1, 3], "c/d": {"e": None}}),
+        ({"a": [1, 2]}, {"a": [1, 2, 3]}),
+        ([1, {"x": "y"}], [1, {}]),
+        ({"a": 1}, {"a": 1}),
+    ],
+)
+def test_make_patch_round_trip(old, new):
+    assert apply_patch(old, make_patch(old, new)) == new
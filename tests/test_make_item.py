@@ -0,0 +1,75 @@
+import math
+
+import pytest
+
+pytest.importorskip("shapely")
+
+from topo4d_form import make_item  # noqa: E402
+from topo4d_form.make_item import compact_geometry, create_pystac_item, num_vertices  # noqa: E402
+
+
+def ring(n, cx=11.5, cy=48.1, r=0.01):
+    coords = [[cx + r * math.cos(2 * math.pi * k / n), cy + r * math.sin(2 * math.pi * k / n)] for k in range(n)]
+    return coords + [coords[0]]
+
+
+def area(geometry):
+    from shapely.geometry import shape
+
+    return shape(geometry).area
+
+
+CIRCLE = {"type": "Polygon", "coordinates": [ring(5000)]}
+
+
+@pytest.mark.parametrize("max_vertices", [1000, 100, 20])
+def test_vertex_cap(max_vertices):
+    geometry, _ = compact_geometry(CIRCLE, precision=None, max_vertices=max_vertices)
+    assert 4 <= num_vertices(geometry) <= max_vertices
+    assert area(geometry) == pytest.approx(area(CIRCLE), rel=0.05)
+
+
+def test_vertex_cap_with_holes():
+    # Every hole needs four positions, more than the budget allows
+    holes = [ring(5, 11.5 + dx, 48.1, 0.0005) for dx in (-0.005, 0.0, 0.005)]
+    polygon = {"type": "Polygon", "coordinates": [ring(500)] + holes}
+    geometry, _ = compact_geometry(polygon, precision=None, max_vertices=8)
+    assert num_vertices(geometry) <= 8
+    # The holes were filled rather than the outline cut into
+    assert len(geometry["coordinates"]) == 1
+
+
+def test_no_cap():
+    geometry, _ = compact_geometry(CIRCLE, precision=None, max_vertices=0)
+    assert geometry is CIRCLE
+
+
+def test_rounding():
+    polygon = {
+        "type": "Polygon",
+        "coordinates": [[[11.123456789, 48.0], [11.2, 48.000000049], [11.2, 48.1, 520.123456789], [11.123456789, 48.0]]],
+    }
+    bbox = [11.123456789, 48.0, 11.200000001, 48.1]
+    geometry, rounded = compact_geometry(polygon, bbox, precision=7, max_vertices=0)
+    assert geometry["coordinates"] == [
+        [[11.1234568, 48.0], [11.2, 48.0], [11.2, 48.1, 520.1234568], [11.1234568, 48.0]]
+    ]
+    # Rounded outwards, so the bbox still contains the geometry
+    assert rounded == [11.1234567, 48.0, 11.2000001, 48.1]
+    assert polygon["coordinates"][0][0] == [11.123456789, 48.0]
+
+    point, _ = compact_geometry({"type": "Point", "coordinates": [11.123456789, 48.987654321]}, precision=3)
+    assert point["coordinates"] == [11.123, 48.988]
+    geometry, rounded = compact_geometry(polygon, bbox, precision=None, max_vertices=0)
+    assert geometry is polygon and rounded is bbox
+
+
+def test_create_item_compacts_geometry():
+    geometry = {"type": "Polygon", "coordinates": [ring(5000, r=0.0123456789)]}
+    bbox = [11.4876543211, 48.0876543211, 11.5123456789, 48.1123456789]
+    item = create_pystac_item({"item_id": "circle", "datetime": "2020-01-01T00:00:00Z"}, {}, geometry=geometry, bbox=bbox)
+    assert num_vertices(item["geometry"]) <= make_item.MAX_VERTICES
+    if make_item.COORD_PRECISION is not None:
+        scale = 10 ** make_item.COORD_PRECISION
+        for x in item["bbox"] + [c for pos in item["geometry"]["coordinates"][0] for c in pos]:
+            assert round(x * scale) == pytest.approx(x * scale, abs=1e-6)
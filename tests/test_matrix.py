@@ -0,0 +1,35 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from topo4d_form.matrix import MatrixParseError, parse_matrix  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("1,2,3", [1.0, 2.0, 3.0]),
+        ("1,2,3,", [1.0, 2.0, 3.0]),
+        ("1, 2, 3, ;", [1.0, 2.0, 3.0]),
+        ("1,2,;3,4,", [[1.0, 2.0], [3.0, 4.0]]),
+        ("1,2;3,4;", [[1.0, 2.0], [3.0, 4.0]]),
+        ("", None),
+        (" ; ", None),
+    ],
+)
+def test_parse_csv(text, expected):
+    result = parse_matrix(text)
+    assert result == expected
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ("1,,3", "row 1, column 2"),
+        ("1,2;3", "row 2 has 1 values"),
+        ("1,x", "row 1, column 2: 'x' is not a number"),
+    ],
+)
+def test_parse_csv_errors(text, message):
+    with pytest.raises(MatrixParseError, match=message):
+        parse_matrix(text)
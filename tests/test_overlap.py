@@ -0,0 +1,68 @@
+import pytest
+
+pytest.importorskip("shapely")
+
+
+def box(minx, miny, maxx, maxy):
+    return {"type": "Polygon", "coordinates": [[[minx, miny], [maxx, miny], [maxx, maxy], [minx, maxy], [minx, miny]]]}
+
+
+def epoch(item_id, geometry, datetime=None):
+    return {"type": "Feature", "id": item_id, "geometry": geometry, "properties": {"datetime": datetime}}
+
+
+EPOCHS = [
+    epoch("a", box(0, 0, 2, 2), "2020-01-01T00:00:00Z"),
+    # Half of "a", the other half sticks out
+    epoch("b", box(1, 0, 3, 2), "2021-01-01T00:00:00Z"),
+    # Far from the rest
+    epoch("c", box(10, 10, 11, 11)),
+    # Not a rectangle: inside "a", and only touches "b" in a corner
+    epoch("d", {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [0, 1], [0, 0]]]}, "2022-01-01T00:00:00Z"),
+]
+
+
+@pytest.fixture
+def client():
+    from starlette.testclient import TestClient
+
+    import main
+
+    return TestClient(main.app)
+
+
+def pairs(result):
+    return {
+        (result["ids"][r], result["ids"][c]): ratio
+        for r, c, ratio in zip(result["rows"], result["cols"], result["ratio"])
+    }
+
+
+def test_overlap(client):
+    response = client.post("/api/v1/overlap", json={"type": "FeatureCollection", "features": EPOCHS})
+    assert response.status_code == 200
+    result = response.json()
+    assert pairs(result) == pytest.approx({
+        ("a", "b"): 0.5,
+        ("b", "a"): 0.5,
+        ("a", "d"): 0.125,
+        ("d", "a"): 1.0,
+    })
+    assert result["suggested_reference"] == {"a": None, "b": "a", "c": None, "d": "a"}
+    assert result["best_reference"] == "a"
+    assert result["isolated"] == ["c"]
+
+
+def test_overlap_min_ratio(client):
+    response = client.post("/api/v1/overlap", json={"items": EPOCHS, "min_ratio": 0.6})
+    result = response.json()
+    assert pairs(result) == {("d", "a"): 1.0}
+    # "a" still overlaps "d" enough, if only in one direction
+    assert result["isolated"] == ["b", "c"]
+
+
+def test_overlap_bad_request(client):
+    response = client.post("/api/v1/overlap", json={"items": EPOCHS + [epoch("a", box(5, 5, 6, 6))]})
+    assert response.status_code == 400
+    response = client.post("/api/v1/overlap", json={"items": [{"id": "x"}]})
+    assert response.status_code == 400
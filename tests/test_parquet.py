@@ -0,0 +1,101 @@
+import pytest
+
+from topo4d_form import index
+from topo4d_form.parquet import pyarrow_available, read_parquet, read_parquet_table, write_parquet
+
+needs_pyarrow = pytest.mark.skipif(not pyarrow_available(), reason="pyarrow is not installed")
+
+SQUARE = {"type": "Polygon", "coordinates": [[[11.0, 48.0], [11.1, 48.0], [11.1, 48.1], [11.0, 48.1], [11.0, 48.0]]]}
+
+
+def item(item_id, **kwargs):
+    d = {
+        "type": "Feature",
+        "stac_version": "1.1.0",
+        "stac_extensions": ["https://tum-rsa.github.io/topo4d/v0.2.0/schema.json"],
+        "id": item_id,
+        "geometry": SQUARE,
+        "bbox": [11.0, 48.0, 11.1, 48.1],
+        "properties": {
+            "datetime": "2020-01-01T00:00:00Z",
+            "topo4d:data_type": "pointcloud",
+            "topo4d:duration": 3600.0,
+            "topo4d:global_trafo": [[1.0, 0.0], [0.0, 1.0]],
+            "topo4d:trafometa": {
+                "reference_epoch": {"href": "./ref.json", "type": "application/json"},
+                "registration_error": 0.02,
+            },
+            "topo4d:productmeta": {"product_name": "DEM", "param": {"cell": 0.5}},
+        },
+        "links": [],
+        "assets": {"data": {"href": "./a.laz", "roles": ["data"]}},
+    }
+    d.update(kwargs)
+    return d
+
+
+ITEMS = [
+    item("typed"),
+    # Values that do not fit their typed columns go to the overflow columns
+    item("overflow", bbox=[11, 48, 11.1, 48.1], properties={
+        "datetime": "2020-01-01T00:00:00.5+01:00",
+        "topo4d:duration": 3600,
+        "topo4d:trafometa": {"registration_error": 0.1, "note": "extra key"},
+        "title": "Epoch",
+    }),
+    item("no-geometry", geometry=None),
+    # Geometries GEOS cannot read are kept as JSON rather than failing the row group
+    item("bad-geometry", geometry={"type": "Polygon", "coordinates": [[11.0, 48.0]]}),
+    item("unknown-geometry", geometry={"type": "Circle", "center": [11.0, 48.0]}),
+]
+
+
+@needs_pyarrow
+@pytest.mark.parametrize("row_group_size", [2, 100])
+def test_round_trip(tmp_path, row_group_size):
+    path = tmp_path / "items.parquet"
+    assert write_parquet(iter(ITEMS), path, row_group_size=row_group_size) == len(ITEMS)
+    assert read_parquet(path) == ITEMS
+
+
+@needs_pyarrow
+def test_typed_columns(tmp_path):
+    path = tmp_path / "items.parquet"
+    write_parquet(ITEMS, path)
+    table = read_parquet_table(path, ["id", "geometry", "topo4d:duration"]).to_pydict()
+    assert table["id"] == [i["id"] for i in ITEMS]
+    assert table["topo4d:duration"] == [3600.0, None, 3600.0, 3600.0, 3600.0]
+    assert [g is not None for g in table["geometry"]] == [True, True, False, False, False]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    from starlette.testclient import TestClient
+
+    import main
+
+    monkeypatch.setattr(index, "INDEX_PATH", str(tmp_path / "items.sqlite"))
+    monkeypatch.setattr(index, "_INDEX", None)
+    index.get_index().add(ITEMS[:3])
+    return TestClient(main.app)
+
+
+@needs_pyarrow
+def test_export_route(client, tmp_path):
+    path = tmp_path / "export.parquet"
+    for bbox, expected in [("10.9,47.9,11.2,48.2", ITEMS[:3]), ("0,0,1,1", [])]:
+        response = client.get("/api/v1/index/export.parquet", params={"bbox": bbox})
+        assert response.status_code == 200
+        path.write_bytes(response.content)
+        assert sorted(read_parquet(path), key=lambda i: i["id"]) == sorted(expected, key=lambda i: i["id"])
+    response = client.get("/api/v1/index/export.parquet", params={"bbox": "0,0,1"})
+    assert response.status_code == 400
+
+
+def test_export_route_without_pyarrow(client, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "pyarrow_available", lambda: False)
+    response = client.get("/api/v1/index/export.parquet")
+    assert response.status_code == 501
+    assert "pyarrow" in response.json()["error"]
@@ -0,0 +1,27 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Same list as benchmarks/startup_budget.py
+LAZY_MODULES = ("laspy", "lazrs", "pyproj", "shapely", "jsonschema", "requests", "pytz")
+
+
+def run_python(*args):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, timeout=120)
+
+
+def test_no_heavy_modules_at_startup():
+    code = f"import sys, main; print([m for m in {LAZY_MODULES!r} if m in sys.modules])"
+    out = run_python("-c", code)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip() == "[]"
+
+
+def test_startup_budget():
+    out = run_python("benchmarks/startup_budget.py")
+    report = json.loads(out.stdout)
+    assert out.returncode == 0, report["failures"]
+    assert report["eager_heavy_modules"] == []
@@ -0,0 +1,131 @@
+import pytest
+
+pytest.importorskip("jsonschema")
+
+from jsonschema import Draft7Validator  # noqa: E402
+
+from topo4d_form import validation  # noqa: E402
+
+# Shaped like a STAC extension schema: a Feature and a Collection branch,
+# discriminated by "type", with the fields in a $ref'd definition
+SCHEMA = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "oneOf": [
+        {
+            "type": "object",
+            "required": ["type", "properties"],
+            "properties": {
+                "type": {"const": "Feature"},
+                "properties": {"$ref": "#/definitions/fields"},
+            },
+        },
+        {
+            "type": "object",
+            "required": ["type"],
+            "properties": {
+                "type": {"const": "Collection"},
+                "properties": {"type": "string"},
+            },
+        },
+    ],
+    "definitions": {
+        "fields": {
+            "type": "object",
+            "required": ["topo4d:data_type"],
+            "properties": {
+                "topo4d:data_type": {"enum": ["pointcloud", "raster"]},
+                "topo4d:trafometa": {
+                    "type": "object",
+                    "required": ["reference_epoch"],
+                    "properties": {
+                        "reference_epoch": {"type": "object", "required": ["href"]},
+                        "registration_error": {"type": "number", "minimum": 0},
+                    },
+                },
+                "topo4d:duration": {"type": "number"},
+            },
+        },
+    },
+}
+
+
+@pytest.fixture(autouse=True)
+def schema(monkeypatch):
+    monkeypatch.setattr(validation, "_schema", lambda: SCHEMA)
+    monkeypatch.setattr(validation, "_validator", lambda: Draft7Validator(SCHEMA))
+
+
+def item(**props):
+    return {"type": "Feature", "properties": dict({"topo4d:data_type": "pointcloud"}, **props)}
+
+
+def test_matches_shallow_drops_other_branches():
+    feature, collection = validation._alternatives(SCHEMA)
+    assert validation._matches_shallow(feature, item())
+    assert not validation._matches_shallow(collection, item())
+    assert not validation._matches_shallow(feature, {"type": "Collection"})
+    # Enum values are checked too, but only on keys that are present
+    fields = validation._alternatives(SCHEMA["definitions"]["fields"])[0]
+    assert not validation._matches_shallow(fields, {"topo4d:data_type": "mesh"})
+    assert validation._matches_shallow(fields, {})
+    assert not validation._matches_shallow(fields, [])
+
+
+def test_subschemas_at_follows_refs():
+    doc = item(**{"topo4d:trafometa": {"registration_error": 1}})
+    alts, node = validation._subschemas_at(doc, ["properties", "topo4d:trafometa"])
+    assert node == {"registration_error": 1}
+    assert len(alts) == 1
+    assert any(s.get("required") == ["reference_epoch"] for s in alts[0])
+
+
+def test_subschemas_at_unsupported_keyword():
+    schema = dict(SCHEMA, **{"if": {"required": ["x"]}, "then": {}})
+    with pytest.MonkeyPatch.context() as m:
+        m.setattr(validation, "_schema", lambda: schema)
+        with pytest.raises(validation._UnsupportedSchema):
+            validation._subschemas_at(item(), ["properties"])
+
+
+@pytest.mark.parametrize(
+    "props, path, expected",
+    [
+        (
+            {"topo4d:trafometa": {"registration_error": -1}},
+            ["properties", "topo4d:trafometa"],
+            [
+                ("properties/topo4d:trafometa", "required"),
+                ("properties/topo4d:trafometa/registration_error", "minimum"),
+            ],
+        ),
+        ({"topo4d:trafometa": {"reference_epoch": {"href": "a.json"}}}, ["properties", "topo4d:trafometa"], []),
+        ({"topo4d:duration": "long"}, ["properties"], [("properties/topo4d:duration", "type")]),
+        ({"topo4d:data_type": "mesh"}, ["properties"], [("properties/topo4d:data_type", "enum")]),
+        ({"topo4d:duration": "long"}, [], [("properties/topo4d:duration", "type")]),
+    ],
+)
+def test_subtree_errors(props, path, expected):
+    doc = item(**props)
+    errors = validation.topo4d_subtree_errors(doc, path)
+    assert sorted((e["path"], e["keyword"]) for e in errors) == expected
+    # The rest of the item is valid, so the item is valid exactly when the subtree is
+    assert (not errors) == (not validation.topo4d_validation_errors(doc))
+
+
+def test_subtree_errors_fall_back_to_full_validation(monkeypatch):
+    schema = {
+        "type": "object",
+        "properties": {
+            "properties": {
+                "if": {"required": ["topo4d:duration"]},
+                "then": {"required": ["topo4d:data_type"]},
+                "properties": {"topo4d:duration": {"type": "number"}},
+            },
+        },
+    }
+    monkeypatch.setattr(validation, "_schema", lambda: schema)
+    monkeypatch.setattr(validation, "_validator", lambda: Draft7Validator(schema))
+    doc = {"properties": {"topo4d:duration": "long"}, "other": 1}
+    errors = validation.topo4d_subtree_errors(doc, ["properties", "topo4d:duration"])
+    assert [(e["path"], e["keyword"]) for e in errors] == [("properties/topo4d:duration", "type")]
+    assert validation.topo4d_subtree_errors(doc, ["other"]) == []
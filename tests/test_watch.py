@@ -0,0 +1,78 @@
+import json
+import os
+
+import pytest
+
+laspy = pytest.importorskip("laspy")
+
+from topo4d_form import validation, watch  # noqa: E402
+from topo4d_form.watch import CHECKPOINT_NAME, Watcher  # noqa: E402
+
+
+def write_las(path, x0=690000.0):
+    import numpy as np
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    header = laspy.LasHeader(point_format=0, version="1.2")
+    header.offsets = [x0, 5335000.0, 0.0]
+    header.scales = [0.01, 0.01, 0.01]
+    las = laspy.LasData(header)
+    las.x = x0 + np.array([0.0, 10.0, 10.0])
+    las.y = 5335000.0 + np.array([0.0, 0.0, 10.0])
+    las.z = np.zeros(3)
+    las.write(path)
+
+
+@pytest.fixture
+def ingested(monkeypatch):
+    # Files read by any watcher, in order
+    paths = []
+
+    def ingest_file(path, checksum=None):
+        paths.append(os.path.basename(path))
+        return real(path, checksum)
+
+    real = watch.ingest_file
+    monkeypatch.setattr(watch, "ingest_file", ingest_file)
+    monkeypatch.setattr(validation, "topo4d_validation_errors", lambda item: [])
+    return paths
+
+
+def run(directory, now):
+    # Two polls: the first sees new files, the second queues the settled ones
+    watcher = Watcher(str(directory), settle=0, workers=2, index=False)
+    try:
+        watcher.poll(now)
+        return watcher.poll(now + 1)
+    finally:
+        watcher.close()
+
+
+def test_restart_from_checkpoint(tmp_path, ingested):
+    write_las(tmp_path / "a.las")
+    write_las(tmp_path / "site" / "b.las")
+    assert run(tmp_path, 0) == 2
+    assert sorted(ingested) == ["a.las", "b.las"]
+    items = tmp_path / "items"
+    assert sorted(os.listdir(items)) == ["a.json", "site_b.json", CHECKPOINT_NAME]
+
+    # A record cut short by a crash is skipped when the checkpoint is loaded
+    with open(items / CHECKPOINT_NAME, "a") as f:
+        f.write('{"file": "a.las", "si')
+    assert run(tmp_path, 10) == 0
+    assert len(ingested) == 2
+
+    # Only changed and new files are handled after a restart
+    write_las(tmp_path / "a.las", x0=690100.0)
+    write_las(tmp_path / "c.las")
+    assert run(tmp_path, 20) == 2
+    assert sorted(ingested[2:]) == ["a.las", "c.las"]
+    assert run(tmp_path, 30) == 0
+    assert len(ingested) == 4
+
+    with open(items / CHECKPOINT_NAME) as f:
+        records = [json.loads(line) for line in f if line.endswith("}\n")]
+    assert [r["file"] for r in records].count("a.las") == 2
+    assert all(r["valid"] for r in records)
+    with open(items / "a.json") as f:
+        assert json.load(f)["bbox"][0] == pytest.approx(690100.0)
@@ -1 +1,3 @@
-TOPO4D_SCHEMA_URL = "https://tum-rsa.github.io/topo4d/v0.2.0/schema.json"
\ No newline at end of file
+TOPO4D_SCHEMA_URL = "https://tum-rsa.github.io/topo4d/v0.2.0/schema.json"
+# Id of items built without an item id; such items are not indexed
+DEFAULT_ITEM_ID = "item"
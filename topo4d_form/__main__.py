@@ -0,0 +1,110 @@
+"""Command line interface: ``python -m topo4d_form watch <dir>`` and ``python -m topo4d_form fetch-schema``."""
+
+import argparse
+import json
+import logging
+import signal
+import sys
+import threading
+
+
+def serve_metrics(port: int):
+    """Serve ``render_metrics`` on ``GET /metrics`` at ``port`` from a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    from .metrics import render_metrics
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = render_metrics().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def watch(args) -> int:
+    from .watch import Watcher
+
+    form = {}
+    if args.form:
+        with open(args.form, "r", encoding="utf-8") as f:
+            form = json.load(f)
+    watcher = Watcher(
+        args.directory,
+        out_dir=args.out,
+        form=form,
+        settle=args.settle,
+        workers=args.workers,
+        checksum=not args.no_checksum,
+        index=not args.no_index,
+    )
+    if args.once:
+        # Settle against the current state, then handle whatever is complete
+        watcher.settle = 0
+        watcher.poll()
+        watcher.poll()
+        watcher.close()
+        return 0
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    watcher.run(args.interval, stop)
+    # Let items in processing finish, so they reach the checkpoint
+    watcher.close()
+    return 0
+
+
+def fetch_schema(args) -> int:
+    from .validation import SCHEMA_PATH, fetch_schema
+
+    path = args.out or SCHEMA_PATH
+    fetch_schema(path)
+    print(f"Wrote {path}")
+    return 0
+
+
+def main(argv=None) -> int:
+    from .watch import WATCH_INTERVAL, WATCH_SETTLE, WATCH_WORKERS
+
+    parser = argparse.ArgumentParser(prog="python -m topo4d_form")
+    commands = parser.add_subparsers(dest="command", required=True)
+    p = commands.add_parser("watch", help="build items for LAS/LAZ epochs as they land in a directory")
+    p.add_argument("directory")
+    p.add_argument("--out", help="directory for items and the checkpoint (default: <directory>/items)")
+    p.add_argument("--form", help="JSON file of form inputs shared by all items (as for POST /api/v1/items)")
+    p.add_argument("--interval", type=float, default=WATCH_INTERVAL, help="seconds between scans")
+    p.add_argument("--settle", type=float, default=WATCH_SETTLE,
+                   help="seconds a file must stay unchanged before it is read")
+    p.add_argument("--workers", type=int, default=WATCH_WORKERS)
+    p.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this port")
+    p.add_argument("--no-checksum", action="store_true", help="skip file:checksum")
+    p.add_argument("--no-index", action="store_true", help="do not add items to the item index")
+    p.add_argument("--once", action="store_true", help="handle the files present now and exit")
+    p = commands.add_parser("fetch-schema", help="download the topo4d schema for offline validation")
+    p.add_argument("--out", help="where to write it (default: TOPO4D_SCHEMA_PATH or topo4d_form/schema.json)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.command == "watch":
+        return watch(args)
+    if args.command == "fetch-schema":
+        return fetch_schema(args)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
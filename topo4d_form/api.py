@@ -0,0 +1,68 @@
+from typing import Any, Dict, List, Optional
+
+import pystac
+
+from .make_item import build_item, create_pystac_item
+from .validation import topo4d_validation_errors
+
+
+def is_nested_item(payload: Dict[str, Any]) -> bool:
+    """True if ``payload`` is a (partial) STAC Item rather than flat form input."""
+    return payload.get("type") == "Feature" or isinstance(payload.get("properties"), dict)
+
+
+def build_item_from_payload(payload: Dict[str, Any], errors: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Build a STAC Item dict from a flat ``stac_format_d`` payload or nested topo4d JSON.
+
+    Flat payloads go through ``build_item`` exactly like the form, uploaded
+    ``file_assets`` included. For nested items every property is kept as given and the assets are
+    read with ``pystac.Asset.from_dict``. Field parsing errors of flat
+    payloads are appended to ``errors`` if given.
+    """
+    if not is_nested_item(payload):
+        return build_item(payload, errors)
+    props = dict(payload.get("properties") or {})
+    if payload.get("id"):
+        props["item_id"] = payload["id"]
+    assets = {
+        key: pystac.Asset.from_dict(asset)
+        for key, asset in (payload.get("assets") or {}).items()
+    }
+    return create_pystac_item(
+        props,
+        assets,
+        geometry=payload.get("geometry"),
+        bbox=payload.get("bbox"),
+    )
+
+
+def datetime_errors(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Errors for a payload without a usable ``datetime``, which no item can be built without."""
+    from dateutil.parser import parse as parse_dt
+
+    props = payload.get("properties") if is_nested_item(payload) else payload
+    value = props.get("datetime") if isinstance(props, dict) else None
+    path = "properties/datetime"
+    if value is None or value == "":
+        return [{"path": path, "message": "'datetime' is a required property", "keyword": "required"}]
+    if not isinstance(value, str):
+        return [{"path": path, "message": f"{value!r} is not of type 'string'", "keyword": "type"}]
+    try:
+        parse_dt(value)
+    except (ValueError, OverflowError):
+        return [{"path": path, "message": f"{value!r} is not a 'date-time'", "keyword": "format"}]
+    return []
+
+
+def build_and_validate(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Build an item from ``payload`` and validate it against the topo4d schema.
+
+    Returns ``{"item": ..., "valid": bool, "errors": [{"path", "message", "keyword"}]}``;
+    ``item`` is None if the payload has no usable ``datetime``.
+    """
+    errors = datetime_errors(payload)
+    if errors:
+        return {"item": None, "valid": False, "errors": errors}
+    item = build_item_from_payload(payload, errors)
+    errors += topo4d_validation_errors(item)
+    return {"item": item, "valid": not errors, "errors": errors}
@@ -0,0 +1,205 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .api import build_and_validate
+from .index import get_index
+
+# Payload lines are shipped to the workers in batches so per-task IPC
+# overhead stays small compared to the build/validate work.
+BATCH_SIZE = 64
+
+_POOL: Optional[ProcessPoolExecutor] = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Process pool shared by bulk requests, created on first use."""
+    global _POOL
+    if _POOL is None:
+        import multiprocessing
+
+        # Spawned rather than forked, as the app runs threads of its own
+        _POOL = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn"))
+    return _POOL
+
+
+def _default_max_in_flight() -> int:
+    return 2 * (os.cpu_count() or 1)
+
+
+def _build_line(n: int, line: str) -> Dict[str, Any]:
+    try:
+        payload = json.loads(line)
+    except ValueError as e:
+        return {"line": n, "error": f"Invalid JSON: {e}"}
+    if not isinstance(payload, dict):
+        return {"line": n, "error": "Expected a JSON object."}
+    try:
+        return build_and_validate(payload)
+    except Exception as e:
+        # Any payload that cannot be built (e.g. pystac's STACError for a
+        # missing datetime) fails its own line, never the whole stream
+        return {"line": n, "error": f"Failed to build item: {e}"}
+
+
+def build_batch(batch: List[Tuple[int, str]]) -> List[Tuple[str, Optional[bool]]]:
+    """Worker entry point: build and validate a batch of ``(line number, NDJSON line)``.
+
+    Returns one ``(serialized result line, valid)`` pair per input line, with
+    ``valid`` None for lines that failed to build.
+    """
+    out = []
+    for n, line in batch:
+        result = _build_line(n, line)
+        out.append((json.dumps(result), result.get("valid") if "error" not in result else None))
+    return out
+
+
+class BulkStats:
+    """Running counts for a bulk run, reported as the final NDJSON record."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.items = 0
+        self.invalid = 0
+        self.errors = 0
+
+    def add(self, valid: Optional[bool]):
+        self.items += 1
+        if valid is None:
+            self.errors += 1
+        elif not valid:
+            self.invalid += 1
+
+    def summary(self) -> str:
+        seconds = time.perf_counter() - self.start
+        return json.dumps(
+            {
+                "summary": {
+                    "items": self.items,
+                    "invalid": self.invalid,
+                    "errors": self.errors,
+                    "seconds": round(seconds, 3),
+                    "items_per_sec": round(self.items / seconds, 1) if seconds else None,
+                }
+            }
+        )
+
+
+def index_results(results: List[Tuple[str, Optional[bool]]]) -> int:
+    """Add the valid items among ``build_batch`` results to the local item index."""
+    index = get_index()
+    if index is None:
+        return 0
+    items = [json.loads(line)["item"] for line, valid in results if valid]
+    return index.add(items)
+
+
+def _iter_batches(lines: Iterable[str], size: int) -> Iterator[List[Tuple[int, str]]]:
+    batch: List[Tuple[int, str]] = []
+    for n, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        batch.append((n, line))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_bulk_results(
+    lines: Iterable[str],
+    max_in_flight: Optional[int] = None,
+    pool: Optional[ProcessPoolExecutor] = None,
+    index: bool = False,
+) -> Iterator[str]:
+    """Build and validate an NDJSON stream of item payloads in a process pool.
+
+    Each non-empty input line yields one result line (in input order) with the
+    same shape as ``build_and_validate`` or ``{"line": n, "error": ...}``
+    (``n`` counting from 1, blank lines included), followed by a
+    final ``{"summary": ...}`` line with counts and items/sec. At most
+    ``max_in_flight`` batches are queued at once, so memory stays flat no
+    matter how long the input is. With ``index``, valid items are added to
+    the local item index as their batches complete.
+    """
+    pool = pool or get_pool()
+    max_in_flight = max_in_flight or _default_max_in_flight()
+    stats = BulkStats()
+    pending = deque()
+
+    def drain(n):
+        while len(pending) > n:
+            outs = pending.popleft().result()
+            if index:
+                index_results(outs)
+            for out, valid in outs:
+                stats.add(valid)
+                yield out
+
+    for batch in _iter_batches(lines, BATCH_SIZE):
+        pending.append(pool.submit(build_batch, batch))
+        yield from drain(max_in_flight - 1)
+    yield from drain(0)
+    yield stats.summary()
+
+
+async def _aiter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    buf = b""
+    async for chunk in chunks:
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8")
+    if buf:
+        yield buf.decode("utf-8")
+
+
+async def aiter_bulk_results(
+    chunks: AsyncIterator[bytes],
+    max_in_flight: Optional[int] = None,
+    pool: Optional[ProcessPoolExecutor] = None,
+    index: bool = False,
+) -> AsyncIterator[str]:
+    """Async variant of ``iter_bulk_results`` reading raw request body chunks.
+
+    Yields newline-terminated result lines, suitable for a streaming response.
+    """
+    loop = asyncio.get_running_loop()
+    pool = pool or get_pool()
+    max_in_flight = max_in_flight or _default_max_in_flight()
+    stats = BulkStats()
+    pending = deque()
+    batch: List[Tuple[int, str]] = []
+    n = 0
+
+    async def drain(n):
+        while len(pending) > n:
+            outs = await pending.popleft()
+            if index:
+                await loop.run_in_executor(None, index_results, outs)
+            for out, valid in outs:
+                stats.add(valid)
+                yield out + "\n"
+
+    async for line in _aiter_lines(chunks):
+        # Line numbers count blank lines, as in _iter_batches
+        n += 1
+        if not line.strip():
+            continue
+        batch.append((n, line))
+        if len(batch) >= BATCH_SIZE:
+            pending.append(loop.run_in_executor(pool, build_batch, batch))
+            batch = []
+            async for out in drain(max_in_flight - 1):
+                yield out
+    if batch:
+        pending.append(loop.run_in_executor(pool, build_batch, batch))
+    async for out in drain(0):
+        yield out
+    yield stats.summary() + "\n"
@@ -0,0 +1,235 @@
+import os
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+# Cloud Optimized Point Clouds (COPC) are LAZ 1.4 files whose points are
+# stored by octree node, one LAZ chunk per node, with the node hierarchy in
+# an EVLR. Point counts, extent and footprint come from the hierarchy and the
+# top levels of the octree, without decoding the whole file.
+
+# Deepest octree level decoded for the footprint (the root is level 0). Each
+# level halves the point spacing and the footprint cell size and decodes
+# about four times as many points.
+COPC_DEPTH = int(os.environ.get("TOPO4D_COPC_DEPTH", "1"))
+# Rows and columns of the footprint grid at most; files with a tiny point
+# spacing get coarser cells rather than a grid of gigabytes
+MAX_GRID_SIZE = 2048
+
+
+def is_copc(hdr: Any) -> bool:
+    """True if a laspy header belongs to a COPC file (COPC info as first VLR)."""
+    vlrs = getattr(hdr, "vlrs", None) or []
+    return bool(vlrs) and getattr(vlrs[0], "user_id", None) == "copc" and getattr(vlrs[0], "record_id", None) == 1
+
+
+def footprint_cell_size(spacing: float, depth: int) -> float:
+    """Footprint grid cell for octree levels ``0..depth`` of a COPC with root ``spacing``.
+
+    Twice the point spacing at ``depth``, so each cell the cloud covers holds
+    a few points.
+    """
+    return 2 * spacing / 2**depth
+
+
+def occupancy_grid(x, y, origin: List[float], cell: float, shape: Tuple[int, int], grid=None):
+    """Mark the ``cell`` sized squares of a grid anchored at ``origin`` that hold any of the points.
+
+    ``grid`` is a boolean ``(rows, cols)`` array (rows along y); pass the
+    previous result to accumulate points chunk by chunk.
+    """
+    import numpy as np
+
+    if grid is None:
+        grid = np.zeros(shape, dtype=bool)
+    ix = np.clip(np.floor((np.asarray(x) - origin[0]) / cell).astype(np.int64), 0, shape[1] - 1)
+    iy = np.clip(np.floor((np.asarray(y) - origin[1]) / cell).astype(np.int64), 0, shape[0] - 1)
+    grid[iy, ix] = True
+    return grid
+
+
+def _close(grid):
+    """Morphological closing with a 3x3 square: fills gaps of one cell, never drops a cell."""
+    import numpy as np
+
+    rows, cols = grid.shape
+    padded = np.pad(grid, 1)
+    dilated = np.zeros_like(grid)
+    for dy in range(3):
+        for dx in range(3):
+            dilated |= padded[dy : dy + rows, dx : dx + cols]
+    # Outside the grid counts as occupied, so cells on the border stay
+    padded = np.pad(dilated, 1, constant_values=True)
+    closed = np.ones_like(grid)
+    for dy in range(3):
+        for dx in range(3):
+            closed &= padded[dy : dy + rows, dx : dx + cols]
+    return closed
+
+
+def grid_footprint(grid, origin: List[float], cell: float):
+    """Polygon covering the occupied cells of ``grid``, with gaps of one cell filled.
+
+    Runs of occupied cells along each row become rectangles, so the union
+    handles a few per row instead of one square per cell. The staircase is
+    then simplified within half a cell.
+    """
+    import numpy as np
+    import shapely
+
+    if not grid.any():
+        return shapely.Polygon()
+    edges = np.diff(np.pad(_close(grid), ((0, 0), (1, 1))).astype(np.int8), axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    x0, y0 = origin[0] + starts * cell, origin[1] + rows * cell
+    runs = shapely.box(x0, y0, origin[0] + ends * cell, y0 + cell)
+    return shapely.simplify(shapely.union_all(runs), cell / 2)
+
+
+def grid_cell_size(halfsize: float, cell: float, points: Optional[int] = None) -> float:
+    """``cell``, coarsened if needed so the grid over a cube of ``halfsize`` fits ``MAX_GRID_SIZE``.
+
+    With ``points``, the grid also gets no more cells than points: a cell
+    finer than the decoded points support (e.g. from a bogus spacing) only
+    speckles the footprint and makes it slow to trace.
+    """
+    import math
+
+    if not (math.isfinite(halfsize) and halfsize > 0):
+        raise ValueError(f"Invalid COPC octree halfsize {halfsize!r}")
+    if not (math.isfinite(cell) and cell > 0):
+        cell = 0.0
+    size = MAX_GRID_SIZE if points is None else min(MAX_GRID_SIZE, max(1, math.isqrt(points)))
+    return max(cell, 2 * halfsize / size)
+
+
+def grid_shape(halfsize: float, cell: float) -> Tuple[int, int]:
+    """Rows and columns of the footprint grid over an octree cube of ``halfsize``.
+
+    Raises ValueError past ``MAX_GRID_SIZE``; see ``grid_cell_size``.
+    """
+    import math
+
+    n = max(1, math.ceil(2 * halfsize / cell))
+    if n > MAX_GRID_SIZE:
+        raise ValueError(f"Footprint grid of {n}x{n} cells exceeds {MAX_GRID_SIZE}x{MAX_GRID_SIZE}")
+    return n, n
+
+
+# One hierarchy entry: VoxelKey (level, x, y, z), then offset and size of the
+# node's LAZ chunk and its point count (-1: offset and size of a child page)
+_ENTRY_DTYPE = [
+    ("level", "<i4"), ("x", "<i4"), ("y", "<i4"), ("z", "<i4"),
+    ("offset", "<u8"), ("byte_size", "<i4"), ("point_count", "<i4"),
+]
+
+
+def read_hierarchy(f: BinaryIO, offset: int, size: int):
+    """All node entries of a COPC hierarchy as a NumPy structured array.
+
+    Starts from the root page at ``offset``/``size`` (from the COPC info VLR)
+    and follows every child page. Raises ValueError if a page is referenced
+    twice or the pages add up to more than the file, as a malformed file
+    could otherwise be read forever.
+    """
+    import numpy as np
+
+    dtype = np.dtype(_ENTRY_DTYPE)
+    file_size = f.seek(0, os.SEEK_END)
+    nodes, pages = [], [(offset, size)]
+    visited, total = set(), 0
+    while pages:
+        offset, size = pages.pop()
+        if (offset, size) in visited:
+            raise ValueError(f"COPC hierarchy page at {offset} is referenced more than once")
+        visited.add((offset, size))
+        total += size
+        if size < 0 or offset + size > file_size or total > file_size:
+            raise ValueError("COPC hierarchy pages exceed the file")
+        f.seek(offset)
+        page = np.frombuffer(f.read(size), dtype=dtype)
+        child = page["point_count"] == -1
+        pages.extend(zip(page["offset"][child].tolist(), page["byte_size"][child].tolist()))
+        nodes.append(page[~child])
+    return np.concatenate(nodes) if nodes else np.zeros(0, dtype=dtype)
+
+
+def _decode_xy(f: BinaryIO, hdr: Any, nodes):
+    """Decompress the XY of the points of ``nodes`` (hierarchy entries) from ``f``."""
+    import laspy  # type: ignore
+    import lazrs  # type: ignore
+    import numpy as np
+
+    nodes = np.sort(nodes[nodes["point_count"] > 0], order="offset")
+    compressed = bytearray(int(nodes["byte_size"].sum()))
+    view, pos = memoryview(compressed), 0
+    for offset, size in zip(nodes["offset"].tolist(), nodes["byte_size"].tolist()):
+        f.seek(offset)
+        f.readinto(view[pos : pos + size])
+        pos += size
+    fmt = hdr.point_format
+    raw = np.zeros(int(nodes["point_count"].sum()) * fmt.size, dtype=np.uint8)
+    if len(raw):
+        lazrs.decompress_points_with_chunk_table(
+            compressed,
+            hdr.vlrs.get("LasZipVlr")[0].record_data,
+            raw,
+            list(zip(nodes["point_count"].tolist(), nodes["byte_size"].tolist())),
+            laspy.DecompressionSelection.xy_returns_channel().to_lazrs(),
+        )
+    points = laspy.PackedPointRecord.from_buffer(raw, fmt)
+    return points["X"] * hdr.scales[0] + hdr.offsets[0], points["Y"] * hdr.scales[1] + hdr.offsets[1]
+
+
+def read_copc(path: str, depth: int = COPC_DEPTH) -> Dict[str, Any]:
+    """Point counts, extent and footprint of a local COPC file from its octree.
+
+    Reads all hierarchy pages (no point data) for the point count of every
+    node, then decompresses only the nodes of levels ``0..depth`` (XY only)
+    for an occupancy footprint in the file's CRS. The footprint is clipped to
+    the header bounds, widened by the decoded points in case the header is
+    stale.
+
+    Returns ``{"point_count", "xyz_min", "xyz_max", "footprint", "octree"}``
+    to update a ``header_meta`` dict with; ``octree`` has the per-level node
+    and point counts.
+    """
+    import laspy  # type: ignore
+    import numpy as np
+    import shapely
+
+    with open(path, "rb") as f:
+        hdr = laspy.LasHeader.read_from(f, read_evlrs=False)
+        if not is_copc(hdr):
+            raise ValueError(f"{os.path.basename(path)} is not a COPC file")
+        info = hdr.vlrs[0]
+        nodes = read_hierarchy(f, info.hierarchy_root_offset, info.hierarchy_root_size)
+        x, y = _decode_xy(f, hdr, nodes[nodes["level"] <= depth])
+
+    counts = np.bincount(nodes["level"], weights=nodes["point_count"]).astype(np.int64)
+    num_nodes = np.bincount(nodes["level"], minlength=len(counts))
+    mins, maxs = [float(v) for v in hdr.mins], [float(v) for v in hdr.maxs]
+    if len(x):
+        mins[:2] = min(mins[0], float(x.min())), min(mins[1], float(y.min()))
+        maxs[:2] = max(maxs[0], float(x.max())), max(maxs[1], float(y.max()))
+    cell = grid_cell_size(info.halfsize, footprint_cell_size(info.spacing, depth), len(x))
+    origin = [float(info.center[0] - info.halfsize), float(info.center[1] - info.halfsize)]
+    grid = occupancy_grid(x, y, origin, cell, grid_shape(info.halfsize, cell))
+    footprint = grid_footprint(grid, origin, cell)
+    footprint = shapely.clip_by_rect(footprint, mins[0], mins[1], maxs[0], maxs[1])
+    return {
+        "point_count": int(counts.sum()),
+        "xyz_min": mins,
+        "xyz_max": maxs,
+        "footprint": shapely.geometry.mapping(footprint) if not footprint.is_empty else None,
+        "octree": {
+            "depth": depth,
+            "spacing": float(info.spacing),
+            "cell_size": cell,
+            "decoded_points": len(x),
+            "levels": [
+                {"level": level, "nodes": int(num_nodes[level]), "points": int(counts[level])}
+                for level in range(len(counts))
+                if num_nodes[level]
+            ],
+        },
+    }
@@ -0,0 +1,306 @@
+import json
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .matrix import MATRIX_FIELDS, MatrixParseError, parse_matrix
+
+# Every form field in one place: its input name, where its value goes in the
+# item properties (its path in the topo4d schema), how it is parsed and how it
+# is rendered. Parsing form inputs into properties, the inverse mapping, the
+# required markers and the form itself are all derived from this table, and
+# the per-field parsers are built once at import.
+
+TRAFOMETA = "topo4d:trafometa"
+PRODUCTMETA = "topo4d:productmeta"
+REL_KEYS = ("href", "type", "title")
+
+
+class Field(NamedTuple):
+    name: str
+    # Property path, e.g. ("topo4d:trafometa", "registration_error")
+    path: Tuple[str, ...]
+    # str, float, matrix, json, rel, or rel_or_str (a rel object or, for
+    # older items, a plain string)
+    kind: str = "str"
+    # Fields without a label are not in the form (API and uploads only)
+    label: Optional[str] = None
+    select: bool = False
+    options: Tuple[str, ...] = ()
+    placeholder: Optional[str] = None
+    default: Any = ""
+    required: bool = False
+    # rel: autocomplete the href from the local item index
+    suggest: bool = False
+
+
+_MATRIX_PLACEHOLDER = "e.g. 1,0,0,0;0,1,0,0;0,0,1,0;0,0,0,1"
+
+# In form order; properties are built in this order too
+FIELDS: Tuple[Field, ...] = (
+    Field("item_id", ("item_id",), label="Item Name", placeholder="Identifier for this STAC Item"),
+    Field(
+        "datetime",
+        ("datetime",),
+        label="Datetime (ISO8601)",
+        placeholder="e.g. 2024-01-01T00:00:00Z",
+        required=True,
+    ),
+    Field(
+        "topo4d_data_type",
+        ("topo4d:data_type",),
+        label="Data Type",
+        select=True,
+        options=("pointcloud", "raster", "mesh", "vector", "text", "other"),
+        required=True,
+    ),
+    # Options are the IANA timezones, filled in when the form is rendered
+    Field("topo4d_timezone", ("topo4d:timezone",), label="Timezone", select=True, default=None),
+    Field(
+        "topo4d_acquisition_mode",
+        ("topo4d:acquisition_mode",),
+        label="Acquisition Mode",
+        placeholder="e.g. ULS, TLS, UPH",
+    ),
+    Field("topo4d_duration", ("topo4d:duration",), "float", "Duration [seconds]"),
+    Field("topo4d_spatial_resolution", ("topo4d:spatial_resolution",), "float", "Spatial Resolution [m]"),
+    Field("topo4d_positional_accuracy", ("topo4d:positional_accuracy",), "float", "Positional Accuracy [m]"),
+    Field(
+        "topo4d_orientation",
+        ("topo4d:orientation",),
+        label="Orientation",
+        placeholder="Survey pattern: Nadir, Oblique, Nadir+Oblique",
+    ),
+    Field(
+        "topo4d_global_trafo",
+        ("topo4d:global_trafo",),
+        "matrix",
+        "Global Transformation (rows by semicolon, values by comma)",
+        placeholder=_MATRIX_PLACEHOLDER,
+    ),
+    Field(
+        "trafometa_reference_epoch",
+        (TRAFOMETA, "reference_epoch"),
+        "rel",
+        "Reference Epoch (Relation/Object)",
+        required=True,
+        suggest=True,
+    ),
+    Field("trafometa_registration_error", (TRAFOMETA, "registration_error"), "float", "Registration Error [m]"),
+    Field(
+        "trafometa_transformation",
+        (TRAFOMETA, "transformation"),
+        "matrix",
+        "Transformation (rows by semicolon, values by comma)",
+        placeholder=_MATRIX_PLACEHOLDER,
+    ),
+    Field("trafometa_affine_transformation", (TRAFOMETA, "affine_transformation"), "matrix"),
+    Field("trafometa_rotation", (TRAFOMETA, "rotation"), "matrix"),
+    Field("trafometa_translation", (TRAFOMETA, "translation"), "matrix"),
+    Field("trafometa_reduction_point", (TRAFOMETA, "reduction_point"), "matrix"),
+    Field("productmeta_product_name", (PRODUCTMETA, "product_name"), label="Product Name"),
+    Field(
+        "productmeta_derived_from",
+        (PRODUCTMETA, "derived_from"),
+        "rel_or_str",
+        "Derived From (Relation/Object)",
+        suggest=True,
+    ),
+    Field("productmeta_product_level", (PRODUCTMETA, "product_level"), label="Product Level"),
+    Field(
+        "productmeta_param",
+        (PRODUCTMETA, "param"),
+        "json",
+        "Param (JSON object)",
+        placeholder='e.g. {"key": "value"}',
+    ),
+)
+
+FIELDS_BY_NAME: Dict[str, Field] = {f.name: f for f in FIELDS}
+
+# Form section headings, shown before the first field of each nested object
+SECTIONS = {
+    TRAFOMETA: "Transformation Metadata (trafometa)",
+    PRODUCTMETA: "Product Metadata (productmeta)",
+}
+
+Errors = Optional[List[Dict[str, Any]]]
+
+
+# Parsers get non-empty values (rel parsers the whole input dict) and return
+# None for values to leave out. Strings are taken as they are.
+
+
+def _float_parser(field: Field) -> Callable[[Any, Errors], Any]:
+    def parse(v, errors):
+        try:
+            return float(v)
+        except (TypeError, ValueError):
+            return None
+
+    return parse
+
+
+# Matrix text up to this length is memoized: live preview posts the whole
+# form on every keystroke, mostly with the same matrices as before
+_MEMO_TEXT = 512
+
+
+@lru_cache(maxsize=256)
+def _parse_matrix_text(text: str, shape) -> Tuple[Any, Optional[str]]:
+    # (rows as tuples, None) or (None, error message); tuples so the cached
+    # value cannot be changed through a returned item
+    try:
+        m = parse_matrix(text, shape)
+    except MatrixParseError as e:
+        return None, str(e)
+    if m is None or not m or not isinstance(m[0], list):
+        return (tuple(m) if m else m), None
+    return tuple(map(tuple, m)), None
+
+
+def _matrix_parser(field: Field) -> Callable[[Any, Errors], Any]:
+    shape = MATRIX_FIELDS[field.name]
+    path = "properties/" + "/".join(field.path)
+
+    def parse(v, errors):
+        if isinstance(v, str) and len(v) <= _MEMO_TEXT:
+            m, message = _parse_matrix_text(v, shape)
+            if message is None:
+                if m and isinstance(m[0], tuple):
+                    return list(map(list, m))
+                return list(m) if m is not None else None
+        else:
+            try:
+                return parse_matrix(v, shape)
+            except MatrixParseError as e:
+                message = str(e)
+        if errors is not None:
+            errors.append({"path": path, "message": f"{field.name}: {message}", "keyword": "shape"})
+        return None
+
+    return parse
+
+
+def _json_parser(field: Field) -> Callable[[Any, Errors], Any]:
+    # A JSON object in string form
+    def parse(v, errors):
+        try:
+            obj = json.loads(v)
+        except Exception:
+            return None
+        return obj if isinstance(obj, dict) else None
+
+    return parse
+
+
+def _rel_parser(field: Field) -> Callable[[Any, Errors], Any]:
+    # Gets the whole input dict: a dict at the field name wins over the flat
+    # relObjectTemplate inputs "<name>_href", "<name>_type" and "<name>_title"
+    or_str = field.kind == "rel_or_str"
+    flat = [(k, f"{field.name}_{k}") for k in REL_KEYS]
+
+    def parse(d, errors):
+        obj = d.get(field.name)
+        if isinstance(obj, dict):
+            rel = {k: obj[k] for k in REL_KEYS if obj.get(k) not in (None, "")}
+        else:
+            rel = {k: d[key] for k, key in flat if d.get(key) not in (None, "")}
+        if rel:
+            return rel
+        if or_str and isinstance(obj, str) and obj:
+            return obj
+        return None
+
+    return parse
+
+
+_PARSERS = {
+    "float": _float_parser,
+    "matrix": _matrix_parser,
+    "json": _json_parser,
+    "rel": _rel_parser,
+    "rel_or_str": _rel_parser,
+}
+
+# Per field: input name, property keys (inner is None for top-level
+# properties), parser (None for strings) and whether it reads several inputs
+_PLAN = [
+    (
+        f.name,
+        f.path[0],
+        f.path[1] if len(f.path) > 1 else None,
+        _PARSERS[f.kind](f) if f.kind != "str" else None,
+        f.kind.startswith("rel"),
+    )
+    for f in FIELDS
+]
+
+
+def parse_fields(d: Dict[str, Any], errors: Errors = None) -> Dict[str, Any]:
+    """Item properties from flat form inputs.
+
+    Runs the precompiled parser of each field in ``FIELDS`` order with one
+    lookup per input; inputs that are not fields are never looked at. Empty
+    and unparsable values are left out; matrix shape errors are appended to
+    ``errors`` if given.
+    """
+    props: Dict[str, Any] = {}
+    for name, outer, inner, parse, multi in _PLAN:
+        if multi:
+            v = parse(d, errors)
+            if v is None:
+                continue
+        else:
+            v = d.get(name)
+            if v is None or v == "":
+                continue
+            if parse is not None:
+                v = parse(v, errors)
+                if v is None:
+                    continue
+        if inner is None:
+            props[outer] = v
+        elif outer in props:
+            props[outer][inner] = v
+        else:
+            props[outer] = {inner: v}
+    return props
+
+
+def format_matrix(val: Any) -> str:
+    """Inverse of ``parse_matrix`` for form inputs: rows by semicolon, values by comma."""
+    if isinstance(val, list) and val and isinstance(val[0], list):
+        return ";".join(",".join(str(x) for x in row) for row in val)
+    if isinstance(val, list):
+        return ",".join(str(x) for x in val)
+    return str(val)
+
+
+def field_inputs(props: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverse of ``parse_fields``: flat form inputs from item properties.
+
+    Values are rendered the way the form submits them (numbers and matrices
+    as strings). ``item_id`` is not a property and is left to the caller.
+    """
+    out: Dict[str, Any] = {}
+    for field in FIELDS:
+        if field.name == "item_id":
+            continue
+        v = props.get(field.path[0])
+        if len(field.path) > 1:
+            v = (v or {}).get(field.path[1])
+        if v is None:
+            continue
+        if field.kind == "float":
+            out[field.name] = str(v)
+        elif field.kind == "matrix":
+            out[field.name] = format_matrix(v)
+        elif field.kind == "json":
+            out[field.name] = json.dumps(v)
+        elif field.kind.startswith("rel") and isinstance(v, dict):
+            for k in REL_KEYS:
+                if v.get(k) is not None:
+                    out[f"{field.name}_{k}"] = v[k]
+        elif field.kind != "rel":
+            out[field.name] = v
+    return out
@@ -0,0 +1,343 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from . import DEFAULT_ITEM_ID
+from .metrics import span
+
+# Local index of generated items, for spatio-temporal search and href
+# autocompletion, kept with the schema cache rather than in the working
+# directory. Set TOPO4D_INDEX_PATH to an empty string to turn it off.
+INDEX_PATH = os.environ.get(
+    "TOPO4D_INDEX_PATH",
+    os.path.join(
+        os.environ.get("TOPO4D_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "topo4d_form")),
+        "items.sqlite",
+    ),
+)
+
+# Open ends of a time window
+_FAR = float("inf")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    href TEXT NOT NULL,
+    title TEXT,
+    t_start REAL,
+    t_end REAL,
+    minx REAL, miny REAL, maxx REAL, maxy REAL,
+    item TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_t_start ON items (t_start);
+CREATE INDEX IF NOT EXISTS items_href ON items (href);
+CREATE VIRTUAL TABLE IF NOT EXISTS items_rtree USING rtree (id, minx, maxx, miny, maxy);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL);
+"""
+
+# Extents of all indexed items, kept in the meta table to plan searches
+_META_KEYS = ("max_duration", "t_min", "t_max", "minx", "miny", "maxx", "maxy")
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """RFC 3339 timestamp to seconds since the epoch (UTC), or None.
+
+    Raises ValueError if ``value`` is not a string or not a timestamp.
+    """
+    if not value:
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"Expected an RFC 3339 timestamp, got {value!r}")
+    dt = datetime.fromisoformat(value.strip().replace("z", "Z").replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _format_time(t: Optional[float]) -> Optional[str]:
+    if t is None:
+        return None
+    return datetime.fromtimestamp(t, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _prefix_end(prefix: str) -> str:
+    # Upper bound of all strings starting with prefix, for B-tree range scans
+    return prefix + "\U0010ffff"
+
+
+def _row(item: Dict[str, Any], href: Optional[str]) -> Tuple:
+    props = item.get("properties") or {}
+    t_start = parse_time(props.get("start_datetime") or props.get("datetime"))
+    t_end = parse_time(props.get("end_datetime") or props.get("datetime"))
+    if href is None:
+        href = next(
+            (link["href"] for link in item.get("links") or [] if link.get("rel") == "self" and link.get("href")),
+            f"./{item['id']}.json",
+        )
+    bbox = item.get("bbox")
+    if bbox and len(bbox) == 6:
+        bbox = [bbox[0], bbox[1], bbox[3], bbox[4]]
+    elif not bbox or len(bbox) != 4:
+        bbox = [None] * 4
+    return (
+        item["id"],
+        href,
+        props.get("title"),
+        t_start,
+        t_end,
+        *(float(v) if v is not None else None for v in bbox),
+        json.dumps(item),
+        time.time(),
+    )
+
+
+def _overlap_fraction(lo: float, hi: float, ext_lo: float, ext_hi: float) -> float:
+    # Share of [ext_lo, ext_hi] covered by [lo, hi]
+    if ext_hi <= ext_lo:
+        return 1.0
+    return max(0.0, min(hi, ext_hi) - max(lo, ext_lo)) / (ext_hi - ext_lo)
+
+
+class ItemIndex:
+    """SQLite store of items with an R-tree on bbox and a B-tree on datetime.
+
+    Each thread gets its own connection; the database runs in WAL mode so
+    searches do not wait for writers.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._meta: Optional[Dict[str, float]] = None
+        with self._write_lock:
+            self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def meta(self) -> Dict[str, float]:
+        """Longest item duration and the time and space extents of all items."""
+        if self._meta is None:
+            self._meta = dict(self._conn().execute("SELECT key, value FROM meta").fetchall())
+        return self._meta
+
+    def _update_meta(self, conn: sqlite3.Connection, rows: List[Tuple]):
+        meta = dict(self.meta())
+
+        def widen(key, value, fn):
+            if value is not None:
+                meta[key] = fn(meta[key], value) if key in meta else value
+
+        for r in rows:
+            t_start, t_end, minx, miny, maxx, maxy = r[3:9]
+            if t_start is not None and t_end is not None:
+                widen("max_duration", t_end - t_start, max)
+            widen("t_min", t_start, min)
+            widen("t_max", t_end, max)
+            widen("minx", minx, min)
+            widen("miny", miny, min)
+            widen("maxx", maxx, max)
+            widen("maxy", maxy, max)
+        if meta != self._meta:
+            conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", list(meta.items()))
+            self._meta = meta
+
+    def add(self, items: Iterable[Dict[str, Any]], hrefs: Optional[Sequence[Optional[str]]] = None) -> int:
+        """Insert or replace items (by id) in one transaction. Returns the count.
+
+        Items without an id, with the placeholder id ``DEFAULT_ITEM_ID`` or
+        with an unparsable datetime are skipped.
+        ``hrefs`` overrides the href stored for each item (default: its self
+        link, else ``./<id>.json``).
+        """
+        rows = []
+        for i, item in enumerate(items):
+            if item.get("id") in (None, "", DEFAULT_ITEM_ID):
+                continue
+            try:
+                rows.append(_row(item, hrefs[i] if hrefs else None))
+            except (ValueError, TypeError):
+                continue
+        if not rows:
+            return 0
+        with span("index"), self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.executemany(
+                    "DELETE FROM items_rtree WHERE id = (SELECT rowid FROM items WHERE id = ?)",
+                    [(r[0],) for r in rows],
+                )
+                conn.executemany(
+                    "INSERT INTO items (id, href, title, t_start, t_end, minx, miny, maxx, maxy, item, updated) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (id) DO UPDATE SET href = excluded.href, title = excluded.title, "
+                    "t_start = excluded.t_start, t_end = excluded.t_end, "
+                    "minx = excluded.minx, miny = excluded.miny, maxx = excluded.maxx, maxy = excluded.maxy, "
+                    "item = excluded.item, updated = excluded.updated",
+                    rows,
+                )
+                conn.executemany(
+                    "INSERT INTO items_rtree SELECT rowid, minx, maxx, miny, maxy FROM items "
+                    "WHERE id = ? AND minx IS NOT NULL",
+                    [(r[0],) for r in rows],
+                )
+                self._update_meta(conn, rows)
+        return len(rows)
+
+    def remove(self, item_id: str):
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.execute("DELETE FROM items_rtree WHERE id = (SELECT rowid FROM items WHERE id = ?)", (item_id,))
+                conn.execute("DELETE FROM items WHERE id = ?", (item_id,))
+
+    def _spatial_first(self, bbox: Sequence[float], t0: float, t1: float) -> bool:
+        # Start from whichever index is more selective, estimated from the
+        # share of the indexed extent that the query covers in space and time
+        meta = self.meta()
+        if "minx" not in meta:
+            return True
+        minx, miny, maxx, maxy = bbox
+        space = _overlap_fraction(minx, maxx, meta["minx"], meta["maxx"]) * _overlap_fraction(
+            miny, maxy, meta["miny"], meta["maxy"]
+        )
+        if "t_min" not in meta:
+            return True
+        when = _overlap_fraction(t0, t1, meta["t_min"], meta["t_max"])
+        return space <= when
+
+    def search(
+        self,
+        bbox: Optional[Sequence[float]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        limit: int = 100,
+        full: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Items whose bbox intersects ``bbox`` and whose time range overlaps
+        ``start``..``end`` (either end open), ordered by datetime.
+
+        Returns ``{"id", "href", "title", "datetime", "bbox"}`` per item, plus
+        the full ``"item"`` if ``full``.
+        """
+        t0 = parse_time(start) if start else -_FAR
+        t1 = parse_time(end) if end else _FAR
+        cols = "i.id, i.href, i.title, i.t_start, i.minx, i.miny, i.maxx, i.maxy" + (", i.item" if full else "")
+        # Items overlapping t0..t1 start at most max_duration before t0
+        lower = t0 - self.meta().get("max_duration", 0.0)
+        with span("index_search"):
+            if bbox is not None and self._spatial_first(bbox, t0, t1):
+                minx, miny, maxx, maxy = bbox
+                # The R-tree rounds outwards to 32-bit floats; check exactly
+                where = "i.minx <= ? AND i.maxx >= ? AND i.miny <= ? AND i.maxy >= ? "
+                params = [maxx, minx, maxy, miny, maxx, minx, maxy, miny]
+                if start or end:
+                    where += "AND i.t_start <= ? AND i.t_end >= ? "
+                    params += [t1, t0]
+                rows = self._conn().execute(
+                    # CROSS JOIN keeps the R-tree as the outer loop; otherwise the
+                    # planner may walk the datetime index for the ORDER BY
+                    f"SELECT {cols} FROM items_rtree r CROSS JOIN items i ON i.rowid = r.id "
+                    "WHERE r.minx <= ? AND r.maxx >= ? AND r.miny <= ? AND r.maxy >= ? "
+                    f"AND {where}ORDER BY i.t_start LIMIT ?",
+                    (*params, limit),
+                ).fetchall()
+            else:
+                # Walk the datetime index; with a bbox, filter on the stored extent
+                where = "i.t_start BETWEEN ? AND ? AND i.t_end >= ? "
+                params: List[Any] = [lower, t1, t0]
+                if bbox is not None:
+                    minx, miny, maxx, maxy = bbox
+                    where += "AND i.minx <= ? AND i.maxx >= ? AND i.miny <= ? AND i.maxy >= ? "
+                    params += [maxx, minx, maxy, miny]
+                rows = self._conn().execute(
+                    f"SELECT {cols} FROM items i WHERE {where}ORDER BY i.t_start LIMIT ?",
+                    (*params, limit),
+                ).fetchall()
+        out = []
+        for row in rows:
+            d = {
+                "id": row["id"],
+                "href": row["href"],
+                "title": row["title"],
+                "datetime": _format_time(row["t_start"]),
+                "bbox": [row["minx"], row["miny"], row["maxx"], row["maxy"]] if row["minx"] is not None else None,
+            }
+            if full:
+                d["item"] = json.loads(row["item"])
+            out.append(d)
+        return out
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Items whose href or id starts with ``prefix``, for relObject href fields.
+
+        Returns ``{"href", "type", "title"}`` per item, ready to fill in a
+        relation object.
+        """
+        if not prefix:
+            return []
+        end = _prefix_end(prefix)
+        with span("index_autocomplete"):
+            # Two range scans on the href and id B-trees
+            rows = self._conn().execute(
+                "SELECT href, id, title FROM ("
+                "SELECT href, id, title FROM (SELECT * FROM items WHERE href >= ? AND href < ? ORDER BY href LIMIT ?) "
+                "UNION "
+                "SELECT href, id, title FROM (SELECT * FROM items WHERE id >= ? AND id < ? ORDER BY id LIMIT ?)"
+                ") ORDER BY href LIMIT ?",
+                (prefix, end, limit, prefix, end, limit, limit),
+            ).fetchall()
+        return [
+            {"href": row["href"], "type": "application/json", "title": row["title"] or row["id"]}
+            for row in rows
+        ]
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT count(*) FROM items").fetchone()[0]
+
+
+_INDEX: Optional[ItemIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_index() -> Optional[ItemIndex]:
+    """The item index at ``INDEX_PATH``, opened on first use; None if turned off."""
+    global _INDEX
+    if not INDEX_PATH:
+        return None
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            _INDEX = ItemIndex(INDEX_PATH)
+    return _INDEX
+
+
+def index_item(item: Dict[str, Any]) -> bool:
+    """Add or update ``item`` in the default index. Returns False if not indexed.
+
+    Indexing is best effort: a missing or placeholder id, an unparsable
+    datetime or a database that cannot be opened or written never fails
+    the request that produced the item.
+    """
+    if item.get("id") in (None, "", DEFAULT_ITEM_ID):
+        return False
+    try:
+        index = get_index()
+        return index is not None and bool(index.add([item]))
+    except (sqlite3.Error, OSError):
+        return False
@@ -1,9 +1,16 @@
-const text = this.getAttribute('data-clipboard-text');
-navigator.clipboard.writeText(text);
+// The item is fetched on click rather than inlined in every response
+const text = fetch(this.getAttribute('data-src')).then(r => {
+    if (!r.ok) throw new Error(r.statusText);
+    return r.text();
+});
+// A ClipboardItem keeps the write tied to the click while the item loads
+const copied = typeof ClipboardItem !== 'undefined'
+    ? navigator.clipboard.write([new ClipboardItem({ 'text/plain': text.then(t => new Blob([t], { type: 'text/plain' })) })])
+    : text.then(t => navigator.clipboard.writeText(t));
 this.setAttribute('disabled', true);
 const label = this.innerText;
-this.innerText = 'Copied!';
-setTimeout(() => {
-    this.innerText = label;
-    this.removeAttribute('disabled');
-}, 1000);
\ No newline at end of file
+copied.then(() => { this.innerText = 'Copied!'; }, () => { this.innerText = 'Copy failed'; })
+    .finally(() => setTimeout(() => {
+        this.innerText = label;
+        this.removeAttribute('disabled');
+    }, 1000));
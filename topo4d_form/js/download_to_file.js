@@ -1,9 +1,16 @@
-const blob = new Blob([this.getAttribute('data-file-content')], { type: 'application/json' });
-const a = document.createElement('a');
-a.download = this.getAttribute('data-file-name');
-a.href = window.URL.createObjectURL(blob);
-a.dataset.downloadurl = ['application/json', a.download, a.href].join(':');
-a.style.display = "none";
-document.body.appendChild(a);
-a.click();
-document.body.removeChild(a);
\ No newline at end of file
+// The item is fetched on click rather than inlined in every response
+const name = this.getAttribute('data-file-name');
+fetch(this.getAttribute('data-src')).then(r => {
+    if (!r.ok) throw new Error(r.statusText);
+    return r.blob();
+}).then(blob => {
+    const a = document.createElement('a');
+    a.download = name;
+    a.href = window.URL.createObjectURL(blob);
+    a.dataset.downloadurl = ['application/json', a.download, a.href].join(':');
+    a.style.display = "none";
+    document.body.appendChild(a);
+    a.click();
+    document.body.removeChild(a);
+    setTimeout(() => window.URL.revokeObjectURL(a.href), 1000);
+});
@@ -0,0 +1,177 @@
+import copy
+from typing import Any, Dict, List, Tuple, Union
+
+Key = Union[str, int]
+
+
+# Minimal RFC 6902 JSON Patch / RFC 6901 JSON Pointer support
+class JsonPatchError(ValueError):
+    pass
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """Split a JSON Pointer into unescaped reference tokens."""
+    if not isinstance(pointer, str):
+        raise JsonPatchError(f"Invalid JSON Pointer: {pointer!r}")
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON Pointer: {pointer!r}")
+    return [t.replace("~1", "/").replace("~0", "~") for t in pointer[1:].split("/")]
+
+
+def to_pointer(path: Tuple[Key, ...]) -> str:
+    return "".join(
+        "/" + str(p).replace("~", "~0").replace("/", "~1") for p in path
+    )
+
+
+def _index(container: list, token: str, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index: {token!r}")
+    i = int(token)
+    if i > len(container) or (i == len(container) and not allow_end):
+        raise JsonPatchError(f"Array index out of range: {i}")
+    return i
+
+
+def _parent(doc: Any, tokens: List[str]) -> Any:
+    node = doc
+    for token in tokens[:-1]:
+        if isinstance(node, dict):
+            if token not in node:
+                raise JsonPatchError(f"Path not found: {to_pointer(tuple(tokens))}")
+            node = node[token]
+        elif isinstance(node, list):
+            node = node[_index(node, token)]
+        else:
+            raise JsonPatchError(f"Path not found: {to_pointer(tuple(tokens))}")
+    return node
+
+
+def resolve(doc: Any, pointer: str) -> Any:
+    tokens = parse_pointer(pointer)
+    if not tokens:
+        return doc
+    parent = _parent(doc, tokens)
+    last = tokens[-1]
+    if isinstance(parent, dict):
+        if last not in parent:
+            raise JsonPatchError(f"Path not found: {pointer}")
+        return parent[last]
+    if isinstance(parent, list):
+        return parent[_index(parent, last)]
+    raise JsonPatchError(f"Path not found: {pointer}")
+
+
+def _add(doc: Any, tokens: List[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent = _parent(doc, tokens)
+    last = tokens[-1]
+    if isinstance(parent, dict):
+        parent[last] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, last, allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Cannot add to {to_pointer(tuple(tokens))}")
+    return doc
+
+
+def _remove(doc: Any, tokens: List[str]) -> Any:
+    if not tokens:
+        raise JsonPatchError("Cannot remove the document root")
+    parent = _parent(doc, tokens)
+    last = tokens[-1]
+    if isinstance(parent, dict):
+        if last not in parent:
+            raise JsonPatchError(f"Path not found: {to_pointer(tuple(tokens))}")
+        return parent.pop(last)
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, last))
+    raise JsonPatchError(f"Path not found: {to_pointer(tuple(tokens))}")
+
+
+def apply_patch(doc: Any, patch: List[Dict[str, Any]]) -> Any:
+    """Apply a JSON Patch to a copy of ``doc`` and return the result.
+
+    Raises ``JsonPatchError`` if an operation is malformed or fails; ``doc``
+    itself is never modified.
+    """
+    if not isinstance(patch, list):
+        raise JsonPatchError("A JSON Patch must be an array of operations")
+    doc = copy.deepcopy(doc)
+    for op in patch:
+        if not isinstance(op, dict) or "op" not in op or "path" not in op:
+            raise JsonPatchError(f"Invalid operation: {op!r}")
+        name = op["op"]
+        tokens = parse_pointer(op["path"])
+        if name in ("add", "replace", "test") and "value" not in op:
+            raise JsonPatchError(f"Operation {name!r} requires a value")
+        if name == "add":
+            doc = _add(doc, tokens, copy.deepcopy(op["value"]))
+        elif name == "remove":
+            _remove(doc, tokens)
+        elif name == "replace":
+            resolve(doc, op["path"])
+            if tokens:
+                _remove(doc, tokens)
+            doc = _add(doc, tokens, copy.deepcopy(op["value"]))
+        elif name in ("move", "copy"):
+            if "from" not in op:
+                raise JsonPatchError(f"Operation {name!r} requires 'from'")
+            from_tokens = parse_pointer(op["from"])
+            if name == "move":
+                if tokens[: len(from_tokens)] == from_tokens and tokens != from_tokens:
+                    raise JsonPatchError("Cannot move a value into one of its children")
+                value = _remove(doc, from_tokens)
+            else:
+                value = copy.deepcopy(resolve(doc, op["from"]))
+            doc = _add(doc, tokens, value)
+        elif name == "test":
+            if resolve(doc, op["path"]) != op["value"]:
+                raise JsonPatchError(f"Test failed at {op['path']}")
+        else:
+            raise JsonPatchError(f"Unknown operation: {name!r}")
+    return doc
+
+
+def make_patch(old: Any, new: Any, path: Tuple[Key, ...] = ()) -> List[Dict[str, Any]]:
+    """Compute a JSON Patch that turns ``old`` into ``new``.
+
+    Objects are diffed key by key and equal-length arrays element by element;
+    anything else that differs is replaced whole.
+    """
+    if old == new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops: List[Dict[str, Any]] = []
+        for k in old:
+            if k not in new:
+                ops.append({"op": "remove", "path": to_pointer(path + (k,))})
+        for k, v in new.items():
+            if k not in old:
+                ops.append({"op": "add", "path": to_pointer(path + (k,)), "value": v})
+            else:
+                ops.extend(make_patch(old[k], v, path + (k,)))
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        ops = []
+        for i, (a, b) in enumerate(zip(old, new)):
+            ops.extend(make_patch(a, b, path + (i,)))
+        return ops
+    return [{"op": "replace", "path": to_pointer(path), "value": new}]
+
+
+def touched_paths(patch: List[Dict[str, Any]]) -> List[List[str]]:
+    """Token paths of every location a patch writes to or removes from."""
+    out = []
+    for op in patch:
+        if op.get("op") == "test":
+            continue
+        out.append(parse_pointer(op["path"]))
+        if op.get("op") == "move":
+            out.append(parse_pointer(op["from"]))
+    return out
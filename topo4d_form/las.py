@@ -0,0 +1,303 @@
+import importlib.util
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
+
+from .copc import is_copc, read_copc
+from .metrics import span
+from .scan import SCAN_DIMS, scan_points
+
+
+@lru_cache(maxsize=None)
+def laspy_available() -> bool:
+    """True if laspy can be imported; checked without importing it."""
+    return importlib.util.find_spec("laspy") is not None
+
+
+CHUNK_SIZE = 1024 * 1024
+# sha2-256 of uploads for file:checksum; TOPO4D_UPLOAD_CHECKSUM=0 turns it off
+UPLOAD_CHECKSUM = os.environ.get("TOPO4D_UPLOAD_CHECKSUM", "1") != "0"
+# LAS 1.4 header size; older versions have shorter headers
+_MIN_HEADER = 375
+
+logger = logging.getLogger(__name__)
+
+
+class _HeaderCapture:
+    """Keep the bytes of a LAS/LAZ stream that its header needs.
+
+    Fed the file chunk by chunk while it is copied, it keeps the public
+    header block and VLRs (up to the offset to point data) and, for LAS 1.4,
+    the EVLRs at the end of the file, so the header can be parsed without
+    reading the file again.
+    """
+
+    def __init__(self):
+        self.head = bytearray()
+        self.head_size = _MIN_HEADER
+        self.evlr_start = None
+        self.tail = bytearray()
+        self._pos = 0
+
+    def feed(self, chunk: bytes):
+        if len(self.head) < self.head_size:
+            self.head += chunk[: self.head_size - len(self.head)]
+            if len(self.head) >= 100 and self.head[:4] == b"LASF":
+                # Offset to point data (uint32 at 96) bounds header + VLRs
+                self.head_size = max(len(self.head), int.from_bytes(self.head[96:100], "little"))
+                self.head += chunk[len(self.head) - self._pos : self.head_size - self._pos]
+            if len(self.head) >= 243 and self.head[24:26] >= bytes([1, 4]):
+                # Start of first EVLR (uint64 at 235), 0 if there are none
+                self.evlr_start = int.from_bytes(self.head[235:243], "little") or None
+        end = self._pos + len(chunk)
+        if self.evlr_start is not None and end > self.evlr_start:
+            self.tail += chunk[max(0, self.evlr_start - self._pos) :]
+        self._pos = end
+
+    def stream(self) -> "_SparseStream":
+        segments = [(0, bytes(self.head))]
+        if self.evlr_start is not None:
+            segments.append((self.evlr_start, bytes(self.tail)))
+        return _SparseStream(segments, self._pos)
+
+
+class _SparseStream(io.RawIOBase):
+    """Read-only view over the captured byte ranges of a file."""
+
+    def __init__(self, segments: List[Tuple[int, bytes]], size: int):
+        self._segments = segments
+        self._size = size
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self._size}[whence]
+        self._pos = base + offset
+        return self._pos
+
+    def readinto(self, b) -> int:
+        if self._pos >= self._size:
+            return 0
+        for start, data in self._segments:
+            if start <= self._pos < start + len(data):
+                n = min(len(b), start + len(data) - self._pos)
+                b[:n] = data[self._pos - start : self._pos - start + n]
+                self._pos += n
+                return n
+        raise OSError(f"byte {self._pos} was not captured")
+
+
+def new_uploads_dir(root: Optional[str] = None) -> str:
+    """Create a directory of its own under ``root`` (default: ``./uploads``) for a set of uploads."""
+    import tempfile
+
+    root = root or os.path.join(os.getcwd(), "uploads")
+    os.makedirs(root, exist_ok=True)
+    return tempfile.mkdtemp(prefix="upload-", dir=root)
+
+
+def stream_upload(
+    fileobj: BinaryIO,
+    filename: str,
+    uploads_dir: Optional[str] = None,
+    checksum: bool = True,
+) -> Dict[str, Any]:
+    """Stream an uploaded file to disk in one pass.
+
+    The same pass computes ``file:size``, optionally a sha2-256 multihash
+    ``file:checksum``, and parses the LAS/LAZ header from the bytes going by.
+    The file is written to ``uploads_dir`` (default: a new directory from
+    ``new_uploads_dir``) under a unique name derived from its base name, so
+    uploads of the same name never write to the same file.
+
+    Returns ``{"filename", "path", "size", "checksum", "header"}``, with
+    ``filename`` the base name as uploaded and ``path`` the stored file;
+    ``header`` is None if the header could not be parsed from the stream.
+    """
+    import hashlib
+    import tempfile
+
+    # Persist temporary file (simplifies laspy.open handling for LAZ)
+    uploads_dir = uploads_dir or new_uploads_dir()
+    os.makedirs(uploads_dir, exist_ok=True)
+    safe_name = os.path.basename(filename) or "uploaded.las"
+    stem, ext = os.path.splitext(safe_name)
+    fd, path = tempfile.mkstemp(prefix=f"{stem}-", suffix=ext, dir=uploads_dir)
+    digest = hashlib.sha256() if checksum else None
+    capture = _HeaderCapture()
+    # Rewind and stream-copy to disk
+    fileobj.seek(0, os.SEEK_SET)
+    with os.fdopen(fd, "wb") as out:
+        while True:
+            chunk = fileobj.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            out.write(chunk)
+            capture.feed(chunk)
+            if digest is not None:
+                digest.update(chunk)
+        written = out.tell()
+    header = None
+    if laspy_available() and capture.head[:4] == b"LASF":
+        import laspy  # type: ignore
+
+        try:
+            with span("las_header"):
+                header = header_meta(laspy.LasHeader.read_from(capture.stream(), read_evlrs=True), safe_name)
+        except Exception:
+            header = None
+    return {
+        "filename": safe_name,
+        "path": path,
+        "size": written,
+        # Multihash: 0x12 = sha2-256, 0x20 = 32 byte digest
+        "checksum": "1220" + digest.hexdigest() if digest is not None else None,
+        "header": header,
+    }
+
+
+def header_meta(hdr: Any, filename: str) -> Dict[str, Any]:
+    """Flatten a laspy header into the dict used by ``geometry_from_las_header``."""
+    # Basic header fields
+    try:
+        version = f"{hdr.version.major}.{hdr.version.minor}"
+    except Exception:
+        version = None
+    try:
+        crs = getattr(hdr, "parse_crs", lambda: None)()
+    except Exception:
+        crs = None
+    return {
+        "filename": filename,
+        "version": version,
+        "point_format": getattr(getattr(hdr, "point_format", None), "id", None),
+        "point_count": getattr(hdr, "point_count", None),
+        "xyz_min": list(getattr(hdr, "mins", getattr(hdr, "min", [None, None, None]))[:3]),
+        "xyz_max": list(getattr(hdr, "maxs", getattr(hdr, "max", [None, None, None]))[:3]),
+        "scales": list(getattr(hdr, "scales", [])) or None,
+        "offsets": list(getattr(hdr, "offsets", [])) or None,
+        "srs_wkt": getattr(crs, "to_wkt", lambda: None)(),
+        "srs_epsg": getattr(crs, "to_epsg", lambda: None)(),
+        "copc": is_copc(hdr),
+    }
+
+
+def read_las_header(path: str, filename: Optional[str] = None) -> Dict[str, Any]:
+    """Read the header of a LAS/LAZ file (no point data) into a metadata dict."""
+    # laspy (and numpy with it) is imported on first use to keep startup fast
+    import laspy  # type: ignore
+
+    with span("las_header"), laspy.open(path) as lh:
+        return header_meta(lh.header, filename or os.path.basename(path))
+
+
+_header_pool: Optional[ThreadPoolExecutor] = None
+
+
+def get_header_pool() -> ThreadPoolExecutor:
+    """Thread pool for saving uploads and reading headers, created on first use.
+
+    The work is mostly file I/O and hashing (both release the GIL) plus a
+    little parsing, so threads are enough; the size can be set with
+    ``TOPO4D_HEADER_WORKERS``.
+    """
+    global _header_pool
+    if _header_pool is None:
+        workers = int(os.environ.get("TOPO4D_HEADER_WORKERS", min(8, os.cpu_count() or 1)))
+        _header_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="topo4d-las")
+    return _header_pool
+
+
+def _add_extent(info: Dict[str, Any]) -> Dict[str, Any]:
+    """Complete ``info["header"]`` from the file at ``info["path"]`` and add its geometry and bbox."""
+    from .make_item import geometry_from_las_header
+
+    if info["header"] is None:
+        # Not parseable from the captured bytes; read just the header from disk
+        info["header"] = read_las_header(info["path"], info["filename"])
+    if info["header"].get("copc"):
+        # Exact point count and a footprint from the octree; the header
+        # extent is kept if the file cannot be read as COPC
+        try:
+            with span("copc"):
+                info["header"].update(read_copc(info["path"]))
+        except Exception:
+            pass
+    if SCAN_DIMS:
+        # Exact extent, point count and GPS time range from every point; the
+        # header values are kept if the scan fails
+        try:
+            with span("scan"):
+                info["header"].update(scan_points(info["path"], SCAN_DIMS))
+        except Exception as e:
+            logger.warning("Point scan of %s failed, using its header: %s", info["filename"], e)
+    info.update(geometry_from_las_header(info["header"]))
+    return info
+
+
+def _ingest_one(fileobj: BinaryIO, filename: str, uploads_dir: Optional[str], checksum: bool) -> Dict[str, Any]:
+    return _add_extent(stream_upload(fileobj, filename, uploads_dir, checksum=checksum))
+
+
+def ingest_file(path: str, checksum: Optional[bool] = None) -> Dict[str, Any]:
+    """Read a local LAS/LAZ file in place, like an upload but without copying it.
+
+    Returns the same dict as ``ingest_uploads`` gives per file, with ``path``
+    the file itself. ``checksum`` defaults to ``UPLOAD_CHECKSUM``.
+    """
+    import hashlib
+
+    if checksum is None:
+        checksum = UPLOAD_CHECKSUM
+    digest = hashlib.sha256() if checksum else None
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if digest is not None:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+    return _add_extent({
+        "filename": os.path.basename(path),
+        "path": path,
+        "size": size,
+        "checksum": "1220" + digest.hexdigest() if digest is not None else None,
+        "header": None,
+    })
+
+
+def ingest_uploads(
+    uploads: List[Tuple[BinaryIO, str]],
+    uploads_dir: Optional[str] = None,
+    checksum: Optional[bool] = None,
+) -> List[Union[Dict[str, Any], Exception]]:
+    """Save several LAS/LAZ uploads and read their headers and extents in parallel.
+
+    ``uploads`` is a list of ``(fileobj, filename)``. Returns one result per
+    file, in order: the ``stream_upload`` dict plus ``geometry`` and ``bbox``,
+    or the exception raised for that file. ``checksum`` defaults to
+    ``UPLOAD_CHECKSUM``.
+    """
+    if checksum is None:
+        checksum = UPLOAD_CHECKSUM
+    uploads_dir = uploads_dir or new_uploads_dir()
+    futures = [
+        get_header_pool().submit(_ingest_one, fileobj, name, uploads_dir, checksum)
+        for fileobj, name in uploads
+    ]
+    results = []
+    for f in futures:
+        try:
+            results.append(f.result())
+        except Exception as e:
+            results.append(e)
+    return results
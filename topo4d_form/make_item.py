@@ -1,191 +1,74 @@
+import os
 from typing import cast, Dict, Any, List, Optional, Tuple
-from . import TOPO4D_SCHEMA_URL
+from . import DEFAULT_ITEM_ID, TOPO4D_SCHEMA_URL
 
 import pystac
 from dateutil.parser import parse as parse_dt
 from pystac.extensions.file import FileExtension
 
+from .fields import field_inputs, parse_fields
+from .matrix import MatrixParseError, parse_matrix
+from .metrics import span
+
+# Decimals kept in item coordinates (7 is about 1 cm in WGS84); empty keeps
+# full float64 precision
+_precision = os.environ.get("TOPO4D_COORD_PRECISION", "7")
+COORD_PRECISION = int(_precision) if _precision else None
+# Footprints with more vertices are simplified down to this many; 0 keeps all
+MAX_VERTICES = int(os.environ.get("TOPO4D_MAX_VERTICES", "1000"))
+
 
 def _parse_array_or_csv_floats(val: Optional[Any]) -> Optional[Any]:
     """Parses either:
-    - CSV string -> List[float]
+    - CSV string -> List[float] (one row) or List[List[float]] (rows by semicolon)
     - Flat List[str|num] -> List[float]
     - Nested List[List[str|num]] -> List[List[float]]
 
-    Returns None if parsing fails.
+    Returns None if parsing fails. See ``parse_matrix`` for shape checks and
+    error details.
     """
-    if val is None or val == "":
-        return None
-    # Nested list
-    if isinstance(val, list) and val and isinstance(val[0], list):
-        nested: List[List[float]] = []
-        try:
-            for row in val:
-                nested.append([float(x) for x in row])
-            return nested
-        except Exception:
-            return None
-    # Flat list
-    if isinstance(val, list):
-        try:
-            rows = [r for r in val.split(";") if r.strip() != ""]
-            nested = []
-            for row in rows:
-                parts = [p.strip() for p in row.split(",") if p.strip() != ""]
-                nested.append([float(p) for p in parts])
-            return nested
-        except Exception:
-            return None
-    # CSV string
-    if isinstance(val, str):
-        try:
-            rows = [r for r in val.split(";") if r.strip() != ""]
-            nested = []
-            for row in rows:
-                parts = [p.strip() for p in row.split(",") if p.strip() != ""]
-                nested.append([float(p) for p in parts])
-            return nested
-        except ValueError:
-            return None
-    return None
-
-
-def _parse_json_object(val: Optional[str]) -> Optional[Dict[str, Any]]:
-    if not val:
-        return None
     try:
-        import json
-
-        obj = json.loads(val)
-        return obj if isinstance(obj, dict) else None
-    except Exception:
+        return parse_matrix(val)
+    except MatrixParseError:
         return None
 
 
-def construct_topo4d_properties(d: Dict[str, Any]) -> Dict[str, Any]:
-    """Transforms flat form inputs into topo4d Item properties dict."""
-    props: Dict[str, Any] = {}
-    # ID
-    if "item_id" in d and d["item_id"]:
-        props["item_id"] = d["item_id"]
-    # Core requirement surfaced in UI
-    if "datetime" in d and d["datetime"]:
-        props["datetime"] = d["datetime"]
-
-    # Topo4D simple fields
-    simple_map = [
-        ("topo4d:data_type", "topo4d_data_type"),
-        ("topo4d:timezone", "topo4d_timezone"),
-        ("topo4d:acquisition_mode", "topo4d_acquisition_mode"),
-        ("topo4d:orientation", "topo4d_orientation"),
-        ("topo4d:global_trafo", "topo4d_global_trafo"),
-    ]
-    for outk, ink in simple_map:
-        v = d.get(ink)
-        if v not in (None, ""):
-            props[outk] = v
-
-    # Numeric fields
-    numeric_map = [
-        ("topo4d:duration", "topo4d_duration"),
-        ("topo4d:spatial_resolution", "topo4d_spatial_resolution"),
-        ("topo4d:positional_accuracy", "topo4d_positional_accuracy"),
-    ]
-    for outk, ink in numeric_map:
-        v = d.get(ink)
-        if v not in (None, ""):
-            try:
-                props[outk] = float(v)
-            except ValueError:
-                pass
-
-    # trafometa nested object
-    trafometa: Dict[str, Any] = {}
-    # Support either a nested dict value at key 'trafometa_reference_epoch' or
-    # flat fields from relObjectTemplate: '<name>_href', '<name>_type', '<name>_title'
-    re_obj = d.get("trafometa_reference_epoch")
-    if isinstance(re_obj, dict):
-        href = re_obj.get("href")
-        typ = re_obj.get("type")
-        title = re_obj.get("title")
-    else:
-        href = d.get("trafometa_reference_epoch_href")
-        typ = d.get("trafometa_reference_epoch_type")
-        title = d.get("trafometa_reference_epoch_title")
-    if any(v not in (None, "") for v in (href, typ, title)):
-        ref: Dict[str, Any] = {}
-        if href not in (None, ""):
-            ref["href"] = href
-        if typ not in (None, ""):
-            ref["type"] = typ
-        if title not in (None, ""):
-            ref["title"] = title
-        if ref:
-            trafometa["reference_epoch"] = ref
-    v = d.get("trafometa_registration_error")
-    if v not in (None, ""):
-        try:
-            trafometa["registration_error"] = float(v)
-        except ValueError:
-            pass
-    for key, form_key in [
-        ("transformation", "trafometa_transformation"),
-        ("affine_transformation", "trafometa_affine_transformation"),
-        ("rotation", "trafometa_rotation"),
-        ("translation", "trafometa_translation"),
-        ("reduction_point", "trafometa_reduction_point"),
-    ]:
-        arr_or_nested = _parse_array_or_csv_floats(d.get(form_key))
-        if arr_or_nested is not None:
-            trafometa[key] = arr_or_nested
-    if trafometa:
-        props["topo4d:trafometa"] = trafometa
-
-    # productmeta nested object
-    productmeta: Dict[str, Any] = {}
-    # Simple string fields
-    for key, form_key in [
-        ("product_name", "productmeta_product_name"),
-        ("product_level", "productmeta_product_level"),
-    ]:
-        v = d.get(form_key)
-        if v not in (None, ""):
-            productmeta[key] = v
-
-    # derived_from can be either a relObject (dict) or flat rel fields, or legacy string
-    df_obj = d.get("productmeta_derived_from")
-    df_href = df_type = df_title = None
-    if isinstance(df_obj, dict):
-        df_href = df_obj.get("href")
-        df_type = df_obj.get("type")
-        df_title = df_obj.get("title")
-    else:
-        df_href = d.get("productmeta_derived_from_href")
-        df_type = d.get("productmeta_derived_from_type")
-        df_title = d.get("productmeta_derived_from_title")
-    if any(v not in (None, "") for v in (df_href, df_type, df_title)):
-        rel: Dict[str, Any] = {}
-        if df_href not in (None, ""):
-            rel["href"] = df_href
-        if df_type not in (None, ""):
-            rel["type"] = df_type
-        if df_title not in (None, ""):
-            rel["title"] = df_title
-        if rel:
-            productmeta["derived_from"] = rel
-    else:
-        # Legacy string handling: keep string if provided and no rel-object fields present
-        if isinstance(df_obj, str) and df_obj not in (None, ""):
-            productmeta["derived_from"] = df_obj
-
-    # param is a JSON object in string form
-    param_obj = _parse_json_object(d.get("productmeta_param"))
-    if param_obj is not None:
-        productmeta["param"] = param_obj
-    if productmeta:
-        props["topo4d:productmeta"] = productmeta
-
-    return props
+def form_format_to_topo4d_input(d):
+    """Normalize form dictionary before storing/using.
+
+    - Collects inputs created by inputArrayTemplate with names like
+      "<base>_r_c" (1-based indices) into a nested list stored under "<base>".
+    """
+    out = dict(d)
+
+    # Group keys by base name if they match <name>_r_c where r,c are ints
+    buckets = {}
+    for k, v in d.items():
+        if not k[-1:].isdecimal():
+            continue
+        parts = k.rsplit("_", 2)
+        if len(parts) != 3 or not parts[0] or not (parts[1].isdecimal() and parts[2].isdecimal()):
+            continue
+        buckets.setdefault(parts[0], {})[(int(parts[1]), int(parts[2]))] = v
+
+    # For each bucket, assemble rows in row-major order
+    for base, grid in buckets.items():
+        max_r = max(rc[0] for rc in grid)
+        max_c = max(rc[1] for rc in grid)
+        out[base] = [[grid.get((r, c), "") for c in range(1, max_c + 1)] for r in range(1, max_r + 1)]
+
+    return out
+
+
+def construct_topo4d_properties(d: Dict[str, Any], errors: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Transforms flat form inputs into topo4d Item properties dict.
+
+    Fields are mapped as declared in ``fields.FIELDS``. Matrix and vector
+    fields that cannot be parsed or have the wrong shape are left out; if
+    ``errors`` is given, an error in the same form as
+    ``topo4d_validation_errors`` is appended for each of them.
+    """
+    return parse_fields(d, errors)
 
 
 def construct_assets(d: Dict[str, Any]) -> Dict[str, pystac.Asset]:
@@ -217,16 +100,231 @@ def construct_assets(d: Dict[str, Any]) -> Dict[str, pystac.Asset]:
     return assets
 
 
+def construct_file_assets(file_assets: Optional[Dict[str, Dict[str, Any]]]) -> Dict[str, pystac.Asset]:
+    """Creates the assets for uploaded files, keyed like ``file_assets``.
+
+    Each entry is an asset dict in STAC form (``href``, ``type``, ``title``,
+    ``roles`` and ``file:*`` fields), as built by ``las_file_asset``.
+    """
+    return {key: pystac.Asset.from_dict(asset) for key, asset in (file_assets or {}).items()}
+
+
+def asset_key(filename: str) -> str:
+    """Asset key for an uploaded file: its base name without extension."""
+    import os
+    import re
+
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    key = re.sub(r"[^\w.-]+", "_", stem).strip("_") or "file"
+    # "data" is the asset described on the asset tab
+    return "data_file" if key == "data" else key
+
+
+def unique_asset_key(filename: str, file_assets: Dict[str, Dict[str, Any]]) -> str:
+    """``asset_key`` of ``filename``, suffixed if a different file already has that key.
+
+    ``a.las`` and ``a.laz`` get ``a`` and ``a_2``; the same file name keeps
+    its key, so uploading it again replaces its asset.
+    """
+    key = base = asset_key(filename)
+    n = 1
+    while key in file_assets and file_assets[key].get("title") != filename:
+        n += 1
+        key = f"{base}_{n}"
+    return key
+
+
+def las_file_asset(filename: str, size: int, checksum: Optional[str] = None) -> Dict[str, Any]:
+    """Asset dict for an uploaded LAS/LAZ file, with its ``file:size`` and ``file:checksum``."""
+    laz = filename.lower().endswith(".laz")
+    asset = {
+        "href": f"./{filename}",
+        "type": "application/vnd.laszip" if laz else "application/vnd.las",
+        "title": filename,
+        "roles": ["data"],
+        "file:size": size,
+    }
+    if checksum:
+        asset["file:checksum"] = checksum
+    return asset
+
+
+def union_geometry(extents: List[Dict[str, Any]], max_vertices: int = MAX_VERTICES) -> Dict[str, Any]:
+    """Union of several ``{"geometry", "bbox"}`` extents, in the same form.
+
+    The union is simplified to ``max_vertices`` here, so items built from it
+    on every edit do not have to.
+    """
+    from shapely.geometry import mapping, shape
+    from shapely.ops import unary_union
+
+    union = unary_union([shape(e["geometry"]) for e in extents])
+    bbox = list(union.bounds)
+    if max_vertices:
+        with span("simplify"):
+            union = _simplify(union, max_vertices)
+    return {"geometry": mapping(union), "bbox": bbox}
+
+
+# Nesting depth of the positions in GeoJSON coordinates
+_POSITION_DEPTH = {"Point": 0, "MultiPoint": 1, "LineString": 1, "MultiLineString": 2, "Polygon": 2, "MultiPolygon": 3}
+
+
+def num_vertices(geometry: Dict[str, Any]) -> int:
+    """Number of positions in a GeoJSON geometry."""
+    if geometry.get("type") == "GeometryCollection":
+        return sum(num_vertices(g) for g in geometry.get("geometries") or [])
+    depth = _POSITION_DEPTH.get(geometry.get("type"))
+    coords = geometry.get("coordinates")
+    if depth is None or coords is None:
+        return 0
+    if depth == 0:
+        return 1
+    for _ in range(depth - 1):
+        coords = [c for part in coords for c in part]
+    return len(coords)
+
+
+def _round_positions(coords, depth: int, precision: int):
+    import numpy as np
+
+    if depth > 1:
+        return [_round_positions(c, depth - 1, precision) for c in coords]
+    try:
+        # One NumPy call per ring or line rather than round() per number
+        return np.round(np.asarray(coords, dtype=float), precision).tolist()
+    except ValueError:
+        # Mixed 2D/3D positions
+        return [[round(x, precision) for x in pos] for pos in coords]
+
+
+def round_geometry(geometry: Dict[str, Any], precision: int) -> Dict[str, Any]:
+    """A copy of a GeoJSON geometry with coordinates rounded to ``precision`` decimals."""
+    if geometry.get("type") == "GeometryCollection":
+        return {**geometry, "geometries": [round_geometry(g, precision) for g in geometry.get("geometries") or []]}
+    depth = _POSITION_DEPTH.get(geometry.get("type"))
+    if depth is None or geometry.get("coordinates") is None:
+        return geometry
+    coords = geometry["coordinates"]
+    if depth == 0:
+        return {**geometry, "coordinates": [round(x, precision) for x in coords]}
+    return {**geometry, "coordinates": _round_positions(coords, depth, precision)}
+
+
+def round_bbox(bbox: List[float], precision: int) -> List[float]:
+    """``bbox`` rounded outwards to ``precision`` decimals, so it still contains the geometry."""
+    step = 10.0 ** -precision
+    half = len(bbox) // 2
+    out = []
+    for i, v in enumerate(bbox):
+        r = round(v, precision)
+        # Mins may only go down and maxs up; rounded values stay as they are
+        if i < half and r > v:
+            r = round(r - step, precision)
+        elif i >= half and r < v:
+            r = round(r + step, precision)
+        out.append(r)
+    return out
+
+
+def _simplify_tolerance(geom, max_vertices: int):
+    import math
+
+    import shapely
+
+    if shapely.get_num_coordinates(geom) <= max_vertices:
+        return geom
+    minx, miny, maxx, maxy = geom.bounds
+    diag = math.hypot(maxx - minx, maxy - miny) or 1.0
+    # Bisect the log of the tolerance between 1e-9 of the extent's diagonal
+    # and the diagonal; stop once the result uses 90% of the budget. The
+    # search uses plain Douglas-Peucker, which is about ten times faster than
+    # the topology-preserving variant and keeps nearly the same vertices.
+    lo, hi = math.log(diag * 1e-9), math.log(diag)
+    for _ in range(24):
+        mid = (lo + hi) / 2
+        n = shapely.get_num_coordinates(shapely.simplify(geom, math.exp(mid), preserve_topology=False))
+        if n > max_vertices:
+            lo = mid
+            continue
+        hi = mid
+        if n >= 0.9 * max_vertices or hi - lo < 0.05:
+            break
+    # Preserving topology may keep a few more vertices; coarsen until it fits
+    while True:
+        best = shapely.simplify(geom, math.exp(hi), preserve_topology=True)
+        if shapely.get_num_coordinates(best) <= max_vertices or hi >= math.log(diag):
+            # At the diagonal, not even the coarsest simplification fits
+            return best
+        hi = min(hi + 0.25, math.log(diag))
+
+
+def _simplify(geom, max_vertices: int):
+    import shapely
+
+    best = _simplify_tolerance(geom, max_vertices)
+    if shapely.get_num_coordinates(best) > max_vertices:
+        # Every ring keeps at least four positions, so many small parts or
+        # holes cannot be simplified away. Fill the holes, then fall back to
+        # the convex hull; both still cover the whole footprint.
+        if geom.geom_type in ("Polygon", "MultiPolygon"):
+            filled = shapely.polygons(shapely.get_exterior_ring(shapely.get_parts(geom)))
+            best = _simplify_tolerance(shapely.union_all(filled), max_vertices)
+        if shapely.get_num_coordinates(best) > max_vertices:
+            best = _simplify_tolerance(shapely.convex_hull(geom), max_vertices)
+    return best
+
+
+def simplify_geometry(geometry: Dict[str, Any], max_vertices: int) -> Dict[str, Any]:
+    """Simplify a GeoJSON geometry to at most ``max_vertices`` positions.
+
+    Uses shapely's topology-preserving simplification with about the smallest
+    tolerance that meets the budget, found by bisection. Budgets too small for
+    the number of parts and holes are met by filling the holes, and failing
+    that by the convex hull, so the result always covers the input.
+    """
+    from shapely.geometry import mapping, shape
+
+    if num_vertices(geometry) <= max_vertices:
+        return geometry
+    return mapping(_simplify(shape(geometry), max_vertices))
+
+
+def compact_geometry(
+    geometry: Dict[str, Any],
+    bbox: Optional[List[float]] = None,
+    precision: Optional[int] = COORD_PRECISION,
+    max_vertices: int = MAX_VERTICES,
+) -> Tuple[Dict[str, Any], Optional[List[float]]]:
+    """Simplify ``geometry`` to ``max_vertices`` and round it and ``bbox`` to ``precision``.
+
+    Returns new ``(geometry, bbox)``; the inputs are not changed. Either step
+    is skipped with ``max_vertices=0`` or ``precision=None``.
+    """
+    if max_vertices and num_vertices(geometry) > max_vertices:
+        with span("simplify"):
+            geometry = simplify_geometry(geometry, max_vertices)
+    if precision is not None:
+        geometry = round_geometry(geometry, precision)
+        if bbox is not None:
+            bbox = round_bbox(bbox, precision)
+    return geometry, bbox
+
+
 def create_pystac_item(
     topo4d_props: Dict[str, Any],
     assets: Dict[str, pystac.Asset],
     self_href: str = "./item.json",
     geometry: Optional[Dict[str, Any]] = None,
     bbox: Optional[List[float]] = None,
+    precision: Optional[int] = COORD_PRECISION,
+    max_vertices: int = MAX_VERTICES,
 ) -> Dict[str, Any]:
     """Create a STAC Item dict with topo4d properties and assets.
 
     If ``geometry`` and ``bbox`` are provided, they are used; otherwise a default bbox is applied.
+    The geometry is simplified to ``max_vertices`` and coordinates are rounded
+    to ``precision`` decimals (see ``compact_geometry``).
     """
     from shapely.geometry import Polygon
     # Use provided geometry/bbox if available, else fallback to placeholder
@@ -236,6 +334,7 @@ def create_pystac_item(
         ]
     if geometry is None:
         geometry = Polygon.from_bounds(*bbox).__geo_interface__
+    geometry, bbox = compact_geometry(geometry, bbox, precision, max_vertices)
 
     dt_str = topo4d_props.get("datetime")
     dt = None
@@ -246,7 +345,7 @@ def create_pystac_item(
             dt = None
 
     item = pystac.Item(
-        id=topo4d_props.get("item_id", "item"),
+        id=topo4d_props.get("item_id", DEFAULT_ITEM_ID),
         geometry=geometry,
         bbox=bbox,
         datetime=dt,
@@ -256,6 +355,10 @@ def create_pystac_item(
 
     # Add topo4d extension URL
     item.stac_extensions = list(set((item.stac_extensions or []) + [TOPO4D_SCHEMA_URL]))
+    # Declare the file extension if any asset carries file:* fields
+    for asset in item.assets.values():
+        if any(k.startswith("file:") for k in asset.extra_fields):
+            FileExtension.ext(asset, add_if_missing=True)
 
     item_d = item.to_dict()
     # Ensure properties dict exists
@@ -272,17 +375,63 @@ def create_pystac_item(
     return item_d
 
 
+def build_item(d: Dict[str, Any], errors: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Build the STAC Item dict for a ``stac_format_d`` payload.
+
+    Shortcut for ``construct_topo4d_properties`` + ``construct_assets`` +
+    ``create_pystac_item`` using the payload's geometry and bbox. Field
+    parsing errors are appended to ``errors`` if given.
+    """
+    with span("construct_properties"):
+        topo_props = construct_topo4d_properties(d, errors)
+        assets = construct_assets(d.get("assets"))
+        assets.update(construct_file_assets(d.get("file_assets")))
+    with span("create_item"):
+        return create_pystac_item(
+            topo_props,
+            assets,
+            geometry=d.get("geometry"),
+            bbox=d.get("bbox"),
+        )
+
+
+def form_inputs_from_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a STAC Item dict back onto flat form inputs.
+
+    Inverse of ``construct_topo4d_properties``/``construct_assets``: values are
+    rendered the way the form submits them (numbers and matrices as strings),
+    so the result can update both ``form_format_d`` and ``stac_format_d``.
+    The asset, if any, is returned under ``"assets"`` in ``stac_format_d`` form,
+    and any other assets (uploaded files) under ``"file_assets"``.
+    """
+    out: Dict[str, Any] = {}
+    if item.get("id"):
+        out["item_id"] = item["id"]
+    out.update(field_inputs(item.get("properties") or {}))
+
+    assets = item.get("assets") or {}
+    asset = assets.get("data")
+    if asset:
+        out["assets"] = {k: asset.get(k) for k in ("title", "href", "type", "roles")}
+    file_assets = {k: v for k, v in assets.items() if k != "data"}
+    if file_assets:
+        out["file_assets"] = file_assets
+    return out
+
+
 def geometry_from_las_header(meta: Dict[str, Any]) -> Dict[str, Any]:
     """Derive a GeoJSON geometry and bbox from a laspy header dict.
 
     Expected keys in ``meta``:
     - ``xyz_min``: [min_x, min_y, min_z]
     - ``xyz_max``: [max_x, max_y, max_z]
+    - optionally ``footprint``: a GeoJSON geometry in the file's CRS (e.g.
+      from ``copc.read_copc``), used instead of the bounding box
 
     Returns a dict: {"geometry": <GeoJSON>, "bbox": [minx, miny, maxx, maxy]}.
     """
     from pyproj import CRS, Transformer
-    from shapely.geometry import box, mapping
+    from shapely.geometry import box, mapping, shape
 
     mins = meta.get("xyz_min") or meta.get("mins")
     maxs = meta.get("xyz_max") or meta.get("maxs")
@@ -290,6 +439,7 @@ def geometry_from_las_header(meta: Dict[str, Any]) -> Dict[str, Any]:
         raise ValueError("Invalid LAS header dict: missing xyz_min/xyz_max")
     minx, miny = float(mins[0]), float(mins[1])
     maxx, maxy = float(maxs[0]), float(maxs[1])
+    footprint = shape(meta["footprint"]) if meta.get("footprint") else box(minx, miny, maxx, maxy)
 
     try:
         crs = CRS.from_user_input(meta.get("srs_epsg") or meta.get("vlr_srs_epsg") or meta.get("wkt") or meta.get("vlr_wkt"))
@@ -297,21 +447,32 @@ def geometry_from_las_header(meta: Dict[str, Any]) -> Dict[str, Any]:
         crs = None
     
     bbox = [minx, miny, maxx, maxy]
+    geom = mapping(footprint)
 
     if crs and crs.to_epsg() != 4326:
         try:
-            transformer = Transformer.from_crs(crs, CRS.from_epsg(4326), always_xy=True)
-
-            min_lon, min_lat = transformer.transform(minx, miny)
-            max_lon, max_lat = transformer.transform(maxx, maxy)
-
-            # geom in WGS84
-            bbox = [min_lon, min_lat, max_lon, max_lat]
-            geom = mapping(box(min_lon, min_lat, max_lon, max_lat))
+            with span("reproject"):
+                transformer = Transformer.from_crs(crs, CRS.from_epsg(4326), always_xy=True)
+                if meta.get("footprint"):
+                    import numpy as np
+                    import shapely
+
+                    # All vertices in one call
+                    footprint = shapely.transform(
+                        footprint, lambda xy: np.column_stack(transformer.transform(xy[:, 0], xy[:, 1]))
+                    )
+                    bbox = list(footprint.bounds)
+                    geom = mapping(footprint)
+                else:
+                    min_lon, min_lat = transformer.transform(minx, miny)
+                    max_lon, max_lat = transformer.transform(maxx, maxy)
+                    # geom in WGS84
+                    bbox = [min_lon, min_lat, max_lon, max_lat]
+                    geom = mapping(box(min_lon, min_lat, max_lon, max_lat))
         except Exception:
             pass 
-    else:
+    elif meta.get("footprint"):
         # geom in native CRS
-        geom = mapping(box(minx, miny, maxx, maxy))
+        bbox = list(footprint.bounds)
 
     return {"geometry": geom, "bbox": bbox}
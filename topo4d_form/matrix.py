@@ -0,0 +1,156 @@
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+
+class MatrixParseError(ValueError):
+    """Raised when a matrix or vector field cannot be parsed or has the wrong shape."""
+
+
+# Expected shape per form field: (rows, cols) for matrices, (n,) for vectors.
+# Matrix fields also accept a stack of such matrices (e.g. one per epoch),
+# given as consecutive rows; vector fields accept one vector per row.
+MATRIX_FIELDS = {
+    "topo4d_global_trafo": (4, 4),
+    "trafometa_transformation": (4, 4),
+    "trafometa_affine_transformation": (4, 4),
+    "trafometa_rotation": (3, 3),
+    "trafometa_translation": (3,),
+    "trafometa_reduction_point": (3,),
+}
+
+Shape = Union[Tuple[int], Tuple[int, int]]
+
+# Text up to this length is parsed without the NumPy reader
+_SMALL_CSV = 512
+
+
+def _first_bad_value(rows: Sequence[Sequence[Any]]) -> str:
+    # Slow path, only run once the vectorized parse failed
+    for r, row in enumerate(rows, 1):
+        for c, v in enumerate(row, 1):
+            try:
+                float(v)
+            except (TypeError, ValueError):
+                return f"row {r}, column {c}: {v!r} is not a number"
+    return "values are not numbers"
+
+
+def _csv_error(text: str) -> str:
+    # Slow path, only run once the vectorized parse failed
+    rows = [[v.strip() for v in row.split(",")] for row in text.split(";") if row]
+    bad = _first_bad_value(rows)
+    if bad != "values are not numbers":
+        return bad
+    for r, row in enumerate(rows, 1):
+        if len(row) != len(rows[0]):
+            return f"row {r} has {len(row)} values, expected {len(rows[0])} like row 1"
+    return "could not parse values"
+
+
+def _parse_csv(text: str):
+    import io
+
+    import numpy as np
+
+    # Trailing separators are ignored, both of rows ("1,2;3,4;") and of the
+    # values in a row ("1,2,3,")
+    text = text.strip().strip(";")
+    # Substring checks; a regex here costs a fifth of the parse of large input
+    if text.rstrip().endswith(",") or ",;" in text or ", ;" in text:
+        text = ";".join(row.rstrip(", \t\n") for row in text.split(";")).strip(";")
+    if not text.strip():
+        return None
+    if len(text) <= _SMALL_CSV and text.isascii() and "_" not in text:
+        # Form-sized input (a 4x4 matrix or a vector): plain float() is several
+        # times faster than setting up the NumPy reader. Anything irregular
+        # goes through the reader below for its error message.
+        try:
+            rows = [[float(v) for v in row.split(",")] for row in text.split(";") if row]
+        except ValueError:
+            rows = None
+        if rows and len(set(map(len, rows))) == 1:
+            return np.array(rows)
+    try:
+        # NumPy's C reader parses and checks the row lengths in one pass
+        return np.loadtxt(
+            io.StringIO(text.replace(";", "\n")), delimiter=",", ndmin=2, comments=None
+        )
+    except ValueError:
+        raise MatrixParseError(_csv_error(text)) from None
+
+
+def _parse_list(val: List[Any]):
+    import numpy as np
+
+    if not val:
+        return None
+    try:
+        return np.asarray(val, dtype=float)
+    except (TypeError, ValueError):
+        pass
+    if isinstance(val[0], (list, tuple)):
+        for r, row in enumerate(val, 1):
+            if not isinstance(row, (list, tuple)):
+                raise MatrixParseError(f"row {r} is not a list")
+            if len(row) != len(val[0]):
+                raise MatrixParseError(
+                    f"row {r} has {len(row)} values, expected {len(val[0])} like row 1"
+                )
+        raise MatrixParseError(_first_bad_value(val))
+    raise MatrixParseError(_first_bad_value([val]))
+
+
+def _check_shape(arr, shape: Shape):
+    if len(shape) == 1:
+        (n,) = shape
+        cols = arr.shape[-1]
+        if arr.ndim > 2 or cols != n:
+            raise MatrixParseError(f"expected {n} values per vector, got {cols}")
+        return arr
+    rows, cols = shape
+    if arr.ndim == 1:
+        # A single flat row of rows*cols values
+        if arr.size != rows * cols:
+            raise MatrixParseError(
+                f"expected a {rows}x{cols} matrix ({rows * cols} values), got {arr.size} values"
+            )
+        return arr.reshape(rows, cols)
+    if arr.ndim == 3:
+        arr = arr.reshape(-1, arr.shape[-1])
+    if arr.ndim != 2 or arr.shape[1] != cols:
+        raise MatrixParseError(f"expected {cols} values per row, got {arr.shape[-1]}")
+    if arr.shape[0] % rows:
+        raise MatrixParseError(
+            f"expected a {rows}x{cols} matrix (or a stack of them), got {arr.shape[0]} rows"
+        )
+    return arr
+
+
+def parse_matrix(val: Any, shape: Optional[Shape] = None) -> Optional[List[Any]]:
+    """Parse a matrix or vector from form text or (nested) lists.
+
+    Text uses semicolons between rows and commas between values, e.g.
+    ``"1,0,0;0,1,0;0,0,1"``. Parsing is vectorized with NumPy, so large
+    inputs (per-point or per-epoch lists with many thousands of rows) are
+    converted in one pass. If ``shape`` is given the result is checked
+    against it (see ``MATRIX_FIELDS``).
+
+    Returns nested lists of floats (a flat list for a single vector), or None
+    for empty input. Raises ``MatrixParseError`` naming the offending row,
+    column or dimension otherwise.
+    """
+    if val is None or val == "" or val == []:
+        return None
+    if isinstance(val, str):
+        arr = _parse_csv(val)
+    elif isinstance(val, (list, tuple)):
+        arr = _parse_list(list(val))
+    else:
+        raise MatrixParseError(f"expected text or a list, got {type(val).__name__}")
+    if arr is None:
+        return None
+    if arr.ndim > 1 and arr.shape[0] == 1:
+        # A single row is a vector (or a matrix given as one flat row)
+        arr = arr[0]
+    if shape is not None:
+        arr = _check_shape(arr, shape)
+    return arr.tolist()
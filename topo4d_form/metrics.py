@@ -0,0 +1,210 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Metrics can be switched off at startup with TOPO4D_METRICS=0 and toggled at
+# runtime with set_enabled(); when off, spans and the middleware do nothing
+# beyond a flag check.
+_enabled = os.environ.get("TOPO4D_METRICS", "1") != "0"
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(enabled: bool):
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def _fmt_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_value(v: float) -> str:
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+class Histogram:
+    """Prometheus-style histogram with a fixed set of labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        # Per series: one count per bucket (+Inf last), then sum
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def render(self) -> Iterable[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        for labels, series in sorted(items):
+            cumulative = 0
+            for le, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le_label = 'le="+Inf"' if le == float("inf") else f'le="{le!r}"'
+                yield f"{self.name}_bucket{_fmt_labels(self.labelnames, labels, le_label)} {cumulative}"
+            yield f"{self.name}_sum{_fmt_labels(self.labelnames, labels)} {series[-1]!r}"
+            yield f"{self.name}_count{_fmt_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Counter:
+    """Monotonic counter; ``collect`` may supply the values at scrape time instead."""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=(), collect: Optional[Callable] = None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Dict[Tuple[str, ...], float]:
+        if self.collect is not None:
+            return self.collect()
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> Iterable[str]:
+        for labels, value in sorted(self.samples().items()):
+            yield f"{self.name}{_fmt_labels(self.labelnames, labels)} {_fmt_value(value)}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down, usually computed by ``collect`` at scrape time."""
+
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] = value
+
+
+REGISTRY: List = []
+
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+STAGE_SECONDS = register(
+    Histogram(
+        "topo4d_stage_seconds",
+        "Time spent in each processing stage of a request.",
+        labelnames=("stage",),
+    )
+)
+REQUEST_SECONDS = register(
+    Histogram(
+        "topo4d_request_seconds",
+        "HTTP request latency by route.",
+        labelnames=("method", "route", "status"),
+    )
+)
+
+
+class span:
+    """Time a block of code as one ``stage`` of the current request.
+
+    Usage: ``with span("validate"): ...``
+    """
+
+    __slots__ = ("stage", "t0")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.t0 = None
+
+    def __enter__(self):
+        if _enabled:
+            self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.t0 is not None:
+            STAGE_SECONDS.observe(time.perf_counter() - self.t0, self.stage)
+        return False
+
+
+def render_metrics() -> str:
+    """Render every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency by method, route and status."""
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Dict[object, str] = {}
+
+    def _route(self, scope) -> str:
+        # Label by route template rather than raw path to bound cardinality
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        route = self._routes.get(endpoint)
+        if route is None:
+            route = scope.get("path", "unmatched")
+            for r in scope["app"].routes:
+                if getattr(r, "endpoint", None) is endpoint:
+                    route = r.path
+                    break
+            self._routes[endpoint] = route
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _enabled:
+            return await self.app(scope, receive, send)
+        t0 = time.perf_counter()
+        status = ["500"]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - t0, scope["method"], self._route(scope), status[0]
+            )
@@ -0,0 +1,123 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+from .index import parse_time
+
+
+def _geometries(geojson: Sequence[Dict[str, Any]]):
+    """GeoJSON geometries as a shapely array, building plain polygons in bulk."""
+    import numpy as np
+    import shapely
+    from shapely.geometry import shape
+
+    rings = [
+        g["coordinates"][0]
+        for g in geojson
+        if g.get("type") == "Polygon" and len(g.get("coordinates") or ()) == 1
+    ]
+    # Footprints from geometry_from_las_header are single-ring boxes; convert
+    # them all at once instead of one shape() call each
+    if len(rings) == len(geojson) and rings and len({len(r) for r in rings}) == 1:
+        coords = np.asarray(rings, dtype=float)[:, :, :2]
+        return shapely.polygons(coords)
+    return np.array([shape(g) for g in geojson], dtype=object)
+
+
+def epoch_overlaps(
+    epochs: Sequence[Dict[str, Any]], min_ratio: float = 0.0
+) -> Dict[str, Any]:
+    """Pairwise spatial overlap of epochs and suggested reference epochs.
+
+    ``epochs`` are ``{"id", "geometry", "datetime"?}`` dicts (or STAC items)
+    with GeoJSON footprints, e.g. from ``geometry_from_las_header``. Candidate
+    pairs come from an STRtree query of all footprints at once, so only
+    footprints whose extents meet are intersected; intersection areas are
+    computed for all pairs at once (from the bounds for rectangles, with
+    vectorized shapely functions otherwise). Areas are taken in the
+    footprints' own coordinates, which is fine for ratios between nearby
+    footprints in lon/lat.
+
+    Returns a sparse overlap matrix in coordinate form, ``rows``, ``cols``
+    and ``ratio`` where ``ratio[k]`` is the share of epoch ``rows[k]``
+    covered by epoch ``cols[k]`` (pairs below ``min_ratio`` are dropped),
+    plus ``iou`` per pair, ``suggested_reference`` per epoch (the earlier
+    epoch covering most of it if datetimes are given, else any epoch),
+    ``best_reference`` (the epoch covering most of all others) and
+    ``isolated`` epochs without any overlap of at least ``min_ratio``.
+    """
+    import numpy as np
+    import shapely
+
+    ids = [e["id"] for e in epochs]
+    if len(set(ids)) != len(ids):
+        raise ValueError("Epoch ids must be unique.")
+    geoms = _geometries([e["geometry"] for e in epochs])
+    times = []
+    for e in epochs:
+        props = e.get("properties") or e
+        if not isinstance(props, dict):
+            raise ValueError(f"Properties of epoch {e['id']!r} must be an object.")
+        t = parse_time(props.get("datetime") or props.get("start_datetime"))
+        times.append(np.nan if t is None else t)
+    times = np.asarray(times, dtype=float)
+
+    # Candidate pairs: footprints whose bounding boxes meet
+    tree = shapely.STRtree(geoms)
+    left, right = tree.query(geoms)
+    keep = left < right
+    left, right = left[keep], right[keep]
+
+    areas = shapely.area(geoms)
+    bounds = shapely.bounds(geoms)
+    # Axis-aligned rectangles (what geometry_from_las_header produces) are
+    # intersected from their bounds; only other shapes go through GEOS
+    extent = (bounds[:, 2] - bounds[:, 0]) * (bounds[:, 3] - bounds[:, 1])
+    is_box = (shapely.get_num_coordinates(geoms) == 5) & np.isclose(areas, extent, rtol=1e-9)
+    lo = np.maximum(bounds[left, :2], bounds[right, :2])
+    hi = np.minimum(bounds[left, 2:], bounds[right, 2:])
+    inter = np.prod(np.clip(hi - lo, 0, None), axis=1)
+    other = np.flatnonzero(~(is_box[left] & is_box[right]))
+    if len(other):
+        inter[other] = shapely.area(shapely.intersection(geoms[left[other]], geoms[right[other]]))
+    # Footprints that only touch do not overlap
+    keep = inter > 0
+    left, right, inter = left[keep], right[keep], inter[keep]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio_lr = np.where(areas[left] > 0, inter / areas[left], 0.0)
+        ratio_rl = np.where(areas[right] > 0, inter / areas[right], 0.0)
+        union = areas[left] + areas[right] - inter
+        iou = np.where(union > 0, inter / union, 0.0)
+
+    # Both directions of each pair, as one sparse matrix
+    rows = np.concatenate([left, right])
+    cols = np.concatenate([right, left])
+    ratio = np.concatenate([ratio_lr, ratio_rl])
+    iou = np.concatenate([iou, iou])
+    if min_ratio > 0:
+        mask = ratio >= min_ratio
+        rows, cols, ratio, iou = rows[mask], cols[mask], ratio[mask], iou[mask]
+
+    n = len(ids)
+    suggested: List[Optional[str]] = [None] * n
+    # Reference epochs should precede the epoch if datetimes are known
+    earlier = ~(times[cols] >= times[rows])
+    cand = np.flatnonzero(earlier)
+    # Highest ratio per row: sort by (row, ratio) and take the last per row
+    order = cand[np.lexsort((ratio[cand], rows[cand]))]
+    if len(order):
+        last = np.r_[rows[order][1:] != rows[order][:-1], True]
+        for r, c in zip(rows[order][last].tolist(), cols[order][last].tolist()):
+            suggested[r] = ids[c]
+
+    coverage = np.bincount(cols, weights=ratio, minlength=n)
+    # With min_ratio a pair may be kept in one direction only; either counts
+    connected = (np.bincount(rows, minlength=n) + np.bincount(cols, minlength=n)) > 0
+    return {
+        "ids": ids,
+        "rows": rows.tolist(),
+        "cols": cols.tolist(),
+        "ratio": ratio.tolist(),
+        "iou": iou.tolist(),
+        "suggested_reference": dict(zip(ids, suggested)),
+        "best_reference": ids[int(np.argmax(coverage))] if n and coverage.any() else None,
+        "isolated": [ids[i] for i in np.flatnonzero(~connected).tolist()],
+    }
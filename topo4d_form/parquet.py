@@ -0,0 +1,371 @@
+import importlib.util
+import json
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Columnar export of items in the spirit of stac-geoparquet: one row per item,
+# geometry as WKB, bbox as a struct, datetime as a timestamp and the topo4d
+# properties as typed (struct) columns. Values that do not fit their typed
+# column are kept as JSON in an overflow column, so every item round-trips.
+
+ROW_GROUP_SIZE = 10_000
+
+
+@lru_cache(maxsize=None)
+def pyarrow_available() -> bool:
+    """True if pyarrow (an optional dependency) can be imported."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _require_pyarrow():
+    if not pyarrow_available():
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow")
+
+
+class _Skip(Exception):
+    """Value does not fit its typed column; it goes to the overflow column."""
+
+
+def _str(v):
+    if not isinstance(v, str):
+        raise _Skip
+    return v
+
+
+def _float(v):
+    if type(v) is not float:
+        raise _Skip
+    return v
+
+
+def _floats(v) -> bool:
+    return set(map(type, v)) == _FLOAT_ONLY
+
+
+_FLOAT_ONLY = {float}
+
+
+def _matrix(v):
+    # {"values": flat, "rows": n}; rows == 0 marks a plain vector
+    if isinstance(v, list) and v:
+        if isinstance(v[0], list):
+            if set(map(type, v)) == {list} and len(set(map(len, v))) == 1:
+                values = [x for r in v for x in r]
+                if values and _floats(values):
+                    return {"values": values, "rows": len(v)}
+        elif _floats(v):
+            return {"values": v, "rows": 0}
+    raise _Skip
+
+
+def _unmatrix(d):
+    values, rows = d["values"], d["rows"]
+    if not rows:
+        return values
+    cols = len(values) // rows
+    return [values[i * cols:(i + 1) * cols] for i in range(rows)]
+
+
+def _json(v):
+    if not isinstance(v, dict):
+        raise _Skip
+    return json.dumps(v)
+
+
+def _struct(fields: Dict[str, Tuple[Callable, Callable]]):
+    """Encoder/decoder for a dict with optional, individually typed keys."""
+
+    def enc(v):
+        if not isinstance(v, dict) or not v or set(v) - set(fields):
+            raise _Skip
+        return {k: (fields[k][0](v[k]) if k in v else None) for k in fields}
+
+    def dec(d):
+        return {k: fields[k][1](x) for k, x in d.items() if x is not None}
+
+    return enc, dec
+
+
+def _ident(v):
+    return v
+
+
+_STR = (_str, _ident)
+_FLOAT = (_float, _ident)
+_MATRIX = (_matrix, _unmatrix)
+_REL = _struct({k: _STR for k in ("href", "type", "title", "rel")})
+_TRAFOMETA = _struct({
+    "reference_epoch": _REL,
+    "registration_error": _FLOAT,
+    "transformation": _MATRIX,
+    "affine_transformation": _MATRIX,
+    "rotation": _MATRIX,
+    "translation": _MATRIX,
+    "reduction_point": _MATRIX,
+})
+_PRODUCTMETA = _struct({
+    "product_name": _STR,
+    "product_level": _STR,
+    "derived_from": _REL,
+    "param": (_json, json.loads),
+})
+
+# Typed property columns: (property key, (encode, decode))
+PROPERTY_COLUMNS = [
+    ("topo4d:data_type", _STR),
+    ("topo4d:timezone", _STR),
+    ("topo4d:acquisition_mode", _STR),
+    ("topo4d:orientation", _STR),
+    ("topo4d:duration", _FLOAT),
+    ("topo4d:spatial_resolution", _FLOAT),
+    ("topo4d:positional_accuracy", _FLOAT),
+    ("topo4d:global_trafo", _MATRIX),
+    ("topo4d:trafometa", _TRAFOMETA),
+    ("topo4d:productmeta", _PRODUCTMETA),
+]
+
+_BBOX_KEYS_2D = ("xmin", "ymin", "xmax", "ymax")
+_BBOX_KEYS_3D = ("xmin", "ymin", "zmin", "xmax", "ymax", "zmax")
+
+
+@lru_cache(maxsize=None)
+def arrow_schema():
+    import pyarrow as pa
+
+    matrix = pa.struct([("values", pa.list_(pa.float64())), ("rows", pa.int32())])
+    rel = pa.struct([(k, pa.string()) for k in ("href", "type", "title", "rel")])
+    types = {
+        _STR: pa.string(),
+        _FLOAT: pa.float64(),
+        _MATRIX: matrix,
+        _TRAFOMETA: pa.struct([
+            ("reference_epoch", rel),
+            ("registration_error", pa.float64()),
+            *((k, matrix) for k in ("transformation", "affine_transformation", "rotation", "translation", "reduction_point")),
+        ]),
+        _PRODUCTMETA: pa.struct([
+            ("product_name", pa.string()),
+            ("product_level", pa.string()),
+            ("derived_from", rel),
+            ("param", pa.string()),
+        ]),
+    }
+    return pa.schema(
+        [
+            ("id", pa.string()),
+            ("stac_version", pa.string()),
+            ("stac_extensions", pa.list_(pa.string())),
+            ("geometry", pa.binary()),
+            ("bbox", pa.struct([(k, pa.float64()) for k in _BBOX_KEYS_3D])),
+            ("datetime", pa.timestamp("us", tz="UTC")),
+        ]
+        + [(key, types[codec]) for key, codec in PROPERTY_COLUMNS]
+        + [
+            ("assets", pa.string()),
+            ("links", pa.string()),
+            # Properties and top-level members without a typed column, as JSON
+            ("properties_json", pa.string()),
+            ("extra_json", pa.string()),
+        ],
+        metadata={b"topo4d_form": b'{"format": "stac-items", "version": 1}'},
+    )
+
+
+def _encode_datetime(v):
+    from datetime import datetime
+
+    from pystac.utils import datetime_to_str
+
+    if not isinstance(v, str):
+        raise _Skip
+    try:
+        dt = datetime.fromisoformat(v.replace("Z", "+00:00"))
+    except ValueError:
+        raise _Skip
+    # Only if it formats back to the exact same string
+    if dt.tzinfo is None or datetime_to_str(dt) != v:
+        raise _Skip
+    return dt
+
+
+def _encode_bbox(v):
+    if not isinstance(v, list) or len(v) not in (4, 6) or not _floats(v):
+        raise _Skip
+    keys = _BBOX_KEYS_2D if len(v) == 4 else _BBOX_KEYS_3D
+    return dict(zip(keys, v))
+
+
+def _decode_bbox(d):
+    if d.get("zmin") is None:
+        return [d[k] for k in _BBOX_KEYS_2D]
+    return [d[k] for k in _BBOX_KEYS_3D]
+
+
+def _encode_item(item: Dict[str, Any], row: Dict[str, List[Any]], geometries: List[Any]):
+    extra = {k: v for k, v in item.items() if k not in ("id", "stac_version", "stac_extensions", "geometry", "bbox", "properties", "assets", "links")}
+    row["id"].append(item["id"])
+    row["stac_version"].append(item.get("stac_version"))
+    exts = item.get("stac_extensions")
+    if exts is not None and not (isinstance(exts, list) and all(isinstance(e, str) for e in exts)):
+        extra["stac_extensions"], exts = exts, None
+    row["stac_extensions"].append(exts)
+    geometries.append(item.get("geometry"))
+    try:
+        row["bbox"].append(_encode_bbox(item["bbox"]) if "bbox" in item else None)
+    except _Skip:
+        row["bbox"].append(None)
+        extra["bbox"] = item["bbox"]
+
+    props = dict(item.get("properties") or {})
+    try:
+        row["datetime"].append(_encode_datetime(props["datetime"]) if "datetime" in props else None)
+        props.pop("datetime", None)
+    except _Skip:
+        row["datetime"].append(None)
+    for key, (enc, _) in PROPERTY_COLUMNS:
+        value = None
+        if key in props:
+            try:
+                value = enc(props[key])
+                del props[key]
+            except _Skip:
+                pass
+        row[key].append(value)
+    row["assets"].append(json.dumps(item["assets"]) if "assets" in item else None)
+    row["links"].append(json.dumps(item["links"]) if "links" in item else None)
+    row["properties_json"].append(json.dumps(props) if props or "properties" in item else None)
+    row["extra_json"].append(json.dumps(extra) if extra else None)
+
+
+def _record_batch(items: List[Dict[str, Any]]):
+    import pyarrow as pa
+    import shapely
+
+    schema = arrow_schema()
+    row: Dict[str, List[Any]] = {name: [] for name in schema.names}
+    geometries: List[Any] = []
+    for item in items:
+        _encode_item(item, row, geometries)
+    # GeoJSON -> WKB for the whole batch in one call; a geometry GEOS cannot
+    # read comes back as None and is kept as JSON instead of failing the batch
+    geoms = shapely.from_geojson(
+        [json.dumps(g) if g is not None else None for g in geometries], on_invalid="ignore"
+    )
+    for i, (g, geom) in enumerate(zip(geometries, geoms)):
+        if g is not None and geom is None:
+            extra = json.loads(row["extra_json"][i]) if row["extra_json"][i] else {}
+            extra["geometry"] = g
+            row["extra_json"][i] = json.dumps(extra)
+    row["geometry"] = list(shapely.to_wkb(geoms))
+    return pa.RecordBatch.from_pydict(row, schema=schema)
+
+
+class ParquetItemWriter:
+    """Write items to a Parquet file, one row group per ``row_group_size`` items.
+
+    Only one row group of items is held in memory at a time::
+
+        with ParquetItemWriter("items.parquet") as writer:
+            for item in items:
+                writer.write(item)
+    """
+
+    def __init__(self, path, row_group_size: int = ROW_GROUP_SIZE, compression: str = "zstd"):
+        _require_pyarrow()
+        import pyarrow.parquet as pq
+
+        self.row_group_size = row_group_size
+        self.count = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._writer = pq.ParquetWriter(path, arrow_schema(), compression=compression)
+
+    def write(self, item: Dict[str, Any]):
+        self._buffer.append(item)
+        if len(self._buffer) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._writer.write_batch(_record_batch(self._buffer), row_group_size=self.row_group_size)
+            self.count += len(self._buffer)
+            self._buffer = []
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def write_parquet(items: Iterable[Dict[str, Any]], path, row_group_size: int = ROW_GROUP_SIZE) -> int:
+    """Stream ``items`` (STAC Item dicts) to a Parquet file. Returns the count."""
+    with ParquetItemWriter(path, row_group_size) as writer:
+        for item in items:
+            writer.write(item)
+    return writer.count
+
+
+def _decode_rows(batch) -> Iterator[Dict[str, Any]]:
+    import shapely
+    from pystac.utils import datetime_to_str
+
+    cols = batch.to_pydict()
+    geojson = shapely.to_geojson(shapely.from_wkb(cols["geometry"]))
+    for i in range(batch.num_rows):
+        extra = json.loads(cols["extra_json"][i]) if cols["extra_json"][i] else {}
+        item: Dict[str, Any] = {}
+        if "type" in extra:
+            item["type"] = extra.pop("type")
+        if cols["stac_version"][i] is not None:
+            item["stac_version"] = cols["stac_version"][i]
+        if cols["stac_extensions"][i] is not None:
+            item["stac_extensions"] = cols["stac_extensions"][i]
+        item["id"] = cols["id"][i]
+        item["geometry"] = json.loads(geojson[i]) if geojson[i] is not None else None
+        if cols["bbox"][i] is not None:
+            item["bbox"] = _decode_bbox(cols["bbox"][i])
+        props = json.loads(cols["properties_json"][i]) if cols["properties_json"][i] is not None else None
+        if cols["datetime"][i] is not None:
+            props = props if props is not None else {}
+            props["datetime"] = datetime_to_str(cols["datetime"][i])
+        for key, (_, dec) in PROPERTY_COLUMNS:
+            if cols[key][i] is not None:
+                props = props if props is not None else {}
+                props[key] = dec(cols[key][i])
+        if props is not None:
+            item["properties"] = props
+        if cols["links"][i] is not None:
+            item["links"] = json.loads(cols["links"][i])
+        if cols["assets"][i] is not None:
+            item["assets"] = json.loads(cols["assets"][i])
+        item.update(extra)
+        yield item
+
+
+def iter_parquet_items(path) -> Iterator[Dict[str, Any]]:
+    """Read items written by ``write_parquet`` back, one row group at a time."""
+    _require_pyarrow()
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(path)
+    for i in range(pf.num_row_groups):
+        yield from _decode_rows(pf.read_row_group(i))
+
+
+def read_parquet_table(path, columns: Optional[List[str]] = None):
+    """The raw Arrow table, optionally only some ``columns``, for analytics
+    that do not need item dicts (e.g. ``["id", "datetime", "bbox"]``)."""
+    _require_pyarrow()
+    import pyarrow.parquet as pq
+
+    return pq.read_table(path, columns=columns)
+
+
+def read_parquet(path) -> List[Dict[str, Any]]:
+    """All items of a file written by ``write_parquet``."""
+    return list(iter_parquet_items(path))
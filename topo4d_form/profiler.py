@@ -0,0 +1,170 @@
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+# Opt-in: set TOPO4D_PROFILE_SLOW_MS to profile handlers and keep the profiles
+# of requests slower than that many milliseconds.
+SLOW_MS = float(os.environ["TOPO4D_PROFILE_SLOW_MS"]) if os.environ.get("TOPO4D_PROFILE_SLOW_MS") else None
+INTERVAL = float(os.environ.get("TOPO4D_PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_DIR = os.environ.get("TOPO4D_PROFILE_DIR", "profiles")
+KEEP = int(os.environ.get("TOPO4D_PROFILE_KEEP", "100"))
+
+_NAME_RE = re.compile(r"^[\w.-]+$")
+
+
+def is_enabled() -> bool:
+    return SLOW_MS is not None
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(frame) -> str:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+class _Sampler:
+    """Samples the stacks of registered threads from one background thread.
+
+    The thread only runs while at least one request is being profiled.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._threads: Dict[int, Counter] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, ident: int) -> Counter:
+        counts: Counter = Counter()
+        with self._lock:
+            self._threads[ident] = counts
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="topo4d-profiler", daemon=True)
+                self._thread.start()
+        return counts
+
+    def remove(self, ident: int):
+        with self._lock:
+            self._threads.pop(ident, None)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._threads:
+                    self._thread = None
+                    return
+                threads = list(self._threads.items())
+            frames = sys._current_frames()
+            for ident, counts in threads:
+                frame = frames.get(ident)
+                if frame is not None:
+                    counts[_collapse(frame)] += 1
+            del frames
+            time.sleep(self.interval)
+
+
+_sampler = _Sampler(INTERVAL)
+
+
+def _save(route: str, elapsed: float, counts: Counter, meta: Dict[str, Any]) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    slug = re.sub(r"\W+", "_", route).strip("_") or "root"
+    name = f"{time.strftime('%Y%m%dT%H%M%S')}-{slug}-{uuid4().hex[:8]}"
+    # Collapsed stacks ("frame;frame;frame count"), readable by flamegraph.pl
+    # and importable in speedscope
+    with open(os.path.join(PROFILE_DIR, name + ".collapsed"), "w") as f:
+        for stack, n in counts.most_common():
+            f.write(f"{stack} {n}\n")
+    info = dict(
+        meta,
+        name=name,
+        route=route,
+        elapsed_ms=round(elapsed * 1000, 1),
+        threshold_ms=SLOW_MS,
+        samples=sum(counts.values()),
+        interval_ms=INTERVAL * 1000,
+        created=time.time(),
+    )
+    with open(os.path.join(PROFILE_DIR, name + ".json"), "w") as f:
+        json.dump(info, f)
+    _prune()
+    return name
+
+
+def _prune():
+    metas = sorted(
+        (p for p in os.listdir(PROFILE_DIR) if p.endswith(".json")), reverse=True
+    )
+    for old in metas[KEEP:]:
+        for ext in (".json", ".collapsed"):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, old[: -len(".json")] + ext))
+            except OSError:
+                pass
+
+
+def profile_slow(route: str, meta: Optional[Callable[..., Dict[str, Any]]] = None):
+    """Decorate a sync handler to keep a sampling profile when it is slow.
+
+    ``meta`` is called with the handler's arguments, only for slow requests,
+    and returns extra fields stored next to the profile.
+    """
+
+    def decorator(f):
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            if SLOW_MS is None:
+                return f(*args, **kwargs)
+            ident = threading.get_ident()
+            counts = _sampler.add(ident)
+            t0 = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - t0
+                _sampler.remove(ident)
+                if elapsed * 1000 >= SLOW_MS:
+                    try:
+                        _save(route, elapsed, counts, meta(*args, **kwargs) if meta else {})
+                    except Exception:
+                        pass
+
+        return wrapper
+
+    return decorator
+
+
+def recent_profiles(limit: int = 50) -> List[Dict[str, Any]]:
+    """Metadata of the most recent saved profiles, newest first."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    out = []
+    for p in sorted((p for p in os.listdir(PROFILE_DIR) if p.endswith(".json")), reverse=True)[:limit]:
+        try:
+            with open(os.path.join(PROFILE_DIR, p)) as f:
+                out.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return out
+
+
+def profile_path(name: str) -> Optional[str]:
+    """Path of the collapsed-stack file for ``name``, or None if unknown."""
+    if not _NAME_RE.match(name):
+        return None
+    path = os.path.join(PROFILE_DIR, name + ".collapsed")
+    return path if os.path.isfile(path) else None
@@ -0,0 +1,373 @@
+import importlib.util
+import io
+import logging
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, Tuple
+
+# Full point passes over LAS/LAZ files, for exact extents, point counts and
+# GPS time ranges when headers cannot be trusted. Off by default; set
+# TOPO4D_LAS_SCAN to "xyz", "gps_time" or "xyz,gps_time" to scan uploads.
+SCAN_DIMS = tuple(d.strip() for d in os.environ.get("TOPO4D_LAS_SCAN", "").split(",") if d.strip())
+# "lazrs-parallel" decodes the chunk table in TOPO4D_LAZ_WORKERS processes,
+# "lazrs" decodes it in the calling thread and "laszip" goes through laspy
+LAZ_BACKEND = os.environ.get("TOPO4D_LAZ_BACKEND", "lazrs-parallel")
+LAZ_WORKERS = int(os.environ.get("TOPO4D_LAZ_WORKERS", os.cpu_count() or 1))
+# Points decoded per task: enough to amortize a task, small enough to
+# balance the workers and bound the memory of each
+TASK_POINTS = 2_000_000
+
+_BACKENDS = ("lazrs-parallel", "lazrs", "laszip")
+_DIMS = ("xyz", "gps_time")
+
+
+logger = logging.getLogger(__name__)
+
+
+class ScanError(ValueError):
+    pass
+
+
+@lru_cache(maxsize=None)
+def laszip_available() -> bool:
+    """True if the laszip bindings laspy needs for the "laszip" backend can be imported."""
+    return importlib.util.find_spec("laszip") is not None
+
+
+@lru_cache(maxsize=None)
+def _available_backend(backend: str) -> str:
+    # Checked once per backend, so a missing module is reported once
+    if backend == "laszip" and not laszip_available():
+        logger.warning("LAZ backend 'laszip' is not installed (pip install laszip); using 'lazrs' instead")
+        return "lazrs"
+    return backend
+
+
+def _selection(dims: Sequence[str]):
+    """laspy decompression selection for ``dims``; XY (and returns) are always decoded."""
+    import laspy  # type: ignore
+
+    sel = laspy.DecompressionSelection.XY_RETURNS_CHANNEL
+    if "xyz" in dims:
+        sel |= laspy.DecompressionSelection.Z
+    if "gps_time" in dims:
+        sel |= laspy.DecompressionSelection.GPS_TIME
+    return sel
+
+
+def _gps_offset(hdr: Any) -> Optional[int]:
+    """Byte offset of gps_time in the point records, None if the format has none."""
+    fields = hdr.point_format.dtype().fields
+    return fields["gps_time"][1] if "gps_time" in fields else None
+
+
+def _reduce(raw, size: int, gps_offset: Optional[int], dims: Sequence[str]) -> Dict[str, Any]:
+    """Point count, integer XYZ min/max and GPS time range of packed point records."""
+    import numpy as np
+
+    n = len(raw) // size
+    out: Dict[str, Any] = {"points": n}
+    if not n:
+        return out
+    if "xyz" in dims:
+        xyz = [np.ndarray((n,), "<i4", raw, i * 4, (size,)) for i in range(3)]
+        out["min"] = [int(v.min()) for v in xyz]
+        out["max"] = [int(v.max()) for v in xyz]
+    if "gps_time" in dims and gps_offset is not None:
+        gps = np.ndarray((n,), "<f8", raw, gps_offset, (size,))
+        out["gps_time"] = [float(gps.min()), float(gps.max())]
+    return out
+
+
+def _merge(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"points": sum(p["points"] for p in parts)}
+    for key, pick in (("min", min), ("max", max)):
+        values = [p[key] for p in parts if key in p]
+        if values:
+            out[key] = [pick(v[i] for v in values) for i in range(3)]
+    gps = [p["gps_time"] for p in parts if "gps_time" in p]
+    if gps:
+        out["gps_time"] = [min(g[0] for g in gps), max(g[1] for g in gps)]
+    return out
+
+
+def _decode_task(
+    path: str,
+    offset: int,
+    chunks: List[Tuple[int, int]],
+    laszip_vlr: bytes,
+    size: int,
+    gps_offset: Optional[int],
+    dims: Sequence[str],
+) -> Dict[str, Any]:
+    """Decode consecutive LAZ chunks starting at byte ``offset`` and reduce them (runs in a worker)."""
+    import lazrs  # type: ignore
+    import numpy as np
+
+    compressed = bytearray(sum(nbytes for _, nbytes in chunks))
+    with open(path, "rb") as f:
+        f.seek(offset)
+        f.readinto(compressed)
+    raw = np.zeros(sum(count for count, _ in chunks) * size, dtype=np.uint8)
+    lazrs.decompress_points_with_chunk_table(compressed, laszip_vlr, raw, chunks, _selection(dims).to_lazrs())
+    return _reduce(raw, size, gps_offset, dims)
+
+
+_scan_pool: Optional[ProcessPoolExecutor] = None
+_scan_pool_workers = 0
+
+
+def get_scan_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool for chunk decoding, created on first use and resized on demand.
+
+    lazrs holds the GIL while decompressing, so threads would decode one
+    chunk at a time. Workers are spawned rather than forked, as the app runs
+    threads of its own.
+    """
+    global _scan_pool, _scan_pool_workers
+    if _scan_pool is None or _scan_pool_workers != workers:
+        import multiprocessing
+
+        if _scan_pool is not None:
+            _scan_pool.shutdown(wait=False)
+        _scan_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        _scan_pool_workers = workers
+    return _scan_pool
+
+
+def _drop_scan_pool() -> None:
+    """Forget a broken pool, so that ``get_scan_pool`` starts a new one."""
+    global _scan_pool
+    if _scan_pool is not None:
+        _scan_pool.shutdown(wait=False)
+    _scan_pool = None
+
+
+def _chunk_table(path: str, hdr: Any) -> Optional[Tuple[int, List[Tuple[int, int]]]]:
+    """Start of the first chunk and ``(point_count, byte_size)`` of each chunk, or None without a usable table."""
+    import lazrs  # type: ignore
+
+    laszip = hdr.vlrs.get("LasZipVlr")
+    if not laszip:
+        return None
+    with open(path, "rb") as f:
+        f.seek(hdr.offset_to_point_data)
+        try:
+            table = lazrs.read_chunk_table(f, lazrs.LazVlr(laszip[0].record_data))
+        except Exception:
+            # Missing (e.g. the writer was interrupted) or truncated table
+            return None
+        start = f.tell()
+    if not table or sum(count for count, _ in table) < hdr.point_count:
+        return None
+    return start, [(int(c), int(b)) for c, b in table]
+
+
+def _scan_chunks(path: str, hdr: Any, start: int, table, dims: Sequence[str], workers: int) -> Dict[str, Any]:
+    """Decode the chunks of ``table`` in tasks, in ``workers`` processes or in this one if 1."""
+    laszip = hdr.vlrs.get("LasZipVlr")[0].record_data
+    size = hdr.point_format.size
+    gps_offset = _gps_offset(hdr)
+
+    tasks, task, task_points, offset = [], [], 0, start
+    for count, nbytes in table:
+        task.append((count, nbytes))
+        task_points += count
+        if task_points >= TASK_POINTS:
+            tasks.append((offset, task))
+            offset += sum(b for _, b in task)
+            task, task_points = [], 0
+    if task:
+        tasks.append((offset, task))
+    if workers == 1:
+        return _merge([_decode_task(path, o, t, laszip, size, gps_offset, dims) for o, t in tasks])
+    # A worker that dies (e.g. killed for its memory) breaks the whole pool,
+    # which then refuses all further work: start a new one and retry once
+    for attempt in range(2):
+        pool = get_scan_pool(workers)
+        try:
+            futures = [pool.submit(_decode_task, path, o, t, laszip, size, gps_offset, dims) for o, t in tasks]
+            return _merge([f.result() for f in futures])
+        except BrokenProcessPool:
+            _drop_scan_pool()
+            if attempt:
+                raise
+
+
+def _scan_las(path: str, hdr: Any, dims: Sequence[str]) -> Dict[str, Any]:
+    """Reduce an uncompressed file through a memory map.
+
+    The point count comes from the size of the point data block (up to the
+    first EVLR), not from the header, which may be stale.
+    """
+    import numpy as np
+
+    size = hdr.point_format.size
+    end = getattr(hdr, "start_of_first_evlr", 0) or os.path.getsize(path)
+    n = max(0, end - hdr.offset_to_point_data) // size
+    if not n:
+        return {"points": 0}
+    gps_offset = _gps_offset(hdr)
+    raw = np.memmap(path, dtype=np.uint8, mode="r", offset=hdr.offset_to_point_data, shape=(n * size,))
+    step = TASK_POINTS * size
+    return _merge([_reduce(raw[i : i + step], size, gps_offset, dims) for i in range(0, n * size, step)])
+
+
+class _NoChunkTable(io.RawIOBase):
+    """LAZ point data whose chunk table offset points at an empty table.
+
+    Lets lazrs decode files that lost their chunk table (e.g. the writer was
+    interrupted) sequentially; it needs a readable table to start with.
+    """
+
+    _TABLE = struct.pack("<II", 0, 0)  # version 0, no chunks
+
+    def __init__(self, f: BinaryIO, start: int, end: int):
+        self._f = f
+        self._start = start
+        self._end = end
+        self._offset = struct.pack("<q", end)
+        self._pos = start
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self._end + len(self._TABLE)}[whence]
+        self._pos = base + offset
+        return self._pos
+
+    def readinto(self, b) -> int:
+        pos = self._pos
+        if self._start <= pos < self._start + 8:
+            data = self._offset[pos - self._start : pos - self._start + len(b)]
+        elif pos >= self._end:
+            data = self._TABLE[pos - self._end : pos - self._end + len(b)]
+        else:
+            # Stop short of the bytes served from memory
+            stop = self._start if pos < self._start else self._end
+            self._f.seek(pos)
+            data = self._f.read(min(len(b), stop - pos))
+        b[: len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+
+def _scan_no_table(path: str, hdr: Any, dims: Sequence[str]) -> Dict[str, Any]:
+    import lazrs  # type: ignore
+    import numpy as np
+
+    laszip = hdr.vlrs.get("LasZipVlr")[0].record_data
+    if lazrs.LazVlr(laszip).uses_variable_size_chunks():
+        raise ScanError("LAZ file with variable-size chunks has no chunk table")
+    size = hdr.point_format.size
+    gps_offset = _gps_offset(hdr)
+    parts = []
+    with open(path, "rb") as f:
+        source = _NoChunkTable(f, hdr.offset_to_point_data, os.path.getsize(path))
+        source.seek(hdr.offset_to_point_data)
+        decompressor = lazrs.LasZipDecompressor(source, laszip, _selection(dims).to_lazrs())
+        # Without a table the header's point count is all there is to go by
+        remaining = hdr.point_count
+        while remaining > 0:
+            n = min(TASK_POINTS, remaining)
+            raw = np.zeros(n * size, dtype=np.uint8)
+            decompressor.decompress_many(raw)
+            parts.append(_reduce(raw, size, gps_offset, dims))
+            remaining -= n
+    return _merge(parts)
+
+
+def _scan_laszip(path: str, hdr: Any, dims: Sequence[str]) -> Dict[str, Any]:
+    import laspy  # type: ignore
+
+    gps_offset = _gps_offset(hdr)
+    parts = []
+    with laspy.open(path, laz_backend=laspy.LazBackend.Laszip, decompression_selection=_selection(dims)) as reader:
+        for points in reader.chunk_iterator(TASK_POINTS):
+            raw = points.array.view("u1").reshape(-1)
+            parts.append(_reduce(raw, hdr.point_format.size, gps_offset, dims))
+    return _merge(parts)
+
+
+def scan_points(
+    path: str,
+    dims: Sequence[str] = ("xyz",),
+    backend: Optional[str] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Decode every point of a LAS/LAZ file for its exact extent and GPS time range.
+
+    Only the dimensions in ``dims`` ("xyz", "gps_time") are decoded from LAZ
+    files with point formats 6 to 10; older formats are always decoded whole.
+    With the "lazrs-parallel" backend (default ``LAZ_BACKEND``), the chunk
+    table is split into tasks for ``workers`` processes (default
+    ``LAZ_WORKERS``); "lazrs" decodes the same tasks in this process and
+    "laszip" reads the file through laspy, falling back to "lazrs" if the
+    laszip bindings are not installed. Files without a chunk table
+    (fixed-size chunks only) are decoded sequentially. The point count comes
+    from the chunk table or, for LAS, the size of the point data, so stale
+    headers do not cut the scan short. Uncompressed files are read through a
+    memory map.
+
+    Returns ``point_count``, ``xyz_min``/``xyz_max`` (with "xyz") and
+    ``gps_time_range`` (with "gps_time", if the format has GPS time) to update
+    a ``header_meta`` dict with, plus decode statistics under ``scan``.
+    """
+    import laspy  # type: ignore
+
+    backend = backend or LAZ_BACKEND
+    workers = workers or LAZ_WORKERS
+    if backend not in _BACKENDS:
+        raise ScanError(f"Unknown LAZ backend {backend!r}, expected one of {', '.join(_BACKENDS)}")
+    backend = _available_backend(backend)
+    unknown = [d for d in dims if d not in _DIMS]
+    if unknown:
+        raise ScanError(f"Unknown scan dimensions {', '.join(unknown)}, expected {' or '.join(_DIMS)}")
+
+    t0 = time.perf_counter()
+    with laspy.open(path) as reader:
+        hdr = reader.header
+    table = _chunk_table(path, hdr) if hdr.are_points_compressed else None
+    if not hdr.are_points_compressed:
+        result, used = _scan_las(path, hdr, dims), "las"
+    elif backend == "laszip":
+        result, used = _scan_laszip(path, hdr, dims), backend
+    elif table is None:
+        result, used = _scan_no_table(path, hdr, dims), "lazrs"
+    else:
+        result, used = _scan_chunks(path, hdr, *table, dims, workers if backend == "lazrs-parallel" else 1), backend
+    if used != "lazrs-parallel":
+        workers = 1
+    seconds = time.perf_counter() - t0
+
+    out: Dict[str, Any] = {"point_count": result["points"]}
+    if "min" in result:
+        lo = [result["min"][i] * hdr.scales[i] + hdr.offsets[i] for i in range(3)]
+        hi = [result["max"][i] * hdr.scales[i] + hdr.offsets[i] for i in range(3)]
+        out["xyz_min"] = [float(min(a, b)) for a, b in zip(lo, hi)]
+        out["xyz_max"] = [float(max(a, b)) for a, b in zip(lo, hi)]
+    if "gps_time" in result:
+        out["gps_time_range"] = result["gps_time"]
+    mb = (os.path.getsize(path) - hdr.offset_to_point_data) / 1e6
+    out["scan"] = {
+        "backend": used,
+        "workers": workers,
+        "dims": list(dims),
+        "chunks": len(table[1]) if table is not None else None,
+        "mb": round(mb, 1),
+        "seconds": round(seconds, 3),
+        "mb_per_s": round(mb / seconds, 1) if seconds else None,
+        "points_per_s": round(result["points"] / seconds) if seconds else None,
+    }
+    return out
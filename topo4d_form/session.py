@@ -1,13 +1,91 @@
+import json
+import os
+import threading
+import time
+import weakref
 from functools import lru_cache
 from uuid import uuid4
 
+from .metrics import Counter, Gauge, register
+
+
+class Session(dict):
+    """Session state plus a lock and a request sequence number.
+
+    The lock and sequence are attributes rather than keys so that
+    ``session.clear()`` (used by the reset button) does not drop them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = threading.RLock()
+        self.seq = 0
+
+    def next_seq(self):
+        """Claim a sequence number for a new request, superseding older ones."""
+        with self.lock:
+            self.seq += 1
+            return self.seq
+
+    def is_stale(self, seq):
+        """True if a newer request was started after ``seq`` was claimed."""
+        return seq != self.seq
+
+
+# Sessions still in memory by ID, for the session gauges on /metrics
+_live_sessions = weakref.WeakValueDictionary()
+
+
+def session_size(session):
+    """Approximate size of a session in bytes, as serialized JSON."""
+    return len(json.dumps(session, default=str))
+
+
+# Sizing serializes every session, so scrapes reuse the last total for this
+# many seconds
+SESSION_BYTES_INTERVAL = float(os.environ.get("TOPO4D_SESSION_BYTES_INTERVAL", "60"))
+_session_bytes_last = {"at": None, "value": 0}
+
+
+def _session_bytes():
+    now = time.monotonic()
+    last = _session_bytes_last
+    if last["at"] is None or now - last["at"] >= SESSION_BYTES_INTERVAL:
+        last["value"] = sum(session_size(s) for s in list(_live_sessions.values()))
+        last["at"] = now
+    return {(): last["value"]}
+
+
+def _session_cache_counts():
+    info = get_session_by_id.cache_info()
+    return {("hit",): info.hits, ("miss",): info.misses}
+
+
+register(Gauge(
+    "topo4d_sessions",
+    "Sessions held in the in-memory session cache.",
+    collect=lambda: {(): get_session_by_id.cache_info().currsize},
+))
+register(Gauge(
+    "topo4d_session_bytes",
+    "Approximate JSON size of all sessions in memory, updated at most every TOPO4D_SESSION_BYTES_INTERVAL seconds.",
+    collect=_session_bytes,
+))
+register(Counter(
+    "topo4d_session_cache_lookups_total",
+    "Session cache lookups by result (a miss creates a new, empty session).",
+    labelnames=("result",),
+    collect=_session_cache_counts,
+))
+
 
 # create an in-memory cache for sessions to be looked up by the ID
 # we will store in the browser cookie via FastHTML's session object.
 # put a max of 100 active sessions to avoid unbounded memory usage.
 @lru_cache(maxsize=100)
 def get_session_by_id(id):
-    session = dict()
+    session = Session()
+    _live_sessions[id] = session
     session.setdefault("stac_format_d", {})
     session.setdefault("form_format_d", {})
     session["form_format_d"].setdefault("assets", {})
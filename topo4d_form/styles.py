@@ -22,3 +22,5 @@ tab_style = {
 }
 
 tab_spacer_style = f"border-bottom: 1px solid {tab_border_color}; flex: 1 0 auto;"
+
+json_stub_style = "display: inline; cursor: pointer; color: #999;"
@@ -1,14 +1,24 @@
 from fasthtml.common import *
+import itertools
 import json
 import os
+from functools import lru_cache
+from urllib.parse import urlencode
 
 from .styles import *
+from .fields import FIELDS, SECTIONS
 from .validation import model_required_keys
-from .make_item import (
-    construct_topo4d_properties,
-    construct_assets,
-    create_pystac_item,
-)
+from .make_item import build_item
+from .jsonpatch import parse_pointer, to_pointer
+
+# The JSON preview shows arrays and objects with more entries than this, and
+# strings longer than PREVIEW_MAX_CHARS, as stubs that load on expand; each
+# expanded stub shows the same number of entries (or characters) at a time
+PREVIEW_MAX_ITEMS = int(os.environ.get("TOPO4D_PREVIEW_MAX_ITEMS", "100"))
+PREVIEW_MAX_CHARS = int(os.environ.get("TOPO4D_PREVIEW_MAX_CHARS", "2000"))
+# Entries shown per preview or expanded stub in total; containers past it
+# are stubs too, so the preview stays bounded however big the item is
+PREVIEW_MAX_VALUES = int(os.environ.get("TOPO4D_PREVIEW_MAX_VALUES", "2000"))
 
 
 ######################
@@ -22,7 +32,17 @@ def inputTemplate(
     error_msg=None,
     input_type="text",
     canValidateInline=False,
+    suggest_url=None,
 ):
+    # With suggest_url, typing fetches <option>s for a datalist from that URL
+    suggest = dict(
+        list=f"{name}_options",
+        hx_get=suggest_url,
+        hx_trigger="input changed delay:150ms",
+        hx_target=f"#{name}_options",
+        hx_swap="innerHTML",
+        autocomplete="off",
+    ) if suggest_url else {}
     return Div(
         hx_target="this",
         hx_swap="outerHTML",
@@ -38,7 +58,9 @@ def inputTemplate(
             value=f"{val}",
             hx_post=f"/{name.lower()}" if canValidateInline else None,
             style=text_input_style,
+            **suggest,
         ),
+        Datalist(id=f"{name}_options") if suggest_url else None,
         Div(f"{error_msg}", style="color: red;") if error_msg else None,
     )
 
@@ -221,7 +243,8 @@ def trueFalseRadioTemplate(label, name, error_msg=None):
     )
 
 
-def relObjectTemplate(label, name, error_msg=None, href="", type_="", title=""):
+def relObjectTemplate(label, name, error_msg=None, href="", type_="", title="", suggest=False):
+    # suggest: autocomplete the href from the local item index
     return Div(
         labelDecoratorTemplate(Label(label), name in model_required_keys),
         inputTemplate(
@@ -230,6 +253,7 @@ def relObjectTemplate(label, name, error_msg=None, href="", type_="", title=""):
             val=href,
             placeholder="A link to the related object",
             input_type="text",
+            suggest_url=f"/suggest_href/{name}" if suggest else None,
         ),
         inputTemplate(
             label="type",
@@ -250,6 +274,43 @@ def relObjectTemplate(label, name, error_msg=None, href="", type_="", title=""):
     )
 
 
+def fieldTemplate(field, val=None, options=None):
+    """The input(s) for a registry field (see ``fields.FIELDS``)."""
+    if field.kind.startswith("rel"):
+        return relObjectTemplate(label=field.label, name=field.name, suggest=field.suggest)
+    val = field.default if val is None else val
+    if field.select:
+        return selectEnumTemplate(
+            label=field.label, options=options or field.options, name=field.name, value=val
+        )
+    return inputTemplate(
+        label=field.label,
+        name=field.name,
+        placeholder=field.placeholder,
+        val=val,
+        input_type="number" if field.kind == "float" else "text",
+    )
+
+
+def fieldsTemplate(values=None, options=None):
+    """All form fields of the registry, with a heading per nested object.
+
+    ``values`` and ``options`` override field defaults and select options by
+    field name, for values only known at render time.
+    """
+    values, options = values or {}, options or {}
+    out = []
+    section = None
+    for field in FIELDS:
+        if field.label is None:
+            continue
+        if field.path[0] in SECTIONS and field.path[0] != section:
+            section = field.path[0]
+            out.append(H4(SECTIONS[section]))
+        out.append(fieldTemplate(field, values.get(field.name), options.get(field.name)))
+    return out
+
+
 def labelDecoratorTemplate(label, isRequired):
     required_indicator = Span("*", style="color: red; margin-right: 5px;")
     return Div(
@@ -264,14 +325,119 @@ def outputTemplate():
     )
 
 
-def prettyJsonTemplate(obj):
+def prettyJsonTemplate(obj, src=None):
+    """``obj`` as indented JSON.
+
+    With ``src`` (a path serving ``jsonPreviewFragment`` for the same
+    object), large values are elided into stubs that load from it on expand.
+    """
+    if src is None:
+        content = [json.dumps(obj, indent=4)]
+    else:
+        content = jsonPreviewFragment(obj, src)
     return Div(
         Div(
-            Pre(json.dumps(obj, indent=4), style="padding: 10px;"),
+            Pre(*content, style="padding: 10px;"),
         ),
     )
 
 
+def _json_stub(value, src, pointer):
+    if isinstance(value, list):
+        label = f"[ {len(value)} items ]"
+    elif isinstance(value, dict):
+        label = f"{{ {len(value)} keys }}"
+    else:
+        label = f'"{len(value)} characters"'
+    return Details(
+        Summary(label, style=json_stub_style),
+        Span(_class="json-stub"),
+        hx_get=f"{src}?{urlencode({'path': pointer})}",
+        hx_trigger="toggle once",
+        hx_target="find .json-stub",
+        style="display: inline;",
+    )
+
+
+def _json_more(count, unit, src, pointer, start):
+    # Replaced by the next page of a value that is already expanded
+    return Span(
+        f"... {count} more {unit}",
+        hx_get=f"{src}?{urlencode({'path': pointer, 'start': start})}",
+        hx_trigger="click",
+        hx_swap="outerHTML",
+        style=json_stub_style,
+    )
+
+
+def _json_value(value, src, pointer, level, out, budget):
+    """Append ``value`` as ``json.dumps(indent=4)`` would at ``level``, eliding large values.
+
+    Returns the number of entries that may still be shown.
+    """
+    if isinstance(value, str) and len(value) > PREVIEW_MAX_CHARS:
+        out.append(_json_stub(value, src, pointer))
+    elif isinstance(value, (list, dict)) and value:
+        if len(value) > min(PREVIEW_MAX_ITEMS, budget):
+            out.append(_json_stub(value, src, pointer))
+        else:
+            budget = _json_entries(value, src, pointer, level, out, budget, 0)
+    else:
+        out.append(json.dumps(value))
+    return budget
+
+
+def _json_entries(value, src, pointer, level, out, budget, start):
+    """Append up to ``PREVIEW_MAX_ITEMS`` entries of a container from ``start``.
+
+    The opening bracket comes with the first page and the closing one with
+    the last; other pages end in a link to the next.
+    """
+    is_dict = isinstance(value, dict)
+    stop = min(len(value), start + PREVIEW_MAX_ITEMS)
+    budget -= stop - start
+    pad = "\n" + " " * 4 * (level + 1)
+    if start == 0:
+        out.append("{" if is_dict else "[")
+    entries = value.items() if is_dict else enumerate(value)
+    for i, (key, child) in enumerate(itertools.islice(entries, start, stop), start):
+        # A later page continues after the padding before its link
+        out.append(("," + pad if i > start else pad if i == 0 else "") + (json.dumps(key) + ": " if is_dict else ""))
+        budget = _json_value(child, src, pointer + to_pointer((key,)), level + 1, out, budget)
+    if stop < len(value):
+        out.append("," + pad)
+        out.append(_json_more(len(value) - stop, "keys" if is_dict else "items", src, pointer, stop))
+    else:
+        out.append("\n" + " " * 4 * level + ("}" if is_dict else "]"))
+    return budget
+
+
+def jsonPreviewFragment(value, src, pointer="", start=0):
+    """Preview of ``value``, found at ``pointer`` in the previewed object and indented to its depth.
+
+    The whole value from the top of the preview or a stub, or a page of it
+    from ``start`` for the "more" links. Returns strings and stub components
+    to place in a ``Pre``.
+    """
+    level = len(parse_pointer(pointer))
+    out = []
+    if isinstance(value, str) and len(value) > PREVIEW_MAX_CHARS:
+        text = json.dumps(value)
+        stop = start + PREVIEW_MAX_CHARS
+        out.append(text[start:stop])
+        if stop < len(text):
+            out.append(_json_more(len(text) - stop, "characters", src, pointer, stop))
+    elif isinstance(value, (list, dict)) and value:
+        _json_entries(value, src, pointer, level, out, PREVIEW_MAX_VALUES, start)
+    else:
+        out.append(json.dumps(value))
+    # Runs of text as one string each
+    merged = []
+    for is_text, parts in itertools.groupby(out, key=lambda p: isinstance(p, str)):
+        merged.extend(["".join(parts)] if is_text else parts)
+    return merged
+
+
 def error_template(msg):
     return Div(
         msg,
@@ -279,59 +445,48 @@ def error_template(msg):
     )
 
 
-copy_js_file_path = os.path.join(
-    os.path.dirname(__file__), "js", "copy_to_clipboard.js"
-)
-copy_js = None
-with open(copy_js_file_path, "r") as file:
-    copy_js = file.read()
+@lru_cache(maxsize=None)
+def read_js(name):
+    """Contents of a file in ``js/``, read on first use."""
+    with open(os.path.join(os.path.dirname(__file__), "js", name), "r") as file:
+        return file.read()
 
 
-def copy_to_clipboard_button(item):
+def copy_to_clipboard_button(item, src="/item_json"):
+    # The JSON is fetched from src on click, so responses do not grow with the item
     return Button(
         "Copy JSON",
         style="margin-left: 10px; min-width: 120px;",
-        onclick=copy_js,
-        data_clipboard_text=(json.dumps(item, indent=2) if item else ""),
+        onclick=read_js("copy_to_clipboard.js"),
+        hx_post="/index_item",
+        hx_swap="none",
+        data_src=src,
         disabled=(item is None),
     )
 
 
-download_js_file_path = os.path.join(
-    os.path.dirname(__file__), "js", "download_to_file.js"
-)
-download_js = None
-with open(download_js_file_path, "r") as file:
-    download_js = file.read()
-
-
-def download_button(item):
+def download_button(item, src="/item_json"):
     model_name = None
     if item:
         model_name = item.get("id") or item.get("title") or item.get("properties", {}).get("topo4d:data_type")
     return Button(
         "Download JSON",
         style="margin-left: 10px;",
-        onclick=download_js,
+        onclick=read_js("download_to_file.js"),
+        hx_post="/index_item",
+        hx_swap="none",
         data_file_name=f"{model_name if model_name else 'item'}.json",
-        data_file_content=(json.dumps(item, indent=2) if item else ""),
+        data_src=src,
         disabled=(item is None),
     )
 
 
-def button_bar(session):
-    item = None
+def button_bar(session, item=None):
+    # Handlers that already built the item pass it in to avoid building it twice
     d = session["stac_format_d"]
-    if d:
+    if item is None and d:
         try:
-            ml_model_metadata = construct_topo4d_properties(d)
-            assets = construct_assets(d.get("assets"))
-            item = create_pystac_item(
-                ml_model_metadata,
-                assets,
-                geometry=d.get("geometry"),
-                bbox=d.get("bbox"),
-            )
+            item = build_item(d)
         except:
             pass
 
@@ -347,6 +502,7 @@ def button_bar(session):
             id="lasfile-input",
             name="lasfile",
             accept=".las,.laz",
+            multiple=True,
             style="display:none;",
             onchange="this.form.requestSubmit()",
         ),
@@ -0,0 +1,246 @@
+import posixpath
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .matrix import MatrixParseError, parse_matrix
+
+TRAFOMETA = "topo4d:trafometa"
+
+
+class TrafoChainError(ValueError):
+    pass
+
+
+def _error(item_id: str, path: str, message: str, keyword: str) -> Dict[str, Any]:
+    return {"id": item_id, "path": path, "message": message, "keyword": keyword}
+
+
+def epoch_transform(trafometa: Dict[str, Any]):
+    """The 4x4 transformation of one epoch to its reference epoch.
+
+    Uses ``transformation`` if present, otherwise ``rotation`` and
+    ``translation``. A ``reduction_point`` p is applied around the matrix M,
+    i.e. ``x' = M (x - p) + p``. Returns None if the epoch has no transform.
+    """
+    import numpy as np
+
+    m = parse_matrix(trafometa.get("transformation"), (4, 4))
+    if m is not None:
+        m = np.asarray(m)
+        if m.shape != (4, 4):
+            raise MatrixParseError(f"expected a single 4x4 transformation, got a stack of {m.shape[0] // 4}")
+    else:
+        rot = parse_matrix(trafometa.get("rotation"), (3, 3))
+        trans = parse_matrix(trafometa.get("translation"), (3,))
+        if rot is None and trans is None:
+            return None
+        m = np.eye(4)
+        if rot is not None:
+            if np.shape(rot) != (3, 3):
+                raise MatrixParseError("expected a single 3x3 rotation")
+            m[:3, :3] = rot
+        if trans is not None:
+            if np.shape(trans) != (3,):
+                raise MatrixParseError("expected a single translation vector")
+            m[:3, 3] = trans
+    p = parse_matrix(trafometa.get("reduction_point"), (3,))
+    if p is not None:
+        if np.shape(p) != (3,):
+            raise MatrixParseError("expected a single reduction point")
+        p = np.asarray(p)
+        m = m.copy()
+        m[:3, 3] += p - m[:3, :3] @ p
+    return m
+
+
+def _item_aliases(item: Dict[str, Any]) -> List[str]:
+    """Other names a reference epoch may use for ``item``: file name and self hrefs."""
+    keys = [item["id"] + ".json"]
+    links = item.get("links")
+    for link in links if isinstance(links, list) else []:
+        if isinstance(link, dict) and link.get("rel") == "self" and isinstance(link.get("href"), str) and link["href"]:
+            keys.append(link["href"])
+    return keys
+
+
+def _resolve(href: str, index: Dict[str, int]) -> Optional[int]:
+    if href in index:
+        return index[href]
+    # Relative and absolute hrefs of the same file, e.g. "./epoch.json"
+    name = posixpath.basename(href.rstrip("/"))
+    if name in index:
+        return index[name]
+    if name.endswith(".json") and name[: -len(".json")] in index:
+        return index[name[: -len(".json")]]
+    return None
+
+
+def _parents(items: Sequence[Dict[str, Any]], errors: List[Dict[str, Any]]):
+    """Parent index per item (-1 for a root) and the per-epoch transforms."""
+    import numpy as np
+
+    index: Dict[str, int] = {}
+    for i, item in enumerate(items):
+        if not item.get("id") or not isinstance(item["id"], str):
+            raise TrafoChainError(f"Item {i} has no id.")
+        if item["id"] in index:
+            raise TrafoChainError(f"Duplicate item id: {item['id']!r}")
+        index[item["id"]] = i
+    # Ids take precedence over aliases; of two equal aliases the first wins
+    for i, item in enumerate(items):
+        for key in _item_aliases(item):
+            index.setdefault(key, i)
+
+    n = len(items)
+    parent = np.full(n, -1, dtype=np.intp)
+    local = np.tile(np.eye(4), (n, 1, 1))
+    bad = np.zeros(n, dtype=bool)
+    # Nested-list transformations, the common case, are converted in one go
+    plain_idx, plain, slow = [], [], []
+    for i, item in enumerate(items):
+        props = item.get("properties") or {}
+        if not isinstance(props, dict):
+            raise TrafoChainError(f"Item {item['id']!r}: properties is not an object.")
+        trafometa = props.get(TRAFOMETA) or {}
+        path = f"properties/{TRAFOMETA}"
+        if not isinstance(trafometa, dict):
+            raise TrafoChainError(f"Item {item['id']!r}: {path} is not an object.")
+        ref = trafometa.get("reference_epoch")
+        href = ref.get("href") if isinstance(ref, dict) else ref
+        if href and not isinstance(href, str):
+            raise TrafoChainError(f"Item {item['id']!r}: {path}/reference_epoch is not an object with an href.")
+        if not href:
+            # A root: the common reference of its chain
+            continue
+        j = _resolve(href, index)
+        if j is None:
+            errors.append(
+                _error(item["id"], f"{path}/reference_epoch", f"Reference epoch {href!r} not found.", "missing_reference")
+            )
+            bad[i] = True
+            continue
+        if j == i:
+            continue
+        parent[i] = j
+        t = trafometa.get("transformation")
+        if isinstance(t, list) and trafometa.get("reduction_point") is None:
+            plain_idx.append(i)
+            plain.append(t)
+            continue
+        slow.append(i)
+    if plain:
+        try:
+            arr = np.asarray(plain, dtype=float)
+        except (TypeError, ValueError):
+            arr = None
+        if arr is not None and arr.shape[1:] == (4, 4):
+            local[plain_idx] = arr
+        else:
+            slow.extend(plain_idx)
+    for i in slow:
+        try:
+            m = epoch_transform(items[i]["properties"][TRAFOMETA])
+        except MatrixParseError as e:
+            errors.append(_error(items[i]["id"], f"properties/{TRAFOMETA}", str(e), "shape"))
+            bad[i] = True
+            continue
+        if m is not None:
+            local[i] = m
+    return parent, local, bad
+
+
+def _find_cycles(parent, bad, items, errors) -> None:
+    # Walk each chain once; state 1 = on the current walk, 2 = done
+    state = [0] * len(parent)
+    for start in range(len(parent)):
+        walk = []
+        i = start
+        while i >= 0 and state[i] == 0:
+            state[i] = 1
+            walk.append(i)
+            i = int(parent[i])
+        if i >= 0 and state[i] == 1:
+            cycle = walk[walk.index(i):]
+            ids = " -> ".join(items[k]["id"] for k in cycle + [i])
+            for k in cycle:
+                errors.append(
+                    _error(items[k]["id"], f"properties/{TRAFOMETA}/reference_epoch", f"Reference cycle: {ids}", "cycle")
+                )
+                bad[k] = True
+        for k in walk:
+            state[k] = 2
+
+
+def compose_trafo_chains(
+    items: Sequence[Dict[str, Any]], reference: Optional[str] = None
+) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
+    """Cumulative transformation of each epoch to the root of its reference chain.
+
+    ``items`` are STAC Item dicts whose ``topo4d:trafometa`` links each epoch to
+    its ``reference_epoch`` (matched by self link href, file name or id).
+    Epochs without a reference epoch are roots. Chains are composed for all
+    epochs at once by pointer jumping: every step is one batched matmul over
+    the whole set and doubles the chain length covered, so shared prefixes are
+    computed once and a chain of depth d takes log2(d) steps.
+
+    If ``reference`` names an epoch, transforms are expressed relative to it
+    instead of to the roots (epochs of other chains are reported as errors).
+
+    Returns ``({id: {"root", "depth", "transformation"}}, errors)``; epochs on
+    a cycle, with a missing or broken reference, or chained to one of those
+    are left out and get an error with ``keyword`` cycle, missing_reference
+    or shape.
+    """
+    import numpy as np
+
+    errors: List[Dict[str, Any]] = []
+    items = list(items)
+    parent, local, bad = _parents(items, errors)
+    _find_cycles(parent, bad, items, errors)
+
+    # Epochs with an error end their chain; descendants inherit the error
+    n = len(items)
+    roots = (parent < 0) | bad
+    up = np.where(roots, np.arange(n), parent)
+    cum = local.copy()
+    cum[roots] = np.eye(4)
+    depth = (~roots).astype(np.intp)
+    while not (up[up] == up).all():
+        cum = np.matmul(cum[up], cum)
+        depth = depth + depth[up]
+        up = up[up]
+    broken = bad[up] & ~bad
+    for i in np.flatnonzero(broken):
+        errors.append(
+            _error(
+                items[i]["id"],
+                f"properties/{TRAFOMETA}/reference_epoch",
+                f"Reference chain is broken at {items[up[i]]['id']!r}.",
+                "missing_reference",
+            )
+        )
+
+    ok = ~(bad | broken)
+    if reference is not None:
+        ids = [item["id"] for item in items]
+        if reference not in ids:
+            raise TrafoChainError(f"Reference epoch {reference!r} is not in the set.")
+        r = ids.index(reference)
+        if not ok[r]:
+            raise TrafoChainError(f"Reference epoch {reference!r} has no valid chain.")
+        other = ok & (up != up[r])
+        for i in np.flatnonzero(other):
+            errors.append(
+                _error(items[i]["id"], f"properties/{TRAFOMETA}/reference_epoch", f"Not chained to {reference!r}.", "missing_reference")
+            )
+        ok &= ~other
+        cum = np.matmul(np.linalg.inv(cum[r]), cum)
+
+    out: Dict[str, Dict[str, Any]] = {}
+    cum_list, up_list, depth_list = cum.tolist(), up.tolist(), depth.tolist()
+    for i in np.flatnonzero(ok).tolist():
+        out[items[i]["id"]] = {
+            "root": reference if reference is not None else items[up_list[i]]["id"],
+            "depth": depth_list[i],
+            "transformation": cum_list[i],
+        }
+    return out, errors
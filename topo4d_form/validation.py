@@ -1,31 +1,260 @@
-from jsonschema import Draft7Validator
 import json
-import requests
 import os
+from functools import lru_cache
+
 from . import TOPO4D_SCHEMA_URL
+from .fields import FIELDS
+from .metrics import span
 
-# Required keys for the UI to mark with an asterisk
-# Aligns with schema.json: require properties.datetime and topo4d:data_type
-model_required_keys = [
-    "datetime",
-    "topo4d_data_type",
-    "trafometa_reference_epoch",
+# Required keys for the UI to mark with an asterisk, as declared in the field
+# registry (aligns with schema.json: properties.datetime and topo4d:data_type)
+model_required_keys = [f.name for f in FIELDS if f.required] + [
     # Asset convenience
     "href",
 ]
 
 
-def _load_schema():
-    schema_path = TOPO4D_SCHEMA_URL
-    response = requests.get(schema_path)
-    response.raise_for_status()
-    schema = response.json()
+# A local copy of the schema (e.g. for offline runs and benchmarks) is used
+# instead of TOPO4D_SCHEMA_URL when present
+SCHEMA_PATH = os.environ.get(
+    "TOPO4D_SCHEMA_PATH", os.path.join(os.path.dirname(__file__), "schema.json")
+)
+# Otherwise the schema is downloaded once and kept here, so later starts
+# do not need network access
+SCHEMA_CACHE_DIR = os.environ.get(
+    "TOPO4D_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "topo4d_form")
+)
+
+
+def _schema_cache_path():
+    # e.g. .../topo4d/v0.2.0/schema.json -> topo4d-v0.2.0-schema.json
+    name = "-".join(TOPO4D_SCHEMA_URL.split("://", 1)[-1].split("/")[1:])
+    return os.path.join(SCHEMA_CACHE_DIR, name)
+
+
+def _download_schema() -> dict:
+    import requests
+
+    try:
+        response = requests.get(TOPO4D_SCHEMA_URL, timeout=30)
+        response.raise_for_status()
+        return response.json()
+    except (OSError, ValueError) as e:
+        raise RuntimeError(
+            f"No topo4d schema at {SCHEMA_PATH} and it could not be downloaded from "
+            f"{TOPO4D_SCHEMA_URL} ({e}); run `python -m topo4d_form fetch-schema` "
+            "where the URL is reachable or set TOPO4D_SCHEMA_PATH"
+        ) from e
+
+
+def fetch_schema(path: str = SCHEMA_PATH) -> dict:
+    """Download the schema at ``TOPO4D_SCHEMA_URL`` and write it to ``path``.
+
+    ``python -m topo4d_form fetch-schema`` runs this to put the local copy
+    at ``SCHEMA_PATH``, so validation works offline from then on.
+    """
+    schema = _download_schema()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as file:
+        json.dump(schema, file, indent=2)
+    os.replace(tmp, path)
     return schema
 
 
+def _load_schema():
+    for path in (SCHEMA_PATH, _schema_cache_path()):
+        if os.path.exists(path):
+            with open(path, "r") as file:
+                return json.load(file)
+    try:
+        return fetch_schema(_schema_cache_path())
+    except OSError:
+        # Cache not writable; use the download for this process only
+        return _download_schema()
+
+
+# The schema and validator are loaded on first use rather than at import, so
+# starting the app does not wait for jsonschema or the schema file
+@lru_cache(maxsize=None)
+def _schema():
+    return _load_schema()
+
+
+@lru_cache(maxsize=None)
+def _validator():
+    from jsonschema import Draft7Validator
+
+    return Draft7Validator(_schema())
+
+
+def topo4d_validation_errors(item_dict):
+    """Validate a full STAC Item dict against the topo4d schema.
+
+    Returns a list of ``{"path", "message", "keyword"}`` dicts, empty if valid.
+    """
+    with span("validate"):
+        return [
+            {
+                "path": "/".join([str(p) for p in e.path]),
+                "message": e.message,
+                "keyword": e.validator,
+            }
+            for e in _validator().iter_errors(item_dict)
+        ]
+
+
+class _UnsupportedSchema(Exception):
+    pass
+
 
-_SCHEMA = _load_schema()
-_VALIDATOR = Draft7Validator(_SCHEMA)
+def _local_ref(ref):
+    if not ref.startswith("#"):
+        raise _UnsupportedSchema(ref)
+    node = _schema()
+    for token in ref[1:].split("/")[1:]:
+        node = node[token.replace("~1", "/").replace("~0", "~")]
+    return node
+
+
+def _alternatives(schema, depth=0):
+    """Flatten $ref/allOf/anyOf/oneOf into alternative lists of plain schemas.
+
+    Each alternative is a list of schemas that must all hold.
+    """
+    if depth > 20:
+        raise _UnsupportedSchema("schema nesting too deep")
+    if not isinstance(schema, dict):
+        return [[]] if schema is not False else []
+    plain = {
+        k: v for k, v in schema.items() if k not in ("$ref", "allOf", "anyOf", "oneOf")
+    }
+    alts = [[plain]]
+    parts = []
+    if "$ref" in schema:
+        parts.append(_alternatives(_local_ref(schema["$ref"]), depth + 1))
+    for sub in schema.get("allOf", []):
+        parts.append(_alternatives(sub, depth + 1))
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            parts.append(
+                [alt for sub in schema[key] for alt in _alternatives(sub, depth + 1)]
+            )
+    for part in parts:
+        alts = [a + b for a in alts for b in part]
+    return alts
+
+
+def _matches_shallow(conj, instance):
+    # Cheap discriminator check used to drop oneOf/anyOf branches that clearly
+    # do not apply, e.g. the Collection branch of a STAC extension schema
+    for s in conj:
+        if "type" in s and not _validator().evolve(schema={"type": s["type"]}).is_valid(instance):
+            return False
+        if isinstance(instance, dict):
+            for k, sub in s.get("properties", {}).items():
+                if k in instance and isinstance(sub, dict):
+                    if "const" in sub and instance[k] != sub["const"]:
+                        return False
+                    if "enum" in sub and instance[k] not in sub["enum"]:
+                        return False
+    return True
+
+
+def _subschemas_at(item_dict, path):
+    """Alternative schema lists that apply to the value at ``path``."""
+    alts = _alternatives(_schema())
+    node = item_dict
+    for key in path:
+        alts = [conj for conj in alts if _matches_shallow(conj, node)]
+        child_alts = []
+        for conj in alts:
+            children = []
+            for s in conj:
+                if any(k in s for k in ("if", "dependencies", "dependentSchemas", "unevaluatedProperties", "unevaluatedItems")):
+                    raise _UnsupportedSchema(path)
+                if isinstance(node, list):
+                    if "prefixItems" in s or isinstance(s.get("items"), list):
+                        raise _UnsupportedSchema(path)
+                    if "items" in s:
+                        children.append(s["items"])
+                elif key in s.get("properties", {}):
+                    children.append(s["properties"][key])
+                elif "patternProperties" in s or isinstance(s.get("additionalProperties"), dict):
+                    raise _UnsupportedSchema(path)
+            child_alts.extend(_alternatives({"allOf": children}))
+        alts = child_alts
+        node = node[int(key)] if isinstance(node, list) else node[key]
+    return alts, node
+
+
+def topo4d_subtree_errors(item_dict, path):
+    """Validate only the value at ``path`` (a list of keys) of an item.
+
+    Walks the schema down to the subschemas that apply at ``path`` and
+    validates just that value against them, returning errors in the same
+    form as ``topo4d_validation_errors``. Falls back to validating the whole
+    item (keeping errors under ``path``) when the schema uses keywords the
+    walk cannot follow.
+    """
+    path = list(path)
+    try:
+        alts, node = _subschemas_at(item_dict, path)
+    except (_UnsupportedSchema, KeyError, IndexError, ValueError):
+        prefix = "/".join(str(p) for p in path)
+        return [
+            e for e in topo4d_validation_errors(item_dict)
+            if not prefix or e["path"] == prefix or e["path"].startswith(prefix + "/")
+        ]
+    # Subschemas may still $ref the root definitions, so keep them alongside
+    schema = _schema()
+    root = {k: schema[k] for k in ("$schema", "$id", "definitions", "$defs") if k in schema}
+    with span("validate"):
+        best = None
+        for conj in alts:
+            validator = _validator().evolve(schema=dict(root, allOf=conj))
+            errors = [
+                {
+                    "path": "/".join([str(p) for p in path + list(e.path)]),
+                    "message": e.message,
+                    "keyword": e.validator,
+                }
+                for e in validator.iter_errors(node)
+            ]
+            if not errors:
+                return []
+            if best is None or len(errors) < len(best):
+                best = errors
+    return best or []
+
+
+# Trimmed STAC 1.1.0 asset schema (the Item "asset" definition with the common
+# metadata schemas inlined), so a single asset can be checked offline
+STAC_ASSET_SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "stac_asset_schema.json")
+STAC_ITEM_SCHEMA_URL = "https://schemas.stacspec.org/v1.1.0/item-spec/json-schema/item.json"
+
+
+@lru_cache(maxsize=None)
+def _asset_validator():
+    from jsonschema import Draft7Validator
+
+    with open(STAC_ASSET_SCHEMA_PATH, "r") as file:
+        return Draft7Validator(json.load(file))
+
+
+def stac_asset_validation_error(asset_dict):
+    """Validate one STAC asset dict against the bundled asset schema.
+
+    Returns the error message in the same form as ``pystac.validation``
+    (best matching error first), or None if the asset is valid.
+    """
+    from jsonschema.exceptions import best_match
+
+    with span("validate_asset"):
+        error = best_match(_asset_validator().iter_errors(asset_dict))
+    if error is None:
+        return None
+    return f"Validation failed for Asset against schema at {STAC_ITEM_SCHEMA_URL}#/definitions/asset\n{error}"
 
 
 def validate_topo4d_item(item_dict):
@@ -33,14 +262,17 @@ def validate_topo4d_item(item_dict):
 
     Returns a user-friendly error string or None if valid.
     """
-    errors = list(_VALIDATOR.iter_errors(item_dict))
+    return format_validation_errors(topo4d_validation_errors(item_dict))
+
+
+def format_validation_errors(errors):
+    """Format structured validation errors as one user-friendly string (None if empty)."""
     if not errors:
         return None
     # Build a concise message
     msgs = []
     for e in errors:
-        path = "/".join([str(p) for p in e.path])
-        msgs.append(f"{path}: {e.message}")
+        msgs.append(f"{e['path']}: {e['message']}")
     # Deduplicate while preserving order
     seen = set()
     uniq = []
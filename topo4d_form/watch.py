@@ -0,0 +1,300 @@
+import copy
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from .las import ingest_file
+from .metrics import Counter, Gauge, Histogram, register, span
+
+# Watch-folder ingestion: poll a directory for new LAS/LAZ epochs, build an
+# item for each once it has stopped changing, and write it next to the
+# others. A checkpoint of handled files survives restarts.
+
+# Seconds between scans of the watched directory
+WATCH_INTERVAL = float(os.environ.get("TOPO4D_WATCH_INTERVAL", "5"))
+# Seconds a file's size and modification time must stay unchanged before it
+# is read; scanners and copies write epochs over minutes
+WATCH_SETTLE = float(os.environ.get("TOPO4D_WATCH_SETTLE", "30"))
+WATCH_WORKERS = int(os.environ.get("TOPO4D_WATCH_WORKERS", min(4, os.cpu_count() or 1)))
+
+CHECKPOINT_NAME = "watch-checkpoint.ndjson"
+_SUFFIXES = (".las", ".laz")
+
+logger = logging.getLogger(__name__)
+
+QUEUE_DEPTH = register(
+    Gauge("topo4d_watch_queue_depth", "Files that settled and wait for or are in processing.")
+)
+PENDING_FILES = register(
+    Gauge("topo4d_watch_pending_files", "New or changed files that have not settled yet.")
+)
+PROCESS_SECONDS = register(
+    Histogram(
+        "topo4d_watch_process_seconds",
+        "Time from a file settling to its item being written.",
+        labelnames=("result",),
+        buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0),
+    )
+)
+LATENCY_SECONDS = register(
+    Histogram(
+        "topo4d_watch_latency_seconds",
+        "Time from a file first being seen to its item being written, settling included.",
+        labelnames=("result",),
+        buckets=(1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0),
+    )
+)
+FILES_TOTAL = register(
+    Counter("topo4d_watch_files_total", "Files handled by the watcher.", labelnames=("result",))
+)
+
+
+def _signature(st: os.stat_result) -> Tuple[int, int]:
+    return st.st_size, st.st_mtime_ns
+
+
+def load_checkpoint(path: str) -> Dict[str, Dict[str, Any]]:
+    """Handled files by path relative to the watched directory, last record winning.
+
+    The checkpoint is append-only NDJSON; a line cut short by a crash is
+    skipped, so that file is handled again.
+    """
+    done: Dict[str, Dict[str, Any]] = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and "file" in record:
+                    done[record["file"]] = record
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def _end_last_line(path: str):
+    # A record cut short by a crash has no newline; the next one appended
+    # would run into it and be lost too
+    try:
+        with open(path, "rb+") as f:
+            if f.seek(0, os.SEEK_END) == 0:
+                return
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    except FileNotFoundError:
+        pass
+
+
+def _write_json(path: str, obj: Any):
+    # Written to a temporary file of its own and renamed, so readers never
+    # see half an item and concurrent writers never share a file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(obj, f, indent=2)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def item_id(rel: str) -> str:
+    """Item id for a file at ``rel`` under the watched directory, e.g. ``siteA_epoch`` for ``siteA/epoch.laz``."""
+    from .make_item import asset_key
+
+    return asset_key(os.path.splitext(rel)[0].replace(os.sep, "_"))
+
+
+class Watcher:
+    """Turn LAS/LAZ files appearing under ``directory`` into items in ``out_dir``.
+
+    Each ``poll`` walks the directory. A new or changed file is queued once
+    its size and modification time have not changed for ``settle`` seconds;
+    ``workers`` threads then read it in place (``las.ingest_file``), build
+    an item from ``form`` (flat form input, as for ``POST /api/v1/items``)
+    with the file as asset, and write it to ``out_dir/<id>.json``. The item
+    id is the file's path relative to ``directory`` (``item_id``); a file
+    whose id another file already has is recorded as failed rather than
+    overwriting its item. The datetime, unless ``form`` sets one, is the
+    file's modification time. Every handled file is appended to the
+    checkpoint in ``out_dir`` with its size and modification time, and is
+    only handled again if either changes.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        out_dir: Optional[str] = None,
+        form: Optional[Dict[str, Any]] = None,
+        settle: float = WATCH_SETTLE,
+        workers: int = WATCH_WORKERS,
+        checksum: Optional[bool] = None,
+        index: bool = True,
+    ):
+        self.directory = os.path.abspath(directory)
+        self.out_dir = os.path.abspath(out_dir or os.path.join(directory, "items"))
+        self.form = form or {}
+        self.settle = settle
+        self.checksum = checksum
+        self.index = index
+        os.makedirs(self.out_dir, exist_ok=True)
+        self.checkpoint_path = os.path.join(self.out_dir, CHECKPOINT_NAME)
+        self.done = load_checkpoint(self.checkpoint_path)
+        _end_last_line(self.checkpoint_path)
+        # Item files written so far -> the file each was built from
+        self.items = {r["item"]: rel for rel, r in self.done.items() if r.get("item")}
+        # Unsettled files: path -> (signature, first seen, unchanged since)
+        self.pending: Dict[str, Tuple[Tuple[int, int], float, float]] = {}
+        # Queued or in processing: path -> signature
+        self.queued: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="topo4d-watch")
+        QUEUE_DEPTH.collect = lambda: {(): len(self.queued)}
+        PENDING_FILES.collect = lambda: {(): len(self.pending)}
+
+    def _files(self):
+        for root, dirs, names in os.walk(self.directory):
+            # Skip hidden directories and our own output
+            dirs[:] = [
+                d for d in dirs
+                if not d.startswith(".") and os.path.join(root, d) != self.out_dir
+            ]
+            for name in names:
+                if name.lower().endswith(_SUFFIXES) and not name.startswith("."):
+                    yield os.path.join(root, name)
+
+    def poll(self, now: Optional[float] = None) -> int:
+        """Scan the directory once and queue the files that settled. Returns how many were queued."""
+        now = time.time() if now is None else now
+        seen = set()
+        queued = 0
+        for path in self._files():
+            rel = os.path.relpath(path, self.directory)
+            seen.add(rel)
+            try:
+                sig = _signature(os.stat(path))
+            except FileNotFoundError:
+                continue
+            with self._lock:
+                done = self.done.get(rel)
+                if (done and (done["size"], done["mtime_ns"]) == sig) or self.queued.get(rel) == sig:
+                    self.pending.pop(rel, None)
+                    continue
+                previous = self.pending.get(rel)
+                if previous is None or previous[0] != sig:
+                    self.pending[rel] = (sig, previous[1] if previous else now, now)
+                    continue
+                if now - previous[2] < self.settle or rel in self.queued:
+                    continue
+                del self.pending[rel]
+                self.queued[rel] = sig
+            self._pool.submit(self._process, rel, sig, previous[1], now)
+            queued += 1
+        with self._lock:
+            for rel in set(self.pending) - seen:
+                # Deleted or renamed before it settled
+                del self.pending[rel]
+        return queued
+
+    def _claim(self, rel: str) -> str:
+        """Reserve the item file for ``rel``; ValueError if another file has it."""
+        name = f"{item_id(rel)}.json"
+        with self._lock:
+            other = self.items.setdefault(name, rel)
+        if other != rel:
+            raise ValueError(f"item {name} already belongs to {other}")
+        return name
+
+    def _build(self, path: str, rel: str, mtime_ns: int) -> Tuple[Dict[str, Any], Optional[list]]:
+        from .make_item import asset_key, build_item, las_file_asset
+        from .validation import topo4d_validation_errors
+
+        info = ingest_file(path, checksum=self.checksum)
+        key = asset_key(info["filename"])
+        asset = las_file_asset(info["filename"], info["size"], info["checksum"])
+        asset["href"] = os.path.relpath(path, self.out_dir)
+        d = copy.deepcopy(self.form)
+        d.update({
+            "item_id": item_id(rel),
+            "file_assets": {key: asset},
+            "geometry": info["geometry"],
+            "bbox": info["bbox"],
+        })
+        if not d.get("datetime"):
+            d["datetime"] = datetime.fromtimestamp(mtime_ns / 1e9, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        errors: list = []
+        item = build_item(d, errors)
+        try:
+            errors += topo4d_validation_errors(item)
+        except Exception as e:
+            # e.g. the schema could not be fetched; the item is written anyway
+            logger.warning("%s not validated: %s", os.path.basename(path), e)
+            return item, None
+        return item, errors
+
+    def _process(self, rel: str, sig: Tuple[int, int], first_seen: float, settled: float):
+        record: Dict[str, Any] = {"file": rel, "size": sig[0], "mtime_ns": sig[1]}
+        name = None
+        try:
+            with span("watch_item"):
+                name = self._claim(rel)
+                item, errors = self._build(os.path.join(self.directory, rel), rel, sig[1])
+                item_path = os.path.join(self.out_dir, name)
+                _write_json(item_path, item)
+            if self.index and errors == []:
+                from .index import index_item
+
+                index_item(item)
+            record.update(item=os.path.relpath(item_path, self.out_dir), valid=None if errors is None else not errors)
+            result = "unvalidated" if errors is None else "invalid" if errors else "valid"
+        except Exception as e:
+            # Recorded as handled: a broken file is retried only once it changes
+            record["error"] = f"{type(e).__name__}: {e}"
+            result = "failed"
+            if name is not None:
+                # Only items actually written keep their id, as after a restart
+                with self._lock:
+                    self.items.pop(name, None)
+        finished = time.time()
+        record["seconds"] = round(finished - settled, 3)
+        record["latency"] = round(finished - first_seen, 3)
+        PROCESS_SECONDS.observe(finished - settled, result)
+        LATENCY_SECONDS.observe(finished - first_seen, result)
+        FILES_TOTAL.inc(result)
+        with self._lock:
+            with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+            self.done[rel] = record
+            self.queued.pop(rel, None)
+            depth = len(self.queued)
+        if result == "failed":
+            logger.warning("%s failed after %.1f s: %s (queue %d)", rel, record["seconds"], record["error"], depth)
+        else:
+            logger.info("%s -> %s (%s, %.1f s, queue %d)", rel, record["item"], result, record["seconds"], depth)
+
+    def run(self, interval: float = WATCH_INTERVAL, stop: Optional[threading.Event] = None):
+        """Poll every ``interval`` seconds until ``stop`` is set (or forever)."""
+        stop = stop or threading.Event()
+        logger.info(
+            "Watching %s, items in %s (%d files in checkpoint)",
+            self.directory, self.out_dir, len(self.done),
+        )
+        while not stop.is_set():
+            try:
+                self.poll()
+            except OSError as e:
+                # e.g. a network share that is briefly unavailable
+                logger.warning("Scan of %s failed: %s", self.directory, e)
+            stop.wait(interval)
+
+    def close(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)